@@ -0,0 +1,186 @@
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+
+QUEUE_SIZE = 10000
+
+_handler = None # QueueHandler installed on the root logger
+_listener = None
+_settings = {}
+
+
+class Logger:
+    """
+    Structured logger: `log.info("turn complete", session=key, turn=3)`.
+
+    Keyword arguments become fields of the record (key=value in text output,
+    JSON keys in json output). Disabled levels cost one isEnabledFor() check;
+    records are formatted and written by a background thread (see setup()).
+    """
+
+    def __init__(self, name):
+        self._logger = logging.getLogger(name)
+        self._limits = {} # key -> [next_allowed_at, suppressed]
+
+    def is_enabled(self, level):
+        return self._logger.isEnabledFor(level)
+
+    def _emit(self, level, msg, fields, exc_info=None):
+        if self._logger.isEnabledFor(level):
+            self._logger.log(level, msg, exc_info=exc_info, extra={"fields": fields}, stacklevel=3)
+
+    def debug(self, msg, **fields):
+        self._emit(logging.DEBUG, msg, fields)
+
+    def info(self, msg, **fields):
+        self._emit(logging.INFO, msg, fields)
+
+    def warning(self, msg, **fields):
+        self._emit(logging.WARNING, msg, fields)
+
+    def error(self, msg, **fields):
+        self._emit(logging.ERROR, msg, fields)
+
+    def critical(self, msg, **fields):
+        self._emit(logging.CRITICAL, msg, fields)
+
+    def exception(self, msg, **fields):
+        self._emit(logging.ERROR, msg, fields, exc_info=True)
+
+    def limited(self, key, interval_s, level, msg, **fields):
+        """
+        Hot-path variant: at most one record per `interval_s` seconds for `key`.
+        The next record that gets through carries `suppressed=N` for the ones dropped.
+        """
+        if not self._logger.isEnabledFor(level):
+            return
+        now = time.monotonic()
+        limit = self._limits.get(key)
+        if limit is not None and now < limit[0]:
+            limit[1] += 1
+            return
+        suppressed = limit[1] if limit is not None else 0
+        self._limits[key] = [now + interval_s, 0]
+        if suppressed:
+            fields["suppressed"] = suppressed
+        self._emit(level, msg, fields)
+
+def get_logger(name):
+    return Logger(name)
+
+
+# --- Formatting (runs on the listener thread) ---
+def _field_value(value):
+    text = value if isinstance(value, str) else str(value) if isinstance(value, (int, float)) else repr(value)
+    if not text or any(c.isspace() or c in '"=' for c in text):
+        return json.dumps(text, ensure_ascii=False)
+    return text
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s [%(name)s] %(message)s")
+
+    def format(self, record):
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            head, sep, tail = line.partition("\n") # 예외 traceback 은 필드 뒤에
+            line = head + " " + " ".join(f"{k}={_field_value(v)}" for k, v in fields.items()) + sep + tail
+        return line
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in (getattr(record, "fields", None) or {}).items():
+            entry[key] = value if isinstance(value, (str, int, float, bool, type(None), list, dict)) else repr(value)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=repr)
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Never blocks the caller: when the queue is full the record is dropped and counted."""
+    dropped = 0
+
+    def prepare(self, record):
+        # 메시지/예외만 문자열로 만들고 fields 는 그대로 전달 (나머지 포맷은 listener 스레드에서)
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _DroppingQueueHandler.dropped += 1
+
+
+def _start_listener():
+    global _listener
+    fmt = _settings["fmt"]
+    stream_handler = logging.StreamHandler(_settings["stream"])
+    stream_handler.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+    _handler.queue = queue.Queue(_settings["queue_size"])
+    _listener = logging.handlers.QueueListener(_handler.queue, stream_handler, respect_handler_level=False)
+    _listener.start()
+
+def _after_fork_in_child():
+    # 워커 프로세스: fork 로 listener 스레드가 복제되지 않으므로 새 큐/스레드로 다시 시작
+    if _handler is not None:
+        _start_listener()
+
+def setup(level="INFO", levels=None, fmt="text", stream=None, queue_size=QUEUE_SIZE):
+    """
+    Routes all logging through a queue drained by a background thread.
+
+    Args:
+        level (str): Root level (DEBUG/INFO/WARNING/ERROR).
+        levels (dict): Per-module levels, e.g. {"memoryblock": "WARNING", "main": "DEBUG"}.
+        fmt (str): "text" (key=value fields) or "json" (one object per line).
+        stream: Output stream (default: stderr).
+        queue_size (int): Records buffered before new ones are dropped.
+    """
+    global _handler
+    _settings.update(fmt=fmt, stream=stream or sys.stderr, queue_size=queue_size)
+    root = logging.getLogger()
+    if _handler is None:
+        _handler = _DroppingQueueHandler(queue.Queue(queue_size))
+        atexit.register(shutdown)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=_after_fork_in_child)
+    elif _listener is not None:
+        _listener.stop()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_handler)
+    root.setLevel(level)
+    for name, name_level in (levels or {}).items():
+        logging.getLogger(name).setLevel(name_level)
+    _start_listener()
+
+def dropped():
+    return _DroppingQueueHandler.dropped
+
+def shutdown():
+    """Flushes queued records (also registered with atexit)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,146 @@
+# --- Overflow policies ---
+DROP_OLDEST = "drop_oldest" # keep the most recent max_capacity bytes
+DROP_NEWEST = "drop_newest" # ignore what does not fit
+
+
+def _is_exported(buf):
+    """True while a memoryview handed out by flush() still references buf."""
+    try:
+        buf.append(0) # bytearray refuses to resize while views exist
+    except BufferError:
+        return True
+    del buf[-1]
+    return False
+
+
+class AudioBuffer:
+    """
+    Reusable per-session PCM accumulator.
+
+    Replaces `bytes += chunk` (quadratic over a long turn) with appends into a
+    preallocated bytearray that grows geometrically up to max_capacity. Once full,
+    DROP_OLDEST wraps around it as a ring (a head offset moves instead of the bytes),
+    so each append costs O(len(chunk)). flush() hands out a zero-copy memoryview of
+    the turn (copied into one linear buffer only if it wrapped) and swaps in a spare
+    buffer, so the view stays valid while the next turn is being written.
+    """
+
+    def __init__(self, capacity=64 * 1024, max_capacity=4 * 1024 * 1024, overflow=DROP_OLDEST):
+        """
+        Args:
+            capacity (int): Bytes preallocated up front.
+            max_capacity (int): Hard bound on buffered bytes per turn.
+            overflow (str): DROP_OLDEST or DROP_NEWEST once max_capacity is reached.
+        """
+        if overflow not in (DROP_OLDEST, DROP_NEWEST):
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.max_capacity = max(1, max_capacity)
+        self.capacity = min(max(1, capacity), self.max_capacity)
+        self.overflow = overflow
+        self._buf = bytearray(self.capacity)
+        self._spare = None
+        self._head = 0 # offset of the oldest byte in _buf
+        self._len = 0
+        self.high_water_mark = 0 # largest turn seen, in bytes
+        self.dropped_bytes = 0
+
+    def __len__(self):
+        return self._len
+
+    def append(self, data):
+        """Copies data into the buffer. Returns the number of bytes dropped by the overflow policy."""
+        data = memoryview(data).cast("B")
+        n = len(data)
+        if n == 0:
+            return 0
+        dropped = 0
+        needed = self._len + n
+        if min(needed, self.max_capacity) > len(self._buf):
+            self._grow(needed)
+
+        if needed > self.max_capacity:
+            dropped = needed - self.max_capacity
+            self.dropped_bytes += dropped
+            if self.overflow == DROP_NEWEST:
+                n -= dropped
+                data = data[:n]
+            elif n >= self.max_capacity:
+                # The chunk alone fills the buffer: keep its newest bytes
+                data = data[n - self.max_capacity:]
+                n = self.max_capacity
+                self._head, self._len = 0, 0
+            else:
+                # Buffer is at max_capacity here: advance the head past the oldest bytes
+                self._head = (self._head + dropped) % len(self._buf)
+                self._len -= dropped
+
+        size = len(self._buf)
+        tail = (self._head + self._len) % size
+        first = min(n, size - tail)
+        self._buf[tail:tail + first] = data[:first]
+        if first < n:
+            self._buf[:n - first] = data[first:] # wrap around
+        self._len += n
+        if self._len > self.high_water_mark:
+            self.high_water_mark = self._len
+        return dropped
+
+    def _copy_out(self, dest):
+        """Copies the buffered bytes, oldest first, to the start of dest."""
+        src = memoryview(self._buf)
+        first = min(self._len, len(self._buf) - self._head)
+        dest[:first] = src[self._head:self._head + first]
+        dest[first:self._len] = src[:self._len - first]
+
+    def _grow(self, needed):
+        size = min(self.max_capacity, max(needed, len(self._buf) * 2))
+        grown = bytearray(size)
+        self._copy_out(grown)
+        self._buf = grown
+        self._head = 0
+
+    def _linearize(self):
+        """Makes the buffered bytes contiguous (only needed after the ring wrapped)."""
+        if self._head + self._len > len(self._buf):
+            linear = bytearray(len(self._buf))
+            self._copy_out(linear)
+            self._buf = linear
+            self._head = 0
+
+    def view(self):
+        """
+        Returns:
+            memoryview: The bytes buffered so far, without ending the turn. Only valid
+                        until the next append().
+        """
+        self._linearize()
+        return memoryview(self._buf)[self._head:self._head + self._len]
+
+    def flush(self):
+        """
+        Ends the current turn.
+
+        Returns:
+            memoryview: Zero-copy view of the accumulated bytes. It remains valid until
+                        the caller drops it; the buffer writes the next turn elsewhere.
+        """
+        view = self.view()
+        spare = self._spare
+        if spare is None or _is_exported(spare):
+            spare = bytearray(self.capacity) # previous turn still in use downstream
+        self._spare = self._buf
+        self._buf = spare
+        self._head, self._len = 0, 0
+        return view
+
+    def clear(self):
+        """Discards the current turn without handing it out."""
+        self._head, self._len = 0, 0
+
+    def stats(self):
+        return {
+            "buffered": self._len,
+            "allocated": len(self._buf),
+            "high_water_mark": self.high_water_mark,
+            "dropped_bytes": self.dropped_bytes,
+        }
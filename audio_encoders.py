@@ -0,0 +1,103 @@
+import io
+import struct
+
+import app_logging
+
+log = app_logging.get_logger("audio_encoders")
+
+# --- Transcription input encoders ---
+# Each backend turns 16-bit mono PCM into a container the transcription model accepts.
+#   wav   : 44-byte header + PCM, in-process, no transcode (default)
+#   flac  : soundfile/libsndfile, in-process (optional: pip install soundfile numpy)
+#   mp3   : lameenc, in-process (optional: pip install lameenc)
+#   pydub : legacy pydub -> ffmpeg subprocess MP3 export
+# `offload=True` means the encode is heavy enough to run in the worker pool.
+
+_WAV_HEADER = struct.Struct("<4sI4s4sIHHIIHH4sI")
+
+
+class Encoder:
+    def __init__(self, name, mime_type, encode, offload=False, available=None):
+        self.name = name
+        self.mime_type = mime_type
+        self.encode = encode # encode(pcm_bytes, sample_rate) -> bytes
+        self.offload = offload
+        self._available = available
+
+    def is_available(self):
+        return self._available is None or self._available()
+
+    def __repr__(self):
+        return f"Encoder({self.name!r}, {self.mime_type!r}, offload={self.offload})"
+
+
+ENCODERS = {}
+_warned = set() # names already reported as unavailable
+
+def register_encoder(encoder):
+    """Adds or replaces a backend in the registry."""
+    ENCODERS[encoder.name] = encoder
+    return encoder
+
+def get_encoder(name, fallback="wav"):
+    """Returns the named encoder, or the fallback if its optional dependency is missing."""
+    encoder = ENCODERS.get(name)
+    if encoder is None or not encoder.is_available():
+        if name != fallback and name not in _warned:
+            _warned.add(name)
+            log.warning("encoder unavailable, using fallback", encoder=name, fallback=fallback)
+        encoder = ENCODERS[fallback]
+    return encoder
+
+def _has_module(module_name):
+    def check():
+        try:
+            __import__(module_name)
+            return True
+        except ImportError:
+            return False
+    return check
+
+
+# --- Backends ---
+def encode_wav(pcm, sample_rate, channels=1, sample_width=2):
+    """Wraps raw PCM in a RIFF/WAVE header (one copy, no resampling or transcoding)."""
+    byte_rate = sample_rate * channels * sample_width
+    header = _WAV_HEADER.pack(
+        b"RIFF", 36 + len(pcm), b"WAVE",
+        b"fmt ", 16, 1, channels, sample_rate, byte_rate, channels * sample_width, sample_width * 8,
+        b"data", len(pcm),
+    )
+    return header + pcm
+
+def encode_flac(pcm, sample_rate):
+    import numpy as np
+    import soundfile as sf
+
+    out = io.BytesIO()
+    sf.write(out, np.frombuffer(pcm, dtype=np.int16), sample_rate, format="FLAC", subtype="PCM_16")
+    return out.getvalue()
+
+def encode_mp3_lame(pcm, sample_rate):
+    import lameenc
+
+    encoder = lameenc.Encoder()
+    encoder.set_bit_rate(64)
+    encoder.set_in_sample_rate(sample_rate)
+    encoder.set_channels(1)
+    encoder.set_quality(7) # 2 = best, 7 = fastest
+    return bytes(encoder.encode(bytes(pcm)) + encoder.flush())
+
+def encode_mp3_pydub(pcm, sample_rate):
+    from pydub import AudioSegment
+
+    audio_segment = AudioSegment(data=bytes(pcm), sample_width=2, frame_rate=sample_rate, channels=1)
+    mp3_buffer = io.BytesIO()
+    audio_segment.export(mp3_buffer, format="mp3", codec="libmp3lame")
+    return mp3_buffer.getvalue()
+
+
+register_encoder(Encoder("wav", "audio/wav", encode_wav))
+register_encoder(Encoder("flac", "audio/flac", encode_flac, offload=True, available=_has_module("soundfile")))
+register_encoder(Encoder("mp3", "audio/mp3", encode_mp3_lame, offload=True, available=_has_module("lameenc")))
+register_encoder(Encoder("pydub", "audio/mp3", encode_mp3_pydub, offload=True, available=_has_module("pydub")))
@@ -0,0 +1,60 @@
+import struct
+
+# --- Binary WebSocket framing ---
+# Negotiated through the client's setup message ({"setup": {..., "binary_frames": true}}).
+# Clients that do not ask for it keep using the JSON/base64 messages.
+#
+# Frame layout (little endian):
+#   | kind (u8) | flags (u8) | seq (u16) | payload (raw PCM / JPEG bytes) ... |
+FRAME_HEADER = struct.Struct("<BBH")
+HEADER_SIZE = FRAME_HEADER.size
+
+KIND_AUDIO_PCM = 0x01
+KIND_IMAGE_JPEG = 0x02
+
+KIND_TO_MIME = {
+    KIND_AUDIO_PCM: "audio/pcm",
+    KIND_IMAGE_JPEG: "image/jpeg",
+}
+MIME_TO_KIND = {mime: kind for kind, mime in KIND_TO_MIME.items()}
+
+
+class FrameError(ValueError):
+    """Raised when a binary frame is truncated or has an unknown kind."""
+
+
+def wants_binary_frames(setup):
+    """Returns True if the client's setup message asks for binary framing."""
+    return isinstance(setup, dict) and setup.get("binary_frames") is True
+
+
+def parse_frame(message):
+    """
+    Splits a binary frame into its header fields and payload without copying.
+
+    Args:
+        message (bytes | bytearray | memoryview): The raw websocket message.
+
+    Returns:
+        tuple: (kind, seq, payload) where payload is a memoryview slice of message.
+    """
+    view = memoryview(message)
+    if len(view) < HEADER_SIZE:
+        raise FrameError(f"Frame too short: {len(view)} bytes")
+    kind, _flags, seq = FRAME_HEADER.unpack_from(view, 0)
+    if kind not in KIND_TO_MIME:
+        raise FrameError(f"Unknown frame kind: {kind:#x}")
+    return kind, seq, view[HEADER_SIZE:]
+
+
+def pack_frame(kind, payload, seq=0, flags=0):
+    """
+    Builds a binary frame with a single copy of the payload.
+
+    Returns:
+        bytearray: header + payload, ready for websocket.send().
+    """
+    frame = bytearray(HEADER_SIZE + len(payload))
+    FRAME_HEADER.pack_into(frame, 0, kind, flags, seq & 0xFFFF)
+    frame[HEADER_SIZE:] = payload
+    return frame
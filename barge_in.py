@@ -0,0 +1,98 @@
+import asyncio
+
+import app_logging
+
+log = app_logging.get_logger("barge_in")
+
+PCM_BYTES_PER_SECOND = 24000 * 2 # model audio: 24 kHz, 16-bit mono
+MAX_PENDING_ACKS = 16 # interrupts awaiting an interrupt_ack; older ones are given up on
+
+
+class BargeInController:
+    """
+    Stops model playback when the user starts talking over it.
+
+    Tracks whether model audio is still "in flight" (being generated, queued in the
+    outbox, or estimated to be playing on the client). On interrupt it discards the
+    queued audio, skips the rest of the current model turn and tells the client to
+    drop its playback buffer. The client acknowledges with {"interrupt_ack": {"id": n}},
+    which closes the interrupt-to-silence latency measurement.
+    """
+
+    def __init__(self, outbox, onset_ms=0):
+        """
+        Args:
+            outbox (outbound.ClientSender): The connection's sender.
+            onset_ms (int): VAD onset delay, added to reported latencies.
+        """
+        self._outbox = outbox
+        self.onset_ms = onset_ms
+        self.generating = False   # model turn still producing audio
+        self.skip_turn = False    # drop remaining audio parts of the current turn
+        self._playback_until = 0.0
+        self._next_id = 0
+        self._pending = {}        # interrupt id -> detection time, oldest first
+        self.stats_data = {
+            "interrupts": 0,
+            "acks": 0,
+            "unacked": 0,
+            "discarded_bytes": 0,
+            "latency_total_ms": 0.0,
+            "latency_max_ms": 0.0,
+        }
+
+    def audio_in_flight(self):
+        loop = asyncio.get_running_loop()
+        return self.generating or loop.time() < self._playback_until
+
+    def on_model_audio(self, nbytes):
+        """Call for each model audio part. Returns False if the part must be dropped."""
+        if self.skip_turn:
+            return False
+        self.generating = True
+        now = asyncio.get_running_loop().time()
+        self._playback_until = max(self._playback_until, now) + nbytes / PCM_BYTES_PER_SECOND
+        return True
+
+    def on_turn_end(self):
+        """Call on turn_complete / interrupted from the Live API."""
+        self.generating = False
+        self.skip_turn = False
+
+    async def interrupt(self, reason):
+        """Discards queued model audio and sends the client a flush message."""
+        now = asyncio.get_running_loop().time()
+        self.skip_turn = self.generating
+        self.generating = False
+        self._playback_until = 0.0
+        discarded = self._outbox.discard_audio()
+
+        self._next_id += 1
+        self._pending[self._next_id] = now
+        if len(self._pending) > MAX_PENDING_ACKS:
+            # client that never acks (or acks with unknown ids): keep the newest ids only
+            del self._pending[next(iter(self._pending))]
+            self.stats_data["unacked"] += 1
+        self.stats_data["interrupts"] += 1
+        self.stats_data["discarded_bytes"] += discarded
+        log.info("interrupt", id=self._next_id, reason=reason, discarded_bytes=discarded)
+        await self._outbox.send_json({"interrupt": {"id": self._next_id, "reason": reason}})
+
+    def on_ack(self, ack):
+        """Handles the client's interrupt_ack; returns the measured latency in ms or None."""
+        detected_at = self._pending.pop(ack.get("id"), None)
+        if detected_at is None:
+            return None
+        latency_ms = (asyncio.get_running_loop().time() - detected_at) * 1000 + self.onset_ms
+        self.stats_data["acks"] += 1
+        self.stats_data["latency_total_ms"] += latency_ms
+        self.stats_data["latency_max_ms"] = max(self.stats_data["latency_max_ms"], latency_ms)
+        log.info("interrupt silenced", id=ack.get("id"), latency_ms=round(latency_ms), vad_onset_ms=self.onset_ms)
+        return latency_ms
+
+    def stats(self):
+        acks = self.stats_data["acks"]
+        return {
+            **self.stats_data,
+            "latency_avg_ms": self.stats_data["latency_total_ms"] / acks if acks else 0.0,
+        }
@@ -0,0 +1,86 @@
+"""
+JSON/base64 vs binary framing CPU cost per concurrent session.
+
+Simulates one minute of conversation per session:
+  - uplink: the browser sends a 3 s, 16 kHz mono int16 chunk (index.html recordChunk)
+  - downlink: the Live API returns 24 kHz mono int16 audio in ~40 ms parts
+
+Usage:
+    python benchmarks/bench_audio_protocol.py [--sessions 1 10 50]
+"""
+import argparse
+import base64
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import audio_protocol as ap
+
+UPLINK_CHUNK_BYTES = 16000 * 2 * 3      # 3 s @ 16 kHz
+DOWNLINK_PART_BYTES = 24000 * 2 // 25   # 40 ms @ 24 kHz
+SECONDS_PER_SESSION = 60
+
+
+def json_session(uplink_msgs, downlink_parts):
+    for message in uplink_msgs:
+        data = json.loads(message)
+        for chunk in data["realtime_input"]["media_chunks"]:
+            bytes(base64.b64decode(chunk["data"]))
+    for part in downlink_parts:
+        json.dumps({"audio": base64.b64encode(part).decode('utf-8')})
+
+
+def binary_session(uplink_frames, downlink_parts):
+    for message in uplink_frames:
+        _kind, _seq, payload = ap.parse_frame(message)
+        bytes(payload) # SDK 경계에서의 복사도 포함
+    for part in downlink_parts:
+        ap.pack_frame(ap.KIND_AUDIO_PCM, part)
+
+
+def build_traffic():
+    pcm_up = os.urandom(UPLINK_CHUNK_BYTES)
+    pcm_down = os.urandom(DOWNLINK_PART_BYTES)
+    n_up = SECONDS_PER_SESSION // 3
+    n_down = SECONDS_PER_SESSION * 25 // 2 # 모델이 절반 정도 발화한다고 가정
+
+    b64 = base64.b64encode(pcm_up).decode('utf-8')
+    json_up = [json.dumps({"realtime_input": {"media_chunks": [{"mime_type": "audio/pcm", "data": b64}]}})] * n_up
+    bin_up = [bytes(ap.pack_frame(ap.KIND_AUDIO_PCM, pcm_up, seq=i)) for i in range(n_up)]
+    down = [pcm_down] * n_down
+    wire = {
+        "json": len(json_up[0]) * n_up + len(json.dumps({"audio": base64.b64encode(pcm_down).decode('utf-8')})) * n_down,
+        "binary": len(bin_up[0]) * n_up + (ap.HEADER_SIZE + DOWNLINK_PART_BYTES) * n_down,
+    }
+    return json_up, bin_up, down, wire
+
+
+def measure(fn, *args, sessions):
+    start = time.process_time()
+    for _ in range(sessions):
+        fn(*args)
+    return time.process_time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 50])
+    args = parser.parse_args()
+
+    json_up, bin_up, down, wire = build_traffic()
+    print(f"wire bytes / session-minute: json={wire['json']:,}  binary={wire['binary']:,}  "
+          f"({100 * (1 - wire['binary'] / wire['json']):.1f}% saved)")
+    print(f"{'sessions':>8} {'json ms/sess':>14} {'binary ms/sess':>15} {'saved ms/sess':>14} {'saved %':>8}")
+    for n in args.sessions:
+        t_json = measure(json_session, json_up, down, sessions=n)
+        t_bin = measure(binary_session, bin_up, down, sessions=n)
+        per_json = 1000 * t_json / n
+        per_bin = 1000 * t_bin / n
+        print(f"{n:>8} {per_json:>14.2f} {per_bin:>15.2f} {per_json - per_bin:>14.2f} {100 * (1 - t_bin / t_json):>7.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Per-turn encode latency of the transcription input encoders (audio_encoders.py).
+
+Also times the old path (pydub/ffmpeg MP3 + base64 encode/decode) for comparison.
+Encoders whose optional dependency is missing are reported as unavailable.
+
+Usage:
+    python benchmarks/bench_transcribe_encode.py [--seconds 5] [--rate 24000] [--repeat 20]
+"""
+import argparse
+import base64
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import audio_encoders
+
+
+def legacy_mp3_base64(pcm, sample_rate):
+    data = audio_encoders.encode_mp3_pydub(pcm, sample_rate)
+    return base64.b64decode(base64.b64encode(data).decode('utf-8'))
+
+
+def time_encoder(fn, pcm, sample_rate, repeat):
+    fn(pcm, sample_rate) # warm-up (imports, codec init)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn(pcm, sample_rate)
+        samples.append(time.perf_counter() - start)
+    return samples, len(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5.0, help="turn length")
+    parser.add_argument("--rate", type=int, default=24000, help="sample rate (16000 mic, 24000 model)")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    pcm = os.urandom(int(args.seconds * args.rate) * 2)
+    candidates = [(name, enc.encode, enc.is_available()) for name, enc in audio_encoders.ENCODERS.items()]
+    candidates.append(("legacy(pydub+b64)", legacy_mp3_base64, audio_encoders.ENCODERS["pydub"].is_available()))
+
+    print(f"turn: {args.seconds}s @ {args.rate} Hz = {len(pcm):,} bytes PCM")
+    print(f"{'encoder':>18} {'median ms':>10} {'p95 ms':>9} {'out bytes':>11}")
+    for name, fn, available in candidates:
+        if not available:
+            print(f"{name:>18} {'unavailable':>10}")
+            continue
+        try:
+            samples, size = time_encoder(fn, pcm, args.rate, args.repeat)
+        except Exception as e:
+            print(f"{name:>18} failed: {e}")
+            continue
+        samples.sort()
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        print(f"{name:>18} {1000 * statistics.median(samples):>10.2f} {1000 * p95:>9.2f} {size:>11,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Local stand-in for `client.aio.live.connect` (no network, no API key).
+
+FakeClient().aio.live.connect(model=..., config=...) yields a FakeLiveSession that
+accepts realtime input and, every `turn_input_ms` of received audio, plays one model
+turn from a FakeSchedule:
+    [tool_call -> wait for send_tool_response] -> first_audio_ms delay ->
+    audio parts (+ output_transcription) paced in real time ->
+    session_resumption_update -> turn_complete
+Messages are real google.genai.types objects, so main.py's handling code runs unchanged.
+
+    import main
+    main.client = fake_live.FakeClient(fake_live.FakeSchedule(first_audio_ms=200))
+"""
+import asyncio
+import itertools
+import math
+import struct
+import uuid
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+from google.genai import types
+
+MODEL_RATE = 24000 # Live API output: 24 kHz mono int16
+INPUT_RATE = 16000
+
+
+class FakeSchedule:
+    def __init__(self, turn_input_ms=1000, first_audio_ms=300, reply_ms=2000, part_ms=40,
+                 realtime=True, transcript=True, tool_call_every=0, tool_name="recall_agent_memory",
+                 resumption_every=1, connect_ms=0):
+        """
+        Args:
+            turn_input_ms (int): Received input audio that triggers one model turn.
+            first_audio_ms (int): Simulated model latency before the first audio part.
+            reply_ms (int): Audio length of each model turn.
+            part_ms (int): Duration of one audio part.
+            realtime (bool): Pace parts at playback speed (False: as fast as possible).
+            transcript (bool): Send an output_transcription with each part.
+            tool_call_every (int): Every Nth turn starts with a tool call (0: never).
+            tool_name (str): Function called (must exist in my_function_callings).
+            resumption_every (int): Send a session_resumption_update every N turns (0: never).
+            connect_ms (int): Simulated connect handshake time.
+        """
+        self.turn_input_ms = turn_input_ms
+        self.first_audio_ms = first_audio_ms
+        self.reply_ms = reply_ms
+        self.part_ms = part_ms
+        self.realtime = realtime
+        self.transcript = transcript
+        self.tool_call_every = tool_call_every
+        self.tool_name = tool_name
+        self.resumption_every = resumption_every
+        self.connect_ms = connect_ms
+
+
+def tone(ms, rate=MODEL_RATE, freq=220.0, amplitude=8000):
+    """int16 mono sine of `ms` milliseconds (synthetic model speech)."""
+    n = rate * ms // 1000
+    return struct.pack(f"<{n}h", *(int(amplitude * math.sin(2 * math.pi * freq * i / rate)) for i in range(n)))
+
+
+class FakeLiveSession:
+    def __init__(self, schedule, resumed_from=None):
+        self.schedule = schedule
+        self.resumed_from = resumed_from
+        self._turn_bytes = INPUT_RATE * 2 * schedule.turn_input_ms // 1000
+        self._pending_bytes = 0
+        self._turns = asyncio.Queue()
+        self._tool_responses = asyncio.Queue()
+        self._part = tone(schedule.part_ms)
+        self._ids = itertools.count(1)
+        self.metrics = {"audio_bytes_in": 0, "images_in": 0, "turns": 0, "tool_calls": 0, "tool_responses": 0}
+
+    # --- client -> model ---
+    def _on_audio(self, nbytes):
+        self.metrics["audio_bytes_in"] += nbytes
+        self._pending_bytes += nbytes
+        while self._pending_bytes >= self._turn_bytes:
+            self._pending_bytes -= self._turn_bytes
+            self._turns.put_nowait(next(self._ids))
+
+    async def send_realtime_input(self, *, media=None, audio=None, video=None, text=None, **_kwargs):
+        blob = media or audio or video
+        if blob is None:
+            return
+        if (blob.mime_type or "").startswith("audio/"):
+            self._on_audio(len(blob.data or b""))
+        else:
+            self.metrics["images_in"] += 1
+
+    async def send(self, input=None, end_of_turn=False):
+        """Legacy send(input={"mime_type": ..., "data": ...})."""
+        if isinstance(input, dict) and str(input.get("mime_type", "")).startswith("audio/"):
+            self._on_audio(len(input.get("data") or b""))
+        elif input is not None:
+            self.metrics["images_in"] += 1
+
+    async def send_tool_response(self, *, function_responses=None):
+        self.metrics["tool_responses"] += 1
+        self._tool_responses.put_nowait(function_responses)
+
+    # --- model -> client ---
+    async def receive(self):
+        """Yields one model turn (ends after turn_complete), like the SDK's receive()."""
+        s = self.schedule
+        turn = await self._turns.get()
+        self.metrics["turns"] += 1
+
+        if s.tool_call_every and turn % s.tool_call_every == 0:
+            self.metrics["tool_calls"] += 1
+            yield types.LiveServerMessage(tool_call=types.LiveServerToolCall(function_calls=[
+                types.FunctionCall(id=f"call-{turn}", name=s.tool_name, args={"count": 1}),
+            ]))
+            try:
+                await asyncio.wait_for(self._tool_responses.get(), timeout=10)
+            except asyncio.TimeoutError:
+                pass
+
+        await asyncio.sleep(s.first_audio_ms / 1000)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for i in range(max(1, s.reply_ms // s.part_ms)):
+            if s.realtime:
+                delay = start + i * s.part_ms / 1000 - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            yield types.LiveServerMessage(server_content=types.LiveServerContent(
+                model_turn=types.Content(role="model", parts=[
+                    types.Part(inline_data=types.Blob(data=self._part, mime_type=f"audio/pcm;rate={MODEL_RATE}")),
+                ]),
+                output_transcription=types.Transcription(text="아") if s.transcript else None,
+            ))
+
+        if s.resumption_every and turn % s.resumption_every == 0:
+            yield types.LiveServerMessage(session_resumption_update=types.LiveServerSessionResumptionUpdate(
+                new_handle=f"fake-{uuid.uuid4().hex}", resumable=True,
+            ))
+        yield types.LiveServerMessage(server_content=types.LiveServerContent(turn_complete=True))
+
+
+class FakeClient:
+    """Drop-in for genai.Client with only `aio.live.connect` implemented."""
+
+    def __init__(self, schedule=None):
+        self.schedule = schedule or FakeSchedule()
+        self.aio = SimpleNamespace(live=SimpleNamespace(connect=self.connect))
+        self.sessions_opened = 0
+        self.sessions_resumed = 0
+        self.active = 0
+
+    @asynccontextmanager
+    async def connect(self, model=None, config=None):
+        resumption = getattr(config, "session_resumption", None)
+        handle = getattr(resumption, "handle", None)
+        self.sessions_opened += 1
+        self.sessions_resumed += handle is not None
+        self.active += 1
+        try:
+            await asyncio.sleep(self.schedule.connect_ms / 1000)
+            yield FakeLiveSession(self.schedule, resumed_from=handle)
+        finally:
+            self.active -= 1
@@ -0,0 +1,276 @@
+"""
+Concurrent-client load test for gemini_session_handler against the fake Live backend.
+
+Starts main.py's websocket server in a child process with main.client replaced by
+fake_live.FakeClient (no network, no API key), then for each client count K opens K
+websocket clients that replay PCM turns and reports:
+  - first-audio latency (end of the user's turn -> first model audio frame) p50/p90/p99
+  - downlink throughput, turns completed / timed out
+  - server CPU % (total and per session) and RSS (total and growth per session)
+
+The server uses config.py if present, otherwise config.py.sample (transcription off).
+Chain files are written to a temporary directory.
+
+Usage:
+    python benchmarks/load_live.py [--clients 1 10 50] [--turns 5] [--pcm speech.wav]
+                                   [--first-audio-ms 300] [--reply-ms 2000] [--workers 1]
+                                   [--connect-ms 800] [--pool 4]
+"""
+import argparse
+import asyncio
+import importlib.util
+import os
+import random
+import socket
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+INPUT_RATE = 16000
+CHUNK_MS = 100
+
+
+# --- Server side (child process) ---
+def load_config():
+    """Imports config.py, falling back to config.py.sample for local runs."""
+    try:
+        import config
+    except ImportError:
+        spec = importlib.util.spec_from_loader("config", loader=None)
+        config = importlib.util.module_from_spec(spec)
+        with open(os.path.join(REPO, "config.py.sample"), encoding="utf-8") as f:
+            exec(f.read(), config.__dict__)
+        sys.modules["config"] = config
+    config.SND_TRANSCRIP = False # transcription would call the real API
+    config.RCV_TRANSCRIP = False
+    return config
+
+def serve(args):
+    import fake_live
+
+    os.chdir(tempfile.mkdtemp(prefix="load_live_")) # chain files (my_function_callings loads at import)
+    cfg = load_config()
+    cfg.WORKERS = args.workers
+    cfg.LIVE_POOL_MAX = args.pool
+    cfg.LIVE_TRANSCRIPTS = args.live_transcripts
+    import main
+
+    main.client = fake_live.FakeClient(fake_live.FakeSchedule(
+        turn_input_ms=args.turn_ms,
+        first_audio_ms=args.first_audio_ms,
+        reply_ms=args.reply_ms,
+        tool_call_every=args.tool_every,
+        connect_ms=args.connect_ms,
+    ))
+    main.SERVER_HOST, main.SERVER_PORT = "127.0.0.1", args.port
+    if args.workers > 1 and main.workers.supports_workers():
+        main.workers.Supervisor(main.main, args.workers).run()
+    else:
+        asyncio.run(main.main())
+
+
+# --- Process metrics (Linux /proc, or psutil if installed) ---
+def _proc_tree(pid):
+    pids = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            for child in f.read().split():
+                pids.extend(_proc_tree(int(child)))
+    except OSError:
+        pass
+    return pids
+
+def sample_process(pid):
+    """Returns (cpu_seconds, rss_bytes) summed over the server and its workers, or None."""
+    try:
+        import psutil
+        proc = psutil.Process(pid)
+        procs = [proc] + proc.children(recursive=True)
+        cpu = sum(sum(p.cpu_times()[:2]) for p in procs)
+        return cpu, sum(p.memory_info().rss for p in procs)
+    except ImportError:
+        pass
+    except Exception:
+        return None
+    cpu = rss = 0
+    tick = os.sysconf("SC_CLK_TCK")
+    try:
+        for p in _proc_tree(pid):
+            with open(f"/proc/{p}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            cpu += (int(fields[11]) + int(fields[12])) / tick
+            with open(f"/proc/{p}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        rss += int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return cpu, rss
+
+
+# --- Client side ---
+def load_pcm(path, turn_ms):
+    """16 kHz mono int16 turn audio: from a WAV/raw file, or synthetic noise bursts."""
+    n = INPUT_RATE * 2 * turn_ms // 1000
+    if path:
+        if path.endswith(".wav"):
+            with wave.open(path, "rb") as w:
+                if w.getframerate() != INPUT_RATE or w.getnchannels() != 1 or w.getsampwidth() != 2:
+                    raise SystemExit("--pcm WAV must be 16 kHz mono 16-bit")
+                data = w.readframes(w.getnframes())
+        else:
+            with open(path, "rb") as f:
+                data = f.read()
+        return (data * (n // max(1, len(data)) + 1))[:n]
+    rnd = random.Random(0)
+    return struct.pack(f"<{n // 2}h", *(int(rnd.gauss(0, 3000)) for _ in range(n // 2)))
+
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+async def run_client(index, args, pcm, results):
+    import websockets
+    import audio_protocol as ap
+
+    chunk = INPUT_RATE * 2 * CHUNK_MS // 1000
+    url = f"ws://127.0.0.1:{args.port}/?session_id=load-{args.run_id}-{index}"
+    async with websockets.connect(url, max_size=None) as ws:
+        await ws.send('{"setup": {"binary_frames": true}}')
+        seq = 0
+        for _turn in range(args.turns):
+            start = time.perf_counter()
+            for i, offset in enumerate(range(0, len(pcm), chunk)):
+                delay = start + i * CHUNK_MS / 1000 - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                seq += 1
+                await ws.send(bytes(ap.pack_frame(ap.KIND_AUDIO_PCM, pcm[offset:offset + chunk], seq=seq)))
+            turn_end = time.perf_counter()
+
+            first_audio = None
+            idle_timeout = args.timeout
+            while True:
+                try:
+                    message = await asyncio.wait_for(ws.recv(), idle_timeout)
+                except asyncio.TimeoutError:
+                    break
+                if isinstance(message, bytes) and message[0] == ap.KIND_AUDIO_PCM:
+                    results["audio_bytes"] += len(message) - ap.HEADER_SIZE
+                    if first_audio is None:
+                        first_audio = time.perf_counter()
+                        results["latency_ms"].append((first_audio - turn_end) * 1000)
+                        idle_timeout = 0.5 # turn is over once audio stops for 500 ms
+            if first_audio is None:
+                results["timeouts"] += 1
+            else:
+                results["turns"] += 1
+
+async def run_step(clients, args, pcm, server_pid):
+    results = {"latency_ms": [], "audio_bytes": 0, "turns": 0, "timeouts": 0, "errors": 0}
+    samples = []
+
+    async def sampler():
+        while True:
+            sample = sample_process(server_pid)
+            if sample:
+                samples.append(sample)
+            await asyncio.sleep(0.5)
+
+    async def guarded(i):
+        try:
+            await run_client(i, args, pcm, results)
+        except Exception as e:
+            results["errors"] += 1
+            print(f"  client {i} failed: {e!r}")
+
+    args.run_id = f"{clients}-{int(time.time())}"
+    baseline = sample_process(server_pid)
+    sampler_task = asyncio.create_task(sampler())
+    started = time.perf_counter()
+    await asyncio.gather(*(guarded(i) for i in range(clients)))
+    elapsed = time.perf_counter() - started
+    sampler_task.cancel()
+    end = sample_process(server_pid)
+
+    cpu_pct = rss_peak = rss_per_session = float("nan")
+    if baseline and end:
+        cpu_pct = 100 * (end[0] - baseline[0]) / elapsed
+        rss_peak = max(rss for _cpu, rss in samples + [end])
+        rss_per_session = (rss_peak - baseline[1]) / clients
+    lat = results["latency_ms"]
+    print(f"{clients:>7} {results['turns']:>6} {results['timeouts'] + results['errors']:>5} "
+          f"{percentile(lat, 50):>8.0f} {percentile(lat, 90):>8.0f} {percentile(lat, 99):>8.0f} "
+          f"{results['audio_bytes'] / elapsed / 1024:>9.0f} {cpu_pct:>6.1f} {cpu_pct / clients:>8.2f} "
+          f"{rss_peak / 2**20:>8.1f} {rss_per_session / 1024:>9.0f}")
+
+def wait_for_port(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        with socket.socket() as s:
+            if s.connect_ex(("127.0.0.1", port)) == 0:
+                return True
+        time.sleep(0.2)
+    return False
+
+def drive(args):
+    pcm = load_pcm(args.pcm, args.turn_ms)
+    cmd = [sys.executable, os.path.abspath(__file__), "--serve", "--port", str(args.port),
+           "--turn-ms", str(args.turn_ms), "--first-audio-ms", str(args.first_audio_ms),
+           "--reply-ms", str(args.reply_ms), "--tool-every", str(args.tool_every), "--workers", str(args.workers),
+           "--connect-ms", str(args.connect_ms), "--pool", str(args.pool)]
+    if args.live_transcripts:
+        cmd.append("--live-transcripts")
+    server = subprocess.Popen(cmd, stdout=None if args.verbose else subprocess.DEVNULL, stderr=None if args.verbose else subprocess.DEVNULL)
+    try:
+        if not wait_for_port(args.port):
+            raise SystemExit("server did not start (run with --verbose to see its output)")
+        print(f"fake Live: {args.connect_ms} ms connect, {args.turn_ms} ms turns, first audio after {args.first_audio_ms} ms, "
+              f"{args.reply_ms} ms replies; {args.turns} turns per client, {args.workers} worker(s), pool {args.pool}")
+        print(f"{'clients':>7} {'turns':>6} {'fail':>5} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} "
+              f"{'down kB/s':>9} {'cpu %':>6} {'cpu%/ses':>8} {'rss MB':>8} {'KB/ses':>9}")
+        for clients in args.clients:
+            asyncio.run(run_step(clients, args, pcm, server.pid))
+    finally:
+        server.terminate()
+        try:
+            server.wait(10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--turns", type=int, default=5, help="turns per client")
+    parser.add_argument("--pcm", help="16 kHz mono 16-bit WAV or raw PCM to replay (default: synthetic)")
+    parser.add_argument("--turn-ms", type=int, default=1000, help="user audio per turn")
+    parser.add_argument("--first-audio-ms", type=int, default=300, help="fake model latency")
+    parser.add_argument("--reply-ms", type=int, default=2000, help="fake model reply length")
+    parser.add_argument("--connect-ms", type=int, default=0, help="fake connect handshake time")
+    parser.add_argument("--pool", type=int, default=0, help="LIVE_POOL_MAX for the server (0: no pre-warmed sessions)")
+    parser.add_argument("--tool-every", type=int, default=0, help="fake tool call every N turns (0: never)")
+    parser.add_argument("--timeout", type=float, default=15.0, help="wait for first audio (s)")
+    parser.add_argument("--live-transcripts", action="store_true", help="server relays Live transcription fragments (LIVE_TRANSCRIPTS)")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=9183)
+    parser.add_argument("--verbose", action="store_true", help="show server output")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        serve(args)
+    else:
+        drive(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Replays a session capture (see CAPTURE_DIR in config.py.sample) through gemini_session_handler.
+
+The handler runs in this process with main.client replaced by a stub Live backend
+that plays the captured Live responses back (audio, tool calls, transcripts), while
+a websocket client sends the captured client frames. Both follow the captured
+timestamps divided by --speed, so two server versions can be compared on identical
+traffic. Tool calls in the capture are executed for real against chain files in a
+temporary directory.
+
+Reports, per model turn, the delay between the stub yielding the first audio part
+and the client receiving the first audio frame (handler + outbound overhead), plus
+totals.
+
+Usage:
+    python benchmarks/replay_capture.py captures/session.cap [--speed 4] [--trace-file trace.jsonl]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import session_capture as sc
+
+
+def load(path):
+    meta, client, live = {}, [], []
+    for kind, t, data in sc.read_capture(path):
+        if kind == sc.META:
+            meta = data
+        elif kind in (sc.CLIENT_TEXT, sc.CLIENT_BINARY):
+            client.append((t, data))
+        elif kind == sc.LIVE:
+            live.append((t, data))
+        elif kind == sc.CLIENT_CLOSED:
+            client.append((t, None))
+    return meta, client, live
+
+def has_audio(message):
+    content = message.server_content
+    if not content or not content.model_turn:
+        return False
+    return any(part.inline_data is not None for part in content.model_turn.parts or [])
+
+
+class ReplayLiveSession:
+    """Yields the captured Live messages at their captured times (one turn per receive())."""
+
+    def __init__(self, messages, speed, backend):
+        self._messages = iter(messages)
+        self._speed = speed
+        self._backend = backend
+        self._start = asyncio.get_running_loop().time()
+
+    async def send_realtime_input(self, **_kwargs):
+        self._backend.metrics["realtime_inputs"] += 1
+
+    async def send(self, input=None, end_of_turn=False):
+        self._backend.metrics["realtime_inputs"] += 1
+
+    async def send_tool_response(self, *, function_responses=None):
+        self._backend.metrics["tool_responses"] += 1
+
+    async def receive(self):
+        loop = asyncio.get_running_loop()
+        first_audio = True
+        for t, message in self._messages:
+            delay = self._start + t / self._speed - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if has_audio(message):
+                self._backend.metrics["audio_parts"] += 1
+                if first_audio:
+                    self._backend.turn_first_audio.append(time.perf_counter())
+                    first_audio = False
+            yield message
+            if message.server_content and message.server_content.turn_complete:
+                return
+        await asyncio.Event().wait() # capture exhausted: idle until the client leaves
+
+
+class ReplayClient:
+    def __init__(self, messages, speed):
+        self.messages = messages
+        self.speed = speed
+        self.turn_first_audio = [] # perf_counter when each turn's first audio part was handed to the handler
+        self.metrics = {"realtime_inputs": 0, "tool_responses": 0, "audio_parts": 0}
+        self.aio = SimpleNamespace(live=SimpleNamespace(connect=self.connect))
+
+    @asynccontextmanager
+    async def connect(self, model=None, config=None):
+        yield ReplayLiveSession(self.messages, self.speed, self)
+
+
+def first_audio_delays(turn_first_audio, received):
+    """Matches the first audio part of each turn with the next audio frame the client got."""
+    delays = []
+    for start in turn_first_audio:
+        after = [r for r in received if r >= start]
+        if after:
+            delays.append((after[0] - start) * 1000)
+    return delays
+
+def is_audio_frame(message):
+    import audio_protocol as ap
+    if isinstance(message, bytes):
+        return len(message) > 0 and message[0] == ap.KIND_AUDIO_PCM
+    return message.startswith('{"audio"')
+
+
+async def replay(args, client_frames, main):
+    import websockets
+
+    server = await websockets.serve(main.gemini_session_handler, "127.0.0.1", args.port, max_size=None)
+    received, audio_received = [], []
+    url = f"ws://127.0.0.1:{args.port}/?session_id=replay-{uuid.uuid4().hex[:12]}"
+    started = time.perf_counter()
+    async with websockets.connect(url, max_size=None) as ws:
+
+        async def reader():
+            async for message in ws:
+                now = time.perf_counter()
+                received.append(len(message))
+                if is_audio_frame(message):
+                    audio_received.append(now)
+
+        reader_task = asyncio.create_task(reader())
+        loop = asyncio.get_running_loop()
+        t0 = loop.time()
+        for t, data in client_frames:
+            delay = t0 + t / args.speed - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if data is None:
+                break
+            await ws.send(data)
+        await asyncio.sleep(args.linger)
+        reader_task.cancel()
+    elapsed = time.perf_counter() - started
+    server.close()
+    await server.wait_closed()
+    return elapsed, received, audio_received
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("capture")
+    parser.add_argument("--speed", type=float, default=1.0, help="time scale (2: twice as fast)")
+    parser.add_argument("--linger", type=float, default=1.0, help="wait for output after the last client frame (s)")
+    parser.add_argument("--trace-file", help="enable tracing and append per-turn spans here")
+    parser.add_argument("--port", type=int, default=9184)
+    args = parser.parse_args()
+    if args.speed <= 0:
+        raise SystemExit("--speed must be > 0")
+
+    capture = os.path.abspath(args.capture)
+    meta, client_frames, live_messages = load(capture)
+    print(f"capture: {meta.get('session')} ({len(client_frames)} client frames, {len(live_messages)} Live messages, "
+          f"{client_frames[-1][0] if client_frames else 0:.1f} s), speed x{args.speed}")
+
+    from load_live import load_config
+    trace_file = os.path.abspath(args.trace_file) if args.trace_file else None
+    os.chdir(tempfile.mkdtemp(prefix="replay_")) # chain files written by replayed tool calls
+    cfg = load_config()
+    cfg.CAPTURE_DIR = None
+    cfg.LIVE_POOL_MAX = 0
+    if trace_file:
+        cfg.TRACE_ENABLED, cfg.TRACE_FILE = True, trace_file
+    import main as server_main
+
+    backend = ReplayClient(live_messages, args.speed)
+    server_main.client = backend
+    elapsed, received, audio_received = asyncio.run(replay(args, client_frames, server_main))
+
+    delays = first_audio_delays(backend.turn_first_audio, audio_received)
+    print(f"elapsed {elapsed:.2f} s, {len(received)} messages / {sum(received) / 1024:.0f} kB to the client, "
+          f"{backend.metrics}")
+    if delays:
+        print(f"first audio (stub -> client) over {len(delays)} turns: p50 {statistics.median(delays):.1f} ms, "
+              f"max {max(delays):.1f} ms")
+    if trace_file:
+        print(f"per-turn spans appended to {trace_file}")
+
+
+if __name__ == "__main__":
+    main()
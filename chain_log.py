@@ -0,0 +1,434 @@
+import atexit
+import json
+import os
+import threading
+
+import app_logging
+import merkle
+
+try:
+    import fcntl # POSIX only; without it concurrent first loads are not serialized
+except ImportError:
+    fcntl = None
+
+log = app_logging.get_logger("chain_log")
+
+# --- Durability of appended blocks ---
+SYNC_NONE = "none"     # write() 후 OS 에 맡김 (프로세스 종료에는 안전, 전원 장애 시 마지막 블럭 유실 가능)
+SYNC_GROUP = "group"   # group_commit_ms 안의 기록을 한 번의 fsync 로 묶음
+SYNC_ALWAYS = "always" # 블럭 기록마다 fsync
+SYNC_MODES = (SYNC_NONE, SYNC_GROUP, SYNC_ALWAYS)
+
+_settings = {"sync": SYNC_NONE, "group_commit_ms": 200}
+_pending_sync = set() # group commit 대기 중인 ChainLog
+_pending_lock = threading.Lock()
+
+
+def configure(sync=SYNC_NONE, group_commit_ms=200):
+    """
+    Sets the durability mode of every chain log in this process.
+
+    Args:
+        sync (str): SYNC_NONE, SYNC_GROUP or SYNC_ALWAYS.
+        group_commit_ms (int): Max delay of the shared fsync in SYNC_GROUP mode.
+    """
+    if sync not in SYNC_MODES:
+        raise ValueError(f"Unknown chain sync mode: {sync}")
+    _settings.update(sync=sync, group_commit_ms=group_commit_ms)
+
+def legacy_path(path):
+    """`records.jsonl` -> `records.json` (whole-chain JSON array written by older versions)."""
+    return path[:-1] if path.endswith(".jsonl") else None
+
+def _encode(block_dict):
+    return (json.dumps(block_dict, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+class ChainNotLoaded(Exception):
+    """Raised by save() instead of overwriting a file whose blocks this log never read."""
+
+
+def _fsync_dir(path):
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class ChainLog:
+    """
+    Append-only block file: one JSON object per line, oldest block first.
+
+    save() only writes the blocks appended since the last load/save, so recording a
+    block costs O(1) I/O whatever the chain length. A line cut short by a crash
+    (no trailing newline, or not valid JSON) is cut off the file on load(). When the
+    file does not exist yet, the legacy JSON array file (`legacy_path`) is migrated
+    into it once and renamed to `<legacy>.migrated`; the migration holds an
+    exclusive flock on `<file>.migrate.lock`, so workers loading the chain for the
+    first time at once migrate it only once.
+
+    `<file>.checkpoint` records how many blocks were last verified and the hash of
+    the last of them, so verification can resume where it stopped. `<file>.root`
+    keeps the Merkle root (merkle.py) of the same blocks, saved with the checkpoint,
+    so a stored block hash changed below the checkpoint is still detected.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Log file (`.jsonl`).
+        """
+        self.path = path
+        self.checkpoint_path = path + ".checkpoint"
+        self.root_path = path + ".root"
+        self.persisted = 0      # blocks known to be in the file
+        self.head_hash = None   # hash of the last of them
+        self.size = 0           # bytes of the file holding those blocks
+        self._inode = None
+        self._checkpoint = None
+        self._sync_timer = None
+
+    # --- Reading ---
+    def load(self):
+        """Returns the block dicts in the file (after migration / torn-tail repair)."""
+        if not os.path.exists(self.path):
+            legacy = legacy_path(self.path)
+            if legacy and os.path.exists(legacy):
+                self._migrate(legacy)
+            if not os.path.exists(self.path):
+                self.persisted, self.head_hash = 0, None
+                return []
+
+        blocks, good_end = [], 0
+        with open(self.path, "rb") as f:
+            data = f.read()
+        offset = 0
+        while offset < len(data):
+            end = data.find(b"\n", offset)
+            if end < 0:
+                break # 마지막 줄이 개행 없이 끊김
+            line = data[offset:end]
+            try:
+                if line.strip():
+                    blocks.append(json.loads(line))
+            except json.JSONDecodeError:
+                if data.find(b"\n", end + 1) < 0 and not data[end + 1:].strip():
+                    break # 마지막 줄이 손상됨 (기록 중 장애)
+                log.error("skipping corrupt block line", file=self.path, offset=offset)
+            offset = end + 1
+            good_end = offset
+        if good_end < len(data):
+            log.warning("truncating torn tail of chain log", file=self.path, bytes=len(data) - good_end)
+            with open(self.path, "r+b") as f:
+                f.truncate(good_end)
+                f.flush()
+                os.fsync(f.fileno())
+
+        self.persisted = len(blocks)
+        self.head_hash = blocks[-1].get("hash") if blocks else None
+        self.size = good_end
+        self._inode = os.stat(self.path).st_ino
+        return blocks
+
+    def read_appended(self):
+        """
+        Returns the block dicts appended (by another process) since load()/save(),
+        or None when the file was replaced or shrunk and must be loaded again.
+        """
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        if st.st_ino != self._inode or st.st_size < self.size:
+            return None
+        with open(self.path, "rb") as f:
+            f.seek(self.size)
+            data = f.read()
+        end = data.rfind(b"\n") + 1 # 끊긴 마지막 줄은 다음 load() 에서 처리
+        try:
+            blocks = [json.loads(line) for line in data[:end].splitlines() if line.strip()]
+        except json.JSONDecodeError:
+            return None
+        if blocks and blocks[0].get("previous_hash") != self.head_hash:
+            return None
+        self.size += end
+        self.persisted += len(blocks)
+        if blocks:
+            self.head_hash = blocks[-1].get("hash")
+        return blocks
+
+    def _migrate(self, legacy):
+        with open(self.path + ".migrate.lock", "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX) # 잠금 해제는 파일을 닫을 때
+            if os.path.exists(self.path) or not os.path.exists(legacy):
+                return # 다른 프로세스가 먼저 변환함
+            with open(legacy, "r", encoding="utf-8") as f:
+                chain_data = json.load(f)
+            self._rewrite(chain_data or [])
+            os.replace(legacy, legacy + ".migrated")
+        log.info("migrated chain file to append-only log", source=legacy, file=self.path, blocks=len(chain_data or []))
+
+    # --- Writing ---
+    def save(self, blocks):
+        """
+        Persists `blocks` (Block objects with `.hash` / `.to_dict()`).
+
+        Appends the new tail when the file holds a prefix of `blocks`, otherwise
+        (chain replaced or shortened) rewrites the file atomically.
+
+        Raises:
+            ChainNotLoaded: The file holds blocks that were not loaded (or was replaced
+                            since), so rewriting it would lose them.
+        """
+        n = self.persisted
+        try:
+            st = os.stat(self.path)
+            size = st.st_size
+        except FileNotFoundError:
+            size = None
+        if size and st.st_ino != self._inode:
+            raise ChainNotLoaded(f"{self.path} was not loaded by this process (or was replaced since); not overwriting it")
+        if size is not None and n <= len(blocks) and (blocks[n - 1].hash == self.head_hash if n else size == 0):
+            new_blocks = blocks[n:]
+            if new_blocks:
+                self._append([block.to_dict() for block in new_blocks])
+        else:
+            self._rewrite([block.to_dict() for block in blocks])
+        self.persisted = len(blocks)
+        self.head_hash = blocks[-1].hash if blocks else None
+
+    def _append(self, block_dicts):
+        payload = b"".join(_encode(block_dict) for block_dict in block_dicts)
+        with open(self.path, "ab") as f:
+            f.write(payload) # 한 번의 write: 중간에 끊기면 다음 load() 에서 잘라냄
+            f.flush()
+            if _settings["sync"] == SYNC_ALWAYS:
+                os.fsync(f.fileno())
+            self.size = f.tell()
+            self._inode = os.fstat(f.fileno()).st_ino
+        if _settings["sync"] == SYNC_GROUP:
+            self._schedule_sync()
+
+    def _rewrite(self, block_dicts):
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(b"".join(_encode(block_dict) for block_dict in block_dicts))
+            f.flush()
+            if _settings["sync"] != SYNC_NONE:
+                os.fsync(f.fileno())
+            self.size = f.tell()
+            self._inode = os.fstat(f.fileno()).st_ino
+        os.replace(tmp, self.path)
+        if _settings["sync"] != SYNC_NONE:
+            _fsync_dir(self.path)
+
+    # --- Verification checkpoint ---
+    def checkpoint(self):
+        """Returns (verified block count, hash of the last verified block); (0, None) if none."""
+        if self._checkpoint is None:
+            try:
+                with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self._checkpoint = (int(data["height"]), data["head_hash"])
+            except FileNotFoundError:
+                self._checkpoint = (0, None)
+            except (ValueError, KeyError, TypeError) as e:
+                log.warning("ignoring unreadable verification checkpoint", file=self.checkpoint_path, error=str(e))
+                self._checkpoint = (0, None)
+        return self._checkpoint
+
+    def saved_root(self):
+        """Returns (block count, hex Merkle root) from save_root(), or None."""
+        try:
+            with open(self.root_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return int(data["size"]), data["root"]
+        except FileNotFoundError:
+            return None
+        except (ValueError, KeyError, TypeError) as e:
+            log.warning("ignoring unreadable Merkle root file", file=self.root_path, error=str(e))
+            return None
+
+    def save_root(self, size, root):
+        """Persists the Merkle root of the first `size` blocks."""
+        tmp = f"{self.root_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"size": size, "root": root}, f)
+            os.replace(tmp, self.root_path)
+        except OSError as e:
+            log.warning("could not save Merkle root", file=self.root_path, error=str(e))
+
+    def save_checkpoint(self, height, head_hash):
+        """Records that the first `height` blocks (ending with `head_hash`) passed verification."""
+        self._checkpoint = (height, head_hash)
+        tmp = f"{self.checkpoint_path}.{os.getpid()}.tmp" # 읽기 잠금만 잡은 여러 워커가 동시에 기록할 수 있음
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"height": height, "head_hash": head_hash}, f)
+            os.replace(tmp, self.checkpoint_path)
+        except OSError as e:
+            log.warning("could not save verification checkpoint", file=self.checkpoint_path, error=str(e))
+
+    # --- Group commit ---
+    def _schedule_sync(self):
+        with _pending_lock:
+            if self._sync_timer is not None:
+                return # 이미 예약된 fsync 에 포함
+            self._sync_timer = threading.Timer(_settings["group_commit_ms"] / 1000, self.sync)
+            self._sync_timer.daemon = True
+            _pending_sync.add(self)
+        self._sync_timer.start()
+
+    def sync(self):
+        """Flushes the appended blocks to disk now (also run by the group commit timer)."""
+        with _pending_lock:
+            timer, self._sync_timer = self._sync_timer, None
+            _pending_sync.discard(self)
+        if timer is not None:
+            timer.cancel()
+        try:
+            fd = os.open(self.path, os.O_RDONLY)
+        except FileNotFoundError:
+            return
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class ChainStoreMixin:
+    """
+    Verification, incremental reload and Merkle proofs shared by the chain classes
+    (mediblock.MedicalBlockchain, memoryblock.AgentMemoryBlockchain).
+
+    The class provides `chain` (block list), `store` (the ChainLog it was loaded
+    from, or None), `_merkle` (None until first use), `is_chain_valid(start)` and
+    `block_cls` (with `from_dict`).
+    """
+
+    def verify(self, full=False):
+        """
+        Validates the chain from its verification checkpoint on (see is_chain_valid).
+
+        Blocks up to the checkpoint saved by the last successful verification are
+        trusted while the checkpoint's head hash still matches the chain; only newer
+        blocks are checked, then the checkpoint moves to the chain head. The Merkle
+        root saved with the checkpoint is compared first (check_merkle_root), so a
+        changed or removed block hash below the checkpoint fails verification
+        without re-validating those blocks. Block contents below the checkpoint are
+        only re-checked by a full verification, which also replaces the saved root.
+
+        The first call after loading builds the Merkle tree over every block hash
+        (two SHA-256 per block, about a quarter of the JSON parse time of load()),
+        so startup stays O(n); later calls only hash the blocks appended since.
+        Saving just the tree's right edge would make the first check O(log n), but
+        it could no longer notice a changed hash below the checkpoint.
+
+        Args:
+            full (bool): Ignore the checkpoint and saved root and re-verify every block.
+
+        Returns:
+            bool: True if the checked blocks are intact.
+        """
+        height = 0
+        root_ok = None
+        if self.store is not None and not full:
+            height, head_hash = self.store.checkpoint()
+            if height and (height > len(self.chain) or self.chain[height - 1].hash != head_hash):
+                log.warning("verification checkpoint does not match the chain, verifying all blocks", height=height, blocks=len(self.chain))
+                height = 0
+            root_ok = self.check_merkle_root()
+            if root_ok is False:
+                return False
+        if not self.is_chain_valid(start=height):
+            return False
+        if self.store is not None and self.chain and (full or height != len(self.chain) or root_ok is None):
+            self.store.save_checkpoint(len(self.chain), self.chain[-1].hash)
+            self.save_merkle_root()
+        log.debug("chain verified from checkpoint", start=height, blocks=len(self.chain))
+        return True
+
+    def load_appended(self):
+        """
+        Adds the blocks other processes appended to the log file since it was loaded.
+
+        Returns:
+            bool: False when the file was rewritten (or not loaded yet) and the chain must be reloaded.
+        """
+        if self.store is None or self.store.head_hash != (self.chain[-1].hash if self.chain else None):
+            return False
+        block_dicts = self.store.read_appended()
+        if block_dicts is None:
+            return False
+        try:
+            blocks = [self.block_cls.from_dict(block_data) for block_data in block_dicts]
+        except KeyError:
+            return False
+        self.chain.extend(blocks)
+        self._blocks_appended()
+        return True
+
+    def _blocks_appended(self):
+        """Hook run after load_appended() extended the chain (e.g. to update an index)."""
+
+    # --- Merkle index (single-block proofs) ---
+    def merkle_tree(self):
+        """Merkle tree over the block hashes, updated with the blocks added since the last call."""
+        if self._merkle is None:
+            self._merkle = merkle.MerkleTree()
+        return self._merkle.sync(self.chain)
+
+    def inclusion_proof(self, index):
+        """
+        Proof that block `index` is part of the current chain.
+
+        The leaf is the block's stored `hash`, not recomputed from its contents: the
+        proof shows that hash is in the tree, and verify() / is_chain_valid() show
+        the hash matches the block.
+
+        Returns:
+            dict: {"index", "size", "block_hash", "path", "root"} (merkle.verify_inclusion).
+        """
+        return self.merkle_tree().inclusion_proof(index)
+
+    def save_merkle_root(self):
+        """Persists the current root next to the chain file; returns (size, root)."""
+        tree = self.merkle_tree()
+        if not len(tree):
+            return None
+        size, root = len(tree), tree.root()
+        if self.store is not None:
+            self.store.save_root(size, root)
+        return size, root
+
+    def check_merkle_root(self):
+        """
+        Compares the saved root with the same prefix of the current chain (hashes
+        every block on the first call, see verify()).
+
+        Returns:
+            bool: False if blocks covered by the saved root were changed or removed,
+                  None if no root was saved.
+        """
+        saved = self.store.saved_root() if self.store is not None else None
+        if saved is None:
+            return None
+        size, root = saved
+        tree = self.merkle_tree()
+        if size > len(tree) or tree.root(size) != root:
+            log.error("Merkle root mismatch: saved blocks were changed", size=size, blocks=len(tree))
+            return False
+        return True
+
+
+@atexit.register
+def sync_all():
+    """Runs the pending group commits (at exit, before the timers could fire)."""
+    with _pending_lock:
+        pending = list(_pending_sync)
+    for chain_log in pending:
+        chain_log.sync()
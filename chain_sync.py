@@ -0,0 +1,102 @@
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl # POSIX only; without it there is no cross-process locking
+except ImportError:
+    fcntl = None
+
+
+class SharedChain:
+    """
+    Cross-process access to a chain saved in an append-only log file (chain_log).
+
+    Several server workers load the same chain file. Every access takes an flock on
+    `<file>.lock` (shared for reads, exclusive for writes) and reloads the in-memory
+    chain first if another process changed the file. Writes are saved immediately,
+    inside the lock, so one worker never overwrites blocks appended by another;
+    blocks appended by another worker are read incrementally (load_appended).
+    The wrapped chain object keeps its identity; only its block list (and log
+    position) is replaced.
+    The file is not read until the first access (or `load()`), so importing the
+    module that creates a SharedChain stays cheap.
+
+    flock does not exclude threads of the same process (asyncio.to_thread callers),
+    so a per-instance thread lock is held around it as well.
+    """
+
+    def __init__(self, chain_cls, filename):
+        """
+        Args:
+            chain_cls: Chain class with `load_chain(filename)` / `save_chain(filename)`
+                       and a `.chain` block list (MedicalBlockchain, AgentMemoryBlockchain).
+            filename (str): Chain file path.
+        """
+        self._chain_cls = chain_cls
+        self.filename = filename
+        self.lock_path = filename + ".lock"
+        self.chain = chain_cls() # empty until loaded
+        self._loaded = False
+        self._stamp = None
+        self._thread_lock = threading.RLock()
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.filename)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    @contextmanager
+    def _locked(self, exclusive):
+        with self._thread_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.lock_path, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _refresh(self):
+        # 호출자가 _locked() 안에서 호출 (스레드 잠금 + 파일 잠금)
+        stamp = self._file_stamp()
+        if not self._loaded or (stamp is not None and stamp != self._stamp):
+            # 다른 워커가 블럭을 추가만 했으면 추가된 줄만 읽음, 파일이 다시 쓰였으면 전체 로드
+            if not (self._loaded and self.chain.load_appended()):
+                loaded = self._chain_cls.load_chain(self.filename)
+                self.chain.chain = loaded.chain
+                self.chain.store = loaded.store # 다음 저장은 파일 끝에 새 블럭만 추가
+            self._loaded = True
+            self._stamp = stamp
+
+    def version(self):
+        """Changes whenever the chain file is rewritten (by any process)."""
+        return self._file_stamp()
+
+    def load(self):
+        """Loads the chain file now instead of on first access."""
+        with self._locked(exclusive=False):
+            self._refresh()
+
+    def read(self, query):
+        """Runs `query(chain)` on the latest saved chain and returns its result."""
+        with self._locked(exclusive=False):
+            self._refresh()
+            return query(self.chain)
+
+    def update(self, mutate):
+        """Runs `mutate(chain)` on the latest chain and saves it before releasing the lock."""
+        with self._locked(exclusive=True):
+            self._refresh()
+            result = mutate(self.chain)
+            try:
+                self.chain.save_chain(self.filename)
+            except Exception:
+                self._loaded = False # 저장하지 못한 블럭은 버리고 다음 접근 시 파일에서 다시 로드
+                raise
+            self._stamp = self._file_stamp()
+            return result
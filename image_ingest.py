@@ -0,0 +1,143 @@
+import hashlib
+import io
+import logging
+import time
+
+import app_logging
+
+log = app_logging.get_logger("image_ingest")
+
+Image = None # PIL.Image (optional: pip install pillow), imported on the first frame
+_pil_checked = False
+
+def load_pil():
+    """Imports PIL on first use so servers that never receive frames skip the import."""
+    global Image, _pil_checked
+    if not _pil_checked:
+        try:
+            from PIL import Image as pil_image
+        except ImportError:
+            pil_image = None
+        Image, _pil_checked = pil_image, True
+    return Image
+
+# --- Image ingestion defaults (screen-share / camera frames) ---
+MAX_SIDE = 1024       # longest edge sent to the Live API (px)
+JPEG_QUALITY = 70     # re-encode quality when a frame is downscaled
+MAX_FPS = 1.0         # per-session frame-rate ceiling
+DEDUP_DISTANCE = 4    # dHash Hamming distance at or below which a frame counts as unchanged
+
+HASH_SIZE = 8         # 8x8 difference hash -> 64 bits
+
+
+def dhash(image, hash_size=HASH_SIZE):
+    """64-bit difference hash of a PIL image (grayscale, (hash_size+1) x hash_size)."""
+    small = image.convert("L").resize((hash_size + 1, hash_size), Image.BILINEAR)
+    pixels = small.tobytes()
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class FrameFilter:
+    """
+    Per-session image/jpeg stage in front of the Live API.
+
+    Drops frames above the frame-rate ceiling or visually identical to the last
+    frame sent (perceptual dHash), and downscales/re-encodes frames larger than
+    `max_side`. Without Pillow only the rate limit and exact-duplicate check apply
+    and frames pass through unchanged.
+    """
+
+    def __init__(self, max_side=MAX_SIDE, quality=JPEG_QUALITY, max_fps=MAX_FPS, dedup_distance=DEDUP_DISTANCE):
+        """
+        Args:
+            max_side (int): Longest edge after downscaling (px); 0 disables resizing.
+            quality (int): JPEG quality for re-encoded frames.
+            max_fps (float): Frame-rate ceiling; 0 disables it.
+            dedup_distance (int): Max dHash distance treated as a duplicate; -1 disables dedup.
+        """
+        self.max_side = max_side
+        self.quality = quality
+        self.min_interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self.dedup_distance = dedup_distance
+        self._last_sent_at = None
+        self._last_hash = None
+        self.metrics = {
+            "frames_in": 0,
+            "frames_sent": 0,
+            "dropped_rate": 0,
+            "dropped_duplicate": 0,
+            "resized": 0,
+            "decode_errors": 0,
+            "bytes_in": 0,
+            "bytes_out": 0,
+        }
+
+    def process(self, jpeg, now=None):
+        """
+        Filters one JPEG frame (bytes-like).
+
+        Returns:
+            bytes | None: The frame to forward (possibly re-encoded), or None to drop it.
+        """
+        now = time.monotonic() if now is None else now
+        self.metrics["frames_in"] += 1
+        self.metrics["bytes_in"] += len(jpeg)
+
+        if self._last_sent_at is not None and now - self._last_sent_at < self.min_interval:
+            self.metrics["dropped_rate"] += 1
+            return None
+
+        if load_pil() is None:
+            frame_hash = hashlib.blake2b(jpeg, digest_size=8).digest()
+            duplicate = self.dedup_distance >= 0 and frame_hash == self._last_hash
+        else:
+            try:
+                image = Image.open(io.BytesIO(jpeg))
+                size = image.size
+                # draft(): libjpeg decodes at 1/8 scale, enough for a 9x8 hash
+                image.draft("L", (64, 64))
+                frame_hash = dhash(image)
+            except Exception as e:
+                self.metrics["decode_errors"] += 1
+                log.limited("decode_error", 5.0, logging.WARNING, "undecodable frame", bytes=len(jpeg), error=repr(e))
+                return None
+            duplicate = self._last_hash is not None and hamming(frame_hash, self._last_hash) <= self.dedup_distance
+
+        if duplicate:
+            self.metrics["dropped_duplicate"] += 1
+            return None
+
+        out = bytes(jpeg)
+        if Image is not None and self.max_side and max(size) > self.max_side:
+            out = self._downscale(jpeg)
+
+        self._last_sent_at = now
+        self._last_hash = frame_hash
+        self.metrics["frames_sent"] += 1
+        self.metrics["bytes_out"] += len(out)
+        return out
+
+    def _downscale(self, jpeg):
+        image = Image.open(io.BytesIO(jpeg))
+        image.draft("RGB", (self.max_side, self.max_side))
+        image = image.convert("RGB")
+        image.thumbnail((self.max_side, self.max_side), Image.LANCZOS)
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=self.quality, optimize=True)
+        self.metrics["resized"] += 1
+        return buffer.getvalue()
+
+    def stats(self):
+        return {
+            **self.metrics,
+            "frames_saved": self.metrics["frames_in"] - self.metrics["frames_sent"],
+            "bytes_saved": self.metrics["bytes_in"] - self.metrics["bytes_out"],
+        }
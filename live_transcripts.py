@@ -0,0 +1,104 @@
+import asyncio
+
+import app_logging
+
+log = app_logging.get_logger("transcripts")
+
+USER = "user"   # input_transcription (마이크 음성)
+MODEL = "model" # output_transcription (모델 음성)
+
+
+class TranscriptStream:
+    """
+    Per-connection relay of the Live API's own input/output transcriptions.
+
+    Fragments arrive a few words at a time; they are buffered per role and sent as
+    `{"transcript": {"role": "user"|"model", "text": ..., "final": bool}}` once the
+    oldest buffered fragment is `coalesce_ms` old, the buffer reaches `max_chars`,
+    the fragment is marked finished, or the turn ends. `final` closes the caption
+    line of that role on the client.
+    """
+
+    def __init__(self, emit, coalesce_ms=250, max_chars=120):
+        """
+        Args:
+            emit (coroutine function): Called as `await emit(message)` (e.g. outbox.send_json).
+            coalesce_ms (int): Max time a fragment waits for more text (0: send every fragment).
+            max_chars (int): Buffered characters that trigger an immediate send.
+        """
+        self._emit = emit
+        self.coalesce = coalesce_ms / 1000
+        self.max_chars = max_chars
+        self._buffers = {USER: [], MODEL: []}
+        self._sizes = {USER: 0, MODEL: 0}
+        self._since = {USER: None, MODEL: None} # 가장 오래된 미전송 조각의 도착 시각
+        self._open = {USER: False, MODEL: False} # final 없이 전송된 줄이 있음
+        self._lock = asyncio.Lock() # 타이머/수신 루프의 전송 순서 보장
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self.metrics = {"fragments": 0, "messages": 0}
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def add(self, role, text, finished=False):
+        """Buffers one transcription fragment (server_content.input/output_transcription)."""
+        if text:
+            if self._since[role] is None:
+                self._since[role] = asyncio.get_running_loop().time()
+            self._buffers[role].append(text)
+            self._sizes[role] += len(text)
+            self.metrics["fragments"] += 1
+        if finished or self.coalesce <= 0 or self._sizes[role] >= self.max_chars:
+            await self._flush(role, final=bool(finished))
+        elif text:
+            self._wakeup.set()
+
+    async def end_turn(self):
+        """Sends what is left of both roles as final (turn_complete / interrupted)."""
+        await self._flush(USER, final=True)
+        await self._flush(MODEL, final=True)
+
+    async def _flush(self, role, final):
+        async with self._lock:
+            if not self._buffers[role] and not (final and self._open[role]):
+                return
+            text = "".join(self._buffers[role])
+            self._buffers[role].clear()
+            self._sizes[role] = 0
+            self._since[role] = None
+            self._open[role] = not final
+            self.metrics["messages"] += 1
+            await self._emit({"transcript": {"role": role, "text": text, "final": final}})
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                pending = [since for since in self._since.values() if since is not None]
+                if not pending:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+                delay = min(pending) + self.coalesce - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                now = loop.time()
+                for role, since in self._since.items():
+                    if since is not None and now - since >= self.coalesce:
+                        await self._flush(role, final=False)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # 클라이언트 송신 실패 (연결 종료 등): 수신 루프 쪽에서 처리됨
+            log.debug("transcript flush stopped", error=repr(e))
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self):
+        return dict(self.metrics)
@@ -4,23 +4,51 @@
 
 ## pip install git+https://github.com/googleapis/python-genai.git
 
+import startup # 기동 시간 측정 (가장 먼저 import)
+
 import asyncio
+import functools
 import json
 import os
-import websockets
-
-from google import genai
+import time
 import base64
-import io
-from pydub import AudioSegment
-import google.generativeai as generative
-import wave
-import numpy as np
-from google.genai import types
+
+with startup.timed("websockets"):
+    import websockets
+with startup.timed("google.genai"):
+    from google import genai
+    from google.genai import types
 
 import config as cfg #define config.py
 
-import my_function_callings as mfc
+import logging
+import app_logging
+
+# 로그: 큐 + 백그라운드 스레드로 출력 (이벤트 루프가 stdout 쓰기에 막히지 않음)
+LOG_LEVEL = getattr(cfg, "LOG_LEVEL", "INFO")
+LOG_LEVELS = getattr(cfg, "LOG_LEVELS", {}) # 모듈별 레벨, 예: {"memoryblock": "WARNING"}
+LOG_FORMAT = getattr(cfg, "LOG_FORMAT", "text") # text | json
+app_logging.setup(level=LOG_LEVEL, levels=LOG_LEVELS, fmt=LOG_FORMAT)
+log = app_logging.get_logger("main")
+
+with startup.timed("my_function_callings"):
+    import my_function_callings as mfc # blockchain 파일은 첫 사용 시 로드
+with startup.timed("audio/session modules (numpy)"):
+    import audio_protocol as ap
+    from audio_buffer import AudioBuffer
+    import resample
+    import outbound
+    import barge_in
+    import image_ingest
+    import session_registry
+    import workers
+    import session_pool
+    import tool_dispatch
+    import tool_cache
+    import tracing
+    import session_capture
+    import live_transcripts
+    import chain_log
 
 # import mediblock as mb
 # import timer
@@ -31,12 +59,88 @@ import my_function_callings as mfc
 
 # Load API key from environment
 os.environ['GOOGLE_API_KEY'] = cfg.GOOGLE_API_KEY
-generative.configure(api_key=os.environ['GOOGLE_API_KEY'])
 #MODEL = cfg.MODEL 
 #TRANSCRIPTION_MODEL = cfg.TRANSCRIPTION_MODEL
 
-#SND_TRANSCRIP = cfg.SND_TRANSCRIP
-#RCV_TRANSCRIP = cfg.RCV_TRANSCRIP
+# Live API 자체 전사(입력/출력)를 조각 단위로 클라이언트에 전달 (턴 종료 후 별도 모델 전사 대신)
+# 켜면 SND_TRANSCRIP/RCV_TRANSCRIP 는 무시됨
+LIVE_TRANSCRIPTS = getattr(cfg, "LIVE_TRANSCRIPTS", False)
+TRANSCRIPT_COALESCE_MS = getattr(cfg, "TRANSCRIPT_COALESCE_MS", 250)
+TRANSCRIPT_MAX_CHARS = getattr(cfg, "TRANSCRIPT_MAX_CHARS", 120)
+SND_TRANSCRIP = cfg.SND_TRANSCRIP and not LIVE_TRANSCRIPTS
+RCV_TRANSCRIP = cfg.RCV_TRANSCRIP and not LIVE_TRANSCRIPTS
+
+# 발화 시작/종료 판정 지연 (ms)
+VAD_ONSET_MS = getattr(cfg, "VAD_ONSET_MS", 60)
+VAD_HANGOVER_MS = getattr(cfg, "VAD_HANGOVER_MS", 400)
+
+# 턴 단위 오디오 버퍼 상한 (bytes): 송신 16kHz, 수신 24kHz 16bit mono
+SND_BUFFER_MAX_BYTES = getattr(cfg, "SND_BUFFER_MAX_BYTES", 16000 * 2 * 60)
+RCV_BUFFER_MAX_BYTES = getattr(cfg, "RCV_BUFFER_MAX_BYTES", 24000 * 2 * 120)
+
+# 전사(transcription) 작업 풀: 인코딩 프로세스 수, 연결당 대기 턴 수
+TRANSCRIBE_WORKERS = getattr(cfg, "TRANSCRIBE_WORKERS", 2)
+TRANSCRIBE_MAX_PENDING = getattr(cfg, "TRANSCRIBE_MAX_PENDING", 4)
+TRANSCRIBE_ENCODER = getattr(cfg, "TRANSCRIBE_ENCODER", "wav")
+
+# 도구 결과 캐시 최대 항목 수 (0: 사용 안함)
+TOOL_CACHE_MAX_ENTRIES = getattr(cfg, "TOOL_CACHE_MAX_ENTRIES", 256)
+
+# blockchain 로그 파일 기록 후 디스크 동기화: none | group (CHAIN_GROUP_COMMIT_MS 단위로 묶어서 fsync) | always
+CHAIN_SYNC = getattr(cfg, "CHAIN_SYNC", chain_log.SYNC_NONE)
+CHAIN_GROUP_COMMIT_MS = getattr(cfg, "CHAIN_GROUP_COMMIT_MS", 200)
+chain_log.configure(CHAIN_SYNC, CHAIN_GROUP_COMMIT_MS)
+# 서버 시작 전 검증 체크포인트를 무시하고 두 blockchain 의 모든 블럭을 재검증 (블럭 수에 비례해 시작이 느려짐)
+CHAIN_FULL_VERIFY_ON_START = getattr(cfg, "CHAIN_FULL_VERIFY_ON_START", False)
+
+# 턴 지연 측정: 히스토그램을 웹소켓 포트의 METRICS_PATH 로 제공 (Prometheus), TRACE_FILE 지정 시 턴별 JSONL 기록
+TRACE_ENABLED = getattr(cfg, "TRACE_ENABLED", False)
+TRACE_FILE = getattr(cfg, "TRACE_FILE", None)
+METRICS_PATH = getattr(cfg, "METRICS_PATH", tracing.METRICS_PATH)
+
+# 세션 녹화: 지정한 폴더에 연결별 캡처 파일 기록 (benchmarks/replay_capture.py 로 재생), None: 사용 안함
+CAPTURE_DIR = getattr(cfg, "CAPTURE_DIR", None)
+
+# 클라이언트 송신 큐: block | drop_oldest | disconnect
+OUTBOUND_POLICY = getattr(cfg, "OUTBOUND_POLICY", outbound.BLOCK)
+OUTBOUND_MAX_AUDIO_FRAMES = getattr(cfg, "OUTBOUND_MAX_AUDIO_FRAMES", 50)
+OUTBOUND_TARGET_AUDIO_MS = getattr(cfg, "OUTBOUND_TARGET_AUDIO_MS", 100)
+OUTBOUND_LINGER_MS = getattr(cfg, "OUTBOUND_LINGER_MS", 40)
+
+# 모델 음성 재생 중 사용자가 말하기 시작하면 남은 모델 오디오 취소 (barge-in)
+BARGE_IN = getattr(cfg, "BARGE_IN", True)
+
+# 화면/카메라 프레임: 최대 해상도, 재압축 품질, 초당 프레임 상한, 중복 판정 거리(dHash)
+IMAGE_MAX_SIDE = getattr(cfg, "IMAGE_MAX_SIDE", image_ingest.MAX_SIDE)
+IMAGE_JPEG_QUALITY = getattr(cfg, "IMAGE_JPEG_QUALITY", image_ingest.JPEG_QUALITY)
+IMAGE_MAX_FPS = getattr(cfg, "IMAGE_MAX_FPS", image_ingest.MAX_FPS)
+IMAGE_DEDUP_DISTANCE = getattr(cfg, "IMAGE_DEDUP_DISTANCE", image_ingest.DEDUP_DISTANCE)
+
+# 서버 주소, 워커 프로세스 수 (1 초과 시 SO_REUSEPORT 로 같은 포트를 공유하는 멀티 프로세스 모드)
+SERVER_HOST = getattr(cfg, "SERVER_HOST", "0.0.0.0")
+SERVER_PORT = getattr(cfg, "SERVER_PORT", 9083)
+WORKERS = getattr(cfg, "WORKERS", 1)
+
+# 미리 연결해 둔 Live 세션 풀 (0: 사용 안함), 미사용 세션은 만료 전에 교체
+LIVE_POOL_MIN = getattr(cfg, "LIVE_POOL_MIN", 0)
+LIVE_POOL_MAX = getattr(cfg, "LIVE_POOL_MAX", 0)
+LIVE_POOL_MAX_IDLE_S = getattr(cfg, "LIVE_POOL_MAX_IDLE_S", 120)
+
+# 연결 종료 후 같은 session_id 로 재접속 시 대화를 이어갈 수 있는 시간 (초)
+SESSION_RESUME_TTL_S = getattr(cfg, "SESSION_RESUME_TTL_S", session_registry.RESUME_TTL_S)
+# 빠른 재접속 시 이전 연결의 정리가 끝나기를 기다리는 시간 (초), 초과하면 1008 로 거부
+SESSION_RECONNECT_WAIT_S = getattr(cfg, "SESSION_RECONNECT_WAIT_S", session_registry.RECONNECT_WAIT_S)
+
+# 선택 기능은 설정이 켜져 있을 때만 로드: 전사(google.generativeai), 마이크 VAD(barge-in/발화 단위 전송)
+TRANSCRIBE = SND_TRANSCRIP or RCV_TRANSCRIP
+USE_VAD = BARGE_IN or SND_TRANSCRIP
+if TRANSCRIBE:
+    with startup.timed("transcription (google.generativeai)"):
+        import transcription
+        transcription.configure(os.environ['GOOGLE_API_KEY'])
+if USE_VAD:
+    with startup.timed("vad"):
+        import vad
 
 client = genai.Client(
   http_options={
@@ -66,40 +170,16 @@ def print_json_keys_structured(json_data, indent=0, prefix=""):
 
     if isinstance(json_data, dict):
         for key, value in json_data.items():
-            print(f"{indent_str}{prefix}{key}:") # 키 출력 (접두사, 들여쓰기 적용)
+            log.debug(f"{indent_str}{prefix}{key}:") # 키 출력 (접두사, 들여쓰기 적용)
             print_json_keys_structured(value, indent + 1, prefix) # 값에 대해 재귀 호출, 들여쓰기 레벨 증가
     elif isinstance(json_data, list):
         for i, item in enumerate(json_data):
-            print(f"{indent_str}{prefix}[{i}]:") # 리스트 인덱스 출력
+            log.debug(f"{indent_str}{prefix}[{i}]:") # 리스트 인덱스 출력
             print_json_keys_structured(item, indent + 1, prefix) # 리스트 아이템에 대해 재귀 호출
     else:
         # 기본 자료형 값은 키 정보가 아니므로 출력하지 않음 (필요하다면 출력 가능)
         pass # 또는 print(f"{indent_str}{prefix}(value: {json_data})") 와 같이 값도 출력 가능
 
-def calculate_dbfs(pcm_bytes, bit_depth):
-    """PCM 데이터에서 dBFS를 계산합니다.
-
-    Args:
-        pcm_data: NumPy 배열 형태의 PCM 데이터
-        bit_depth: PCM 데이터의 비트 심도 (예: 16, 24)
-
-    Returns:
-        dBFS 값 (float)
-    """
-
-    pcm_data = np.frombuffer(pcm_bytes, dtype=np.int16)
-
-    max_amplitude = 2**(bit_depth - 1)  # Signed PCM 기준 최대 진폭
-    rms = np.sqrt(np.mean(pcm_data**2))
-
-    # RMS 값이 0인 경우 (무음) - 무한대 데시벨 방지
-    if rms == 0:
-        return -float('inf')  # 또는 적절한 최소값 (예: -100 dBFS)
-
-    dbfs = 20 * np.log10(rms / max_amplitude)
-    return dbfs
-
-
 # Load previous session handle from a file
 # You must delete the session_handle.json file to start a new session when last session was 
 # finished for a while.
@@ -117,15 +197,82 @@ def calculate_dbfs(pcm_bytes, bit_depth):
 #     with open('session_handle.json', 'w') as f:
 #         json.dump({'previous_session_handle': handle}, f)
 
-previous_session_handle = None #load_previous_session_handle()
-print("Init. previous session handle: ", previous_session_handle, id(previous_session_handle))
+# 연결별 Live 세션 상태 (재개 handle, 재생 상태, 수신 버퍼), 클라이언트가 ?session_id= 로 식별
+sessions = session_registry.SessionRegistry(
+    resume_ttl=SESSION_RESUME_TTL_S,
+    buffer_factory=lambda: AudioBuffer(capacity=24000 * 2 * 5, max_capacity=RCV_BUFFER_MAX_BYTES),
+)
+
+def live_connect_config(handle=None):
+    """Live API 연결 설정, handle 이 있으면 이전 세션을 이어서 진행 (기본 설정은 1회만 생성)"""
+    if handle is None:
+        return _standard_live_config()
+    return _standard_live_config().model_copy(update={
+        # The handle of the session to resume is passed here.
+        "session_resumption": types.SessionResumptionConfig(handle=handle),
+    })
+
+@functools.cache
+def _standard_live_config():
+    return types.LiveConnectConfig(
+        response_modalities=["AUDIO"],
+        speech_config=types.SpeechConfig(
+            voice_config=types.VoiceConfig(
+                #Puck, Charon, Kore, Fenrir, Aoede, Leda, Orus, and Zephyr.
+                prebuilt_voice_config=types.PrebuiltVoiceConfig(voice_name=cfg.VOICE)
+            ),
+            language_code='ko-KR',
+        ),
+        system_instruction=cfg.INSTRUCTION,
+        session_resumption=types.SessionResumptionConfig(
+            # None: start a new session (live_connect_config() 가 handle 을 채운 사본을 만듦)
+            handle=None
+        ),
+        output_audio_transcription=types.AudioTranscriptionConfig(
+
+        ),
+        input_audio_transcription=types.AudioTranscriptionConfig() if LIVE_TRANSCRIPTS else None,
+        tools=[
+            {"google_search": {}},
+            # {'code_execution': {}},
+            {'function_declarations': mfc.function_declarations}
+            # {'function_declarations': [record_agent_memory, recall_agent_memory, summarize_mental_care_session, retrieve_recent_mental_care_sessions, get_remaining_timer_time, list_music_files, play_music_file]}
+        ],            
+    )
+
+# tool_call 실행기 (function call 동시 실행, 호출별 오류 격리, 조회 결과 캐시: 프로세스 내 모든 연결이 공유)
+tools = tool_dispatch.ToolDispatcher(
+    mfc.available_functions,
+    cache=tool_cache.ToolCache(
+        mfc.tool_cache_policies, mfc.tool_cache_versions, max_entries=TOOL_CACHE_MAX_ENTRIES
+    ) if TOOL_CACHE_MAX_ENTRIES > 0 else None,
+)
+
+tracer = tracing.Tracer(enabled=TRACE_ENABLED, trace_file=TRACE_FILE, metrics_path=METRICS_PATH)
+
+live_pool = None # main() 에서 LIVE_POOL_MAX > 0 이면 생성
 
 # async def gemini_session_handler(client_websocket: websockets.WebSocketServerProtocol):
 async def gemini_session_handler(client_websocket):
     """Handles the interaction with Gemini API within a websocket session."""
-    # global previous_session_handle # 전역 변수임을 명시    
-
+    session_key = session_registry.session_key_from_path(session_registry.request_path(client_websocket))
+    try:
+        state = await sessions.open_when_free(session_key, SESSION_RECONNECT_WAIT_S)
+    except session_registry.SessionInUse:
+        log.warning("session already connected, rejecting", session=session_key)
+        await client_websocket.close(code=1008, reason="session already active")
+        return
+    log.info("session open", session=state.key, resumed=state.resumption_handle is not None, registry=sessions.stats())
+
+    recorder = session_capture.NULL_RECORDER
     try:
+        if CAPTURE_DIR:
+            recorder = session_capture.SessionRecorder(
+                os.path.join(CAPTURE_DIR, f"{state.key}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.cap"),
+                {"session": state.key, "resumed": state.resumption_handle is not None, "model": cfg.MODEL},
+            )
+            log.info("capturing session", session=state.key, path=recorder.path)
+
         # config_message = await client_websocket.recv()
         # config_data = json.loads(config_message)
         # config = config_data.get("setup", {})
@@ -133,31 +280,7 @@ async def gemini_session_handler(client_websocket):
         # return
 
 
-        config = types.LiveConnectConfig(
-            response_modalities=["AUDIO"],
-            speech_config=types.SpeechConfig(
-                voice_config=types.VoiceConfig(
-                    #Puck, Charon, Kore, Fenrir, Aoede, Leda, Orus, and Zephyr.
-                    prebuilt_voice_config=types.PrebuiltVoiceConfig(voice_name=cfg.VOICE)
-                ),
-                language_code='ko-KR',
-            ),
-            system_instruction=cfg.INSTRUCTION,
-            session_resumption=types.SessionResumptionConfig(
-                # The handle of the session to resume is passed here,
-                # or else None to start a new session.
-                handle=previous_session_handle
-            ),
-            output_audio_transcription=types.AudioTranscriptionConfig(
-                
-            ),
-            tools=[
-                {"google_search": {}},
-                # {'code_execution': {}},
-                {'function_declarations': mfc.function_declarations}
-                # {'function_declarations': [record_agent_memory, recall_agent_memory, summarize_mental_care_session, retrieve_recent_mental_care_sessions, get_remaining_timer_time, list_music_files, play_music_file]}
-            ],            
-        )
+        config = live_connect_config(state.resumption_handle)
 
         # config = {"generation_config": {
         #             "response_modalities": ["AUDIO"],
@@ -183,9 +306,47 @@ async def gemini_session_handler(client_websocket):
         
         # print(">> config:", config)
          
-        async with client.aio.live.connect(model=cfg.MODEL, config=config) as session:
-            session.isPlaying = False
-            print("Connected to Gemini API, previous_session_handle:", previous_session_handle, id(previous_session_handle))
+        if live_pool is not None and state.resumption_handle is None:
+            # 미리 연결된 세션을 바로 사용 (재개 세션은 handle 이 달라 직접 연결)
+            live = live_pool.connect()
+        else:
+            live = client.aio.live.connect(model=cfg.MODEL, config=config)
+        async with live as session:
+            # 클라이언트로 가는 모든 메시지는 outbox 송신 태스크를 거침 (audio 우선)
+            outbox = outbound.ClientSender(
+                client_websocket,
+                policy=OUTBOUND_POLICY,
+                max_audio_frames=OUTBOUND_MAX_AUDIO_FRAMES,
+                target_audio_bytes=24000 * 2 * OUTBOUND_TARGET_AUDIO_MS // 1000,
+                linger_ms=OUTBOUND_LINGER_MS,
+            ).start()
+            barge = barge_in.BargeInController(outbox, onset_ms=VAD_ONSET_MS)
+
+            async def emit_transcript(text):
+                await outbox.send_json({"text": text})
+
+            # 전사는 이벤트 루프 밖(인코딩 프로세스 풀 + async API)에서 처리, 결과는 턴 순서대로 전달
+            transcriber = None
+            if TRANSCRIBE:
+                transcriber = transcription.TranscriptionPipeline(
+                    emit_transcript,
+                    cfg.TRANSCRIPTION_MODEL,
+                    max_pending=TRANSCRIBE_MAX_PENDING,
+                    executor=transcription.get_encode_pool(TRANSCRIBE_WORKERS),
+                    encoder_name=TRANSCRIBE_ENCODER,
+                )
+            # LIVE_TRANSCRIPTS: Live API 전사 조각을 모아서 바로 전달 (별도 전사 모델 호출 없음)
+            transcripts = None
+            if LIVE_TRANSCRIPTS:
+                transcripts = live_transcripts.TranscriptStream(
+                    outbox.send_json, coalesce_ms=TRANSCRIPT_COALESCE_MS, max_chars=TRANSCRIPT_MAX_CHARS
+                ).start()
+            # 턴 단위 지연 측정 (TRACE_ENABLED = False 이면 no-op)
+            trace = tracer.session(state.key)
+            tool_calls = tool_dispatch.PendingToolCalls(
+                tools, lambda responses: session.send_tool_response(function_responses=responses), trace=trace
+            )
+            log.info("connected to Gemini API", session=state.key)
 
             # print(">> 타이머 시작:")
             # result_start = timer.start_consultation_timer()
@@ -193,88 +354,155 @@ async def gemini_session_handler(client_websocket):
 
             async def send_to_gemini():
                 """Sends messages from the client websocket to the Gemini API."""
+                temp = AudioBuffer(capacity=16000 * 2 * 5, max_capacity=SND_BUFFER_MAX_BYTES)
+                mic_vad = vad.StreamingVAD(onset_ms=VAD_ONSET_MS, hangover_ms=VAD_HANGOVER_MS) if USE_VAD else None
+                ingest = resample.AudioIngest() # 클라이언트가 input_audio 를 선언하면 16kHz mono 로 변환
+                frames = image_ingest.FrameFilter(
+                    max_side=IMAGE_MAX_SIDE,
+                    quality=IMAGE_JPEG_QUALITY,
+                    max_fps=IMAGE_MAX_FPS,
+                    dedup_distance=IMAGE_DEDUP_DISTANCE,
+                )
+
+                async def send_image(jpeg):
+                    """중복/과다 프레임은 버리고, 큰 프레임은 축소 후 전송 (디코딩은 스레드에서)"""
+                    jpeg = await asyncio.to_thread(frames.process, jpeg)
+                    if jpeg is not None:
+                        await session.send_realtime_input(media=types.Blob(data=jpeg, mime_type='image/jpeg'))
+
+                async def detect_speech(pcm):
+                    """모든 마이크 청크에 VAD 적용, 모델 오디오 재생 중 발화가 시작되면 barge-in"""
+                    if mic_vad is None:
+                        return
+                    for event, at in mic_vad.process(pcm):
+                        log.debug("vad", session=state.key, event=event, at=round(at, 2), floor_dbfs=round(mic_vad.noise_floor_dbfs, 1))
+                        if event == vad.SPEECH_START and BARGE_IN and barge.audio_in_flight():
+                            await barge.interrupt("barge_in")
+
+                async def accumulate_pcm(byted_chunk, received_at):
+                    """SND_TRANSCRIP 모드: 발화 단위로 모아서 전송 후 전사"""
+                    temp.append(byted_chunk)
+                    #print("isPlaying:", state.is_playing, "dbfs_chunk:", mic_vad.last_dbfs, "temp_size:", len(temp))
+
+                    #응답 not playing , 발화 종료(hangover 경과), temp 크기 0.5초 이상?
+                #   if not state.is_playing and not mic_vad.is_speaking and len(temp) > 100000:
+                    if not state.is_playing and not mic_vad.is_speaking and len(temp) > 50000:
+                        # Clear the accumulated audio data
+                        # print("[CK]transcribed_text:", transcribed_text)
+                        #print("[OK]Sended to Gemini:", len(temp))
+                        # await session.send(input={"mime_type": "audio/pcm", "data": temp})
+                        utterance = bytes(temp.flush())
+                        await session.send_realtime_input(media=types.Blob(data=utterance, mime_type='audio/pcm;rate=16000'))
+                        trace.frame_forwarded(received_at)
+
+                        transcriber.submit(utterance, "L:", 16000)
+
                 try:
-                    temp = b''
                     async for message in client_websocket:
+                        received_at = trace.frame_received()
+                        recorder.client(message)
                         try:
+                            # binary_frames 협상된 클라이언트: header + raw PCM/JPEG
+                            if isinstance(message, bytes):
+                                kind, _seq, payload = ap.parse_frame(message)
+                                if kind == ap.KIND_AUDIO_PCM:
+                                    pcm = ingest.process(payload)
+                                    await detect_speech(pcm)
+                                    if SND_TRANSCRIP:
+                                        await accumulate_pcm(pcm, received_at)
+                                    else:
+                                        # Blob.data 는 bytes 만 허용 -> SDK 경계에서 1회 복사
+                                        await session.send_realtime_input(media=types.Blob(data=bytes(pcm), mime_type='audio/pcm;rate=16000'))
+                                        trace.frame_forwarded(received_at)
+                                elif kind == ap.KIND_IMAGE_JPEG:
+                                    await send_image(payload)
+                                continue
+
                             data = json.loads(message)
                         #   print_json_keys_structured(data, prefix="+ ")
+                            if "setup" in data:
+                                setup = data["setup"]
+                                if "binary_frames" in setup:
+                                    outbox.binary_frames = ap.wants_binary_frames(setup)
+                                if "input_audio" in setup:
+                                    try:
+                                        ingest = resample.AudioIngest.from_setup(setup)
+                                    except (TypeError, ValueError) as e:
+                                        log.warning("unsupported input_audio, keeping 16kHz mono", session=state.key, error=str(e))
+                                log.info("client setup", session=state.key, binary_frames=outbox.binary_frames, input_audio=ingest.describe())
+                                await outbox.send_json({
+                                    "setup_complete": {"binary_frames": outbox.binary_frames, "input_audio": ingest.describe()}
+                                })
+
+                            if "interrupt_ack" in data:
+                                # 클라이언트가 재생 버퍼를 비운 시점 -> interrupt-to-silence 지연 측정
+                                barge.on_ack(data["interrupt_ack"])
+
                             if "realtime_input" in data:
                                 for chunk in data["realtime_input"]["media_chunks"]:
                                     if chunk["mime_type"] == "audio/pcm":
 
-                                        if cfg.SND_TRANSCRIP:
-                                            byted_chunk = base64.b64decode(chunk["data"])
-                                            temp += byted_chunk
-                                            #print("isPlaying:", session.isPlaying, "dbfs_chunk:", calculate_dbfs(byted_chunk, 16), "temp_size:", len(temp))
-
-                                            #응답 not playing , -70 보다 작으면 침묵, temp 크기 0.5초 이상?
-                                        #   if not session.isPlaying and calculate_dbfs(byted_chunk, 16) < -70 and len(temp) > 100000:
-                                            if not session.isPlaying and calculate_dbfs(byted_chunk, 16) < -70 and len(temp) > 50000:
-                                                # Clear the accumulated audio data
-                                                # print("[CK]transcribed_text:", transcribed_text)
-                                                #print("[OK]Sended to Gemini:", len(temp))
-                                                # await session.send(input={"mime_type": "audio/pcm", "data": temp})
-                                                await session.send_realtime_input(media=types.Blob(data=temp, mime_type='audio/pcm;rate=16000'))
-
-                                                transcribed_text = transcribe_audio(temp)
-                                                temp = b''
-
-                                                if transcribed_text not in {"<Not recognizable>", "<Not recognizable>\n"}:
-                                                    print(f"transcribed_text:[{transcribed_text}]")
-                                                    await client_websocket.send(json.dumps({
-                                                        "text": "L:"+transcribed_text
-                                                    }))
+                                        if USE_VAD or not ingest.passthrough:
+                                            pcm = ingest.process(base64.b64decode(chunk["data"]))
+                                            await detect_speech(pcm)
+                                            if SND_TRANSCRIP:
+                                                await accumulate_pcm(pcm, received_at)
+                                            else:
+                                                await session.send_realtime_input(media=types.Blob(data=bytes(pcm), mime_type='audio/pcm;rate=16000'))
+                                                trace.frame_forwarded(received_at)
                                         else:
                                             # print("[OK]Sended to Gemini:", len(chunk["data"]), len(temp))
                                             # await session.send(input={"mime_type": "audio/pcm", "data": chunk["data"]})
                                             await session.send_realtime_input(media=types.Blob(data=chunk["data"], mime_type='audio/pcm;rate=16000'))
+                                            trace.frame_forwarded(received_at)
                                         
                                     elif chunk["mime_type"] == "image/jpeg":
                                         if "data" in chunk.keys():
-                                            await session.send(input={"mime_type": "image/jpeg", "data": chunk["data"]})
+                                            await send_image(base64.b64decode(chunk["data"]))
 
 
                     #   except asyncio.CancelledError: # CancelledError 먼저 처리
                     #       print("[ER]Asyncio Task Cancelled!") # 취소 상황에 대한 특정 처리 (예: 로그만 남기기)
 
                         except websockets.exceptions.ConnectionClosedOK:
-                            print("[SND] Client connection closed normally (send)")
+                            log.info("client connection closed (send)", session=state.key)
                             break  # Exit the loop if the connection is closed
                         except websockets.exceptions.ConnectionClosedError:
-                            print("[SND] Client connection closed ConnectionClosedError (send)")
+                            log.warning("client connection closed with error (send)", session=state.key)
                             break  # Exit the loop if the connection is closed
                         except Exception as e:
-                            print("[SND] Error sending to Gemini:", e)
+                            log.limited("send_error", 1.0, logging.ERROR, "error sending to Gemini", session=state.key, error=repr(e))
                         #   print("is_json:", is_json(message), len(message))
                             
-                    print("Client connection closed (send)")
+                    log.debug("send loop finished", session=state.key)
                 except Exception as e:
-                     print(f"Error sending to Gemini: {e}")
+                     log.error("send loop failed", session=state.key, error=repr(e))
                 finally:
-                   print("send_to_gemini closed")
+                   log.info("send_to_gemini closed", session=state.key, buffer=temp.stats())
+                   log.info("frame stats", session=state.key, **frames.stats())
 
             async def receive_from_gemini():
                 """Receives responses from the Gemini API and forwards them to the client, looping until turn is complete."""
-                global previous_session_handle # 전역 변수임을 명시(global 없이 중간에 선언시 unbound 발생)                
-                
                 try:
                     while True:
                         try:
-                            print(f"\n receiving from gemini: {previous_session_handle}")
+                            log.debug("receiving from gemini", session=state.key)
 
                             async for response in session.receive():
+                                recorder.live(response)
 
                                 if response.session_resumption_update:
                                     update = response.session_resumption_update
                                     if update.resumable and update.new_handle:
                                         # The handle should be retained and linked to the session.
-                                        previous_session_handle = update.new_handle
-                                        # save_previous_session_handle(previous_session_handle)
-                                        print("Resumed session update with handle: ", previous_session_handle, id(previous_session_handle))
+                                        state.resumption_handle = update.new_handle
+                                        log.debug("session resumption update", session=state.key, handle=state.resumption_handle)
 
                                 if response.server_content and hasattr(response.server_content, 'output_transcription') and response.server_content.output_transcription is not None:
-                                    print(response.server_content.output_transcription.text, end="") #한 글자씩 출력됨, 줄바꿈 제거
+                                    log.debug("output transcription", session=state.key, text=response.server_content.output_transcription.text) # 조각 단위, 기본 레벨에서는 출력 안함
+                                    if transcripts:
+                                        fragment = response.server_content.output_transcription
+                                        await transcripts.add(live_transcripts.MODEL, fragment.text, fragment.finished)
                                     # await client_websocket.send(json.dumps({"text": response.server_content.output_transcription.text}))
                                     # await client_websocket.send(json.dumps({
                                     #     "transcription": {
@@ -285,7 +513,10 @@ async def gemini_session_handler(client_websocket):
                                     # }))
 
                                 if response.server_content and hasattr(response.server_content, 'input_transcription') and response.server_content.input_transcription is not None:
-                                    print("input:?", response.server_content.input_transcription.text) #, end="") #한 글자씩 출력됨, 줄바꿈 제거
+                                    log.debug("input transcription", session=state.key, text=response.server_content.input_transcription.text)
+                                    if transcripts:
+                                        fragment = response.server_content.input_transcription
+                                        await transcripts.add(live_transcripts.USER, fragment.text, fragment.finished)
                                     # await client_websocket.send(json.dumps({"text": response.server_content.input_transcription.text}))
                                     # await client_websocket.send(json.dumps({
                                     #     "transcription": {
@@ -298,53 +529,13 @@ async def gemini_session_handler(client_websocket):
                                 if response.server_content is None:
                                     #print(f'Unhandled server message! - {response}')
                                     if response.tool_call:
-                                        print(f'[FN] response.tool_call : {response.tool_call}')
-
-                                        # --- 여기가 추가되어야 할 부분 ---
-                                        try:
-                                            # 1. 인자 파싱 (구체적인 구조는 response.tool_call 내용 확인 필요)
-                                            # 예시: tool_call 객체 구조가 { function_call: { name: 'func_name', args: {'arg1': val1} } } 라고 가정
-                                            call_info = response.tool_call.function_calls[0] # 실제 객체 구조에 맞게 수정
-                                            function_name = call_info.name
-                                            arguments = call_info.args # dict 형태일 것으로 예상
-
-                                            # 매핑된 딕셔너리에서 실제 함수 찾기
-                                            function_to_call = mfc.available_functions.get(function_name)
-
-                                            if function_to_call:
-                                                # 3. 결과 얻기
-                                                # result = await function_to_call(**arguments) # **로 딕셔너리 인자 전달
-                                                result = await function_to_call(arguments) 
-                                                # print(f"[FN] 함수 실행 결과: {result}")
-                                                # print("[FN] call_info:", call_info)
-
-                                                # msg = [{
-                                                #         'id': call_info.id,
-                                                #         'name': call_info.name,
-                                                #         'response':{'result': result}
-                                                # }]
-                                                function_response=types.FunctionResponse(
-                                                        name=call_info.name,
-                                                        response={'result': result},
-                                                        id=call_info.id,
-                                                    )
-
-                                                # await session.send(input=msg)
-                                                await session.send_tool_response(function_responses=function_response)
-                                                print("[FN] Successfully sent function response to Gemini.", function_response)
-
-                                                # 클라이언트 화면에 메시지 전달(옵션)
-                                                # print("[FN] client_websocket send: ", arguments)
-                                                # await client_websocket.send(json.dumps({"text": f"{str(arguments)}"}))                                                
+                                        log.info("tool call", session=state.key, calls=[c.name for c in response.tool_call.function_calls or []])
 
-                                            else:
-                                                print(f"[FN] 알 수 없는 함수 호출: {function_name}, {function_to_call}")
-                                                # 오류 처리 또는 Gemini에게 함수를 찾을 수 없다고 알림
-
-                                        except Exception as e:
-                                            print(f"[FN] 함수 호출 중 오류 발생: {e}")
-                                            # 오류 처리 및 Gemini에게 알림 (선택적)
-                                        # --- 추가 부분 끝 ---
+                                        # 한 메시지의 모든 function call 을 동시에 실행, 응답은 준비되면 한 번에 전송
+                                        # (백그라운드 태스크: 도구 실행 중에도 수신 루프는 계속 진행)
+                                        tool_calls.submit(response.tool_call)
+                                    elif response.tool_call_cancellation:
+                                        tool_calls.cancel(response.tool_call_cancellation.ids)
 
                                     #continue
                                 else:
@@ -353,141 +544,118 @@ async def gemini_session_handler(client_websocket):
                                     if model_turn:
                                         for part in model_turn.parts:
                                             if hasattr(part, 'text') and part.text is not None:
-                                                await client_websocket.send(json.dumps({"text": part.text}))
+                                                await outbox.send_json({"text": part.text})
                                             elif hasattr(part, 'inline_data') and part.inline_data is not None:
                                                 #임시주석처리 print("audio mime_type:", part.inline_data.mime_type)
-                                                base64_audio = base64.b64encode(part.inline_data.data).decode('utf-8')
-                                                
-                                                session.isPlaying = True
-                                                #print("[OK]Sended to Client:", len(base64_audio))
-                                                await client_websocket.send(json.dumps({"audio": base64_audio}))
+                                                if not barge.on_model_audio(len(part.inline_data.data)):
+                                                    continue # barge-in 이후 남은 턴 오디오는 버림
+                                                state.is_playing = True
+                                                trace.model_audio()
+                                                #print("[OK]Sended to Client:", len(part.inline_data.data))
+                                                await outbox.send_audio(part.inline_data.data)
                                                 
-                                                if cfg.RCV_TRANSCRIP:
+                                                if RCV_TRANSCRIP:
                                                     # Accumulate the audio data here
-                                                    if not hasattr(session, 'audio_data'):
-                                                        session.audio_data = b''
-                                                    session.audio_data += part.inline_data.data
+                                                    state.audio_data.append(part.inline_data.data)
                                                 
                                                 #임시주석처리 print("audio received")
 
-                                    if cfg.RCV_TRANSCRIP:
+                                    if response.server_content.interrupted:
+                                        # Live API 자체 VAD 가 끼어들기 감지: 이미 큐에 쌓인 오디오도 취소
+                                        if BARGE_IN and barge.audio_in_flight():
+                                            await barge.interrupt("server")
+                                        barge.on_turn_end()
+                                        state.is_playing = False
+                                        trace.turn_end(interrupted=True)
+                                        if transcripts:
+                                            await transcripts.end_turn()
+
+                                    if response.server_content.turn_complete:
+                                        # 턴 마지막 부분 오디오는 linger 대기 없이 바로 전송
+                                        await outbox.flush_audio()
+                                        barge.on_turn_end()
+                                        state.is_playing = False
+                                        trace.turn_end()
+                                        if transcripts:
+                                            await transcripts.end_turn()
+
+                                    if RCV_TRANSCRIP:
                                         if response.server_content.turn_complete:
-                                            print('\n<Turn complete>')
-                                            session.isPlaying = False
+                                            log.debug("turn complete", session=state.key)
                                             # Transcribe the accumulated audio here
-                                            transcribed_text = transcribe_audio(session.audio_data)
-                                            if transcribed_text:    
-                                                await client_websocket.send(json.dumps({
-                                                    "text": "R:"+transcribed_text
-                                                }))
-                                            # Clear the accumulated audio data
-                                            session.audio_data = b''
+                                            # (flush 가 버퍼를 비우고 zero-copy view 를 넘겨줌)
+                                            transcriber.submit(state.audio_data.flush(), "R:", 24000)
                         except websockets.exceptions.ConnectionClosedOK:
-                            print("[RCV] Client connection closed normally (receive)")
+                            log.info("client connection closed (receive)", session=state.key)
                             break  # Exit the loop if the connection is closed
                         except websockets.exceptions.ConnectionClosedError as e:
-                            print(f"[RCV] Client connection closed ConnectionClosedError (receive): \n{e}")
+                            log.warning("client connection closed with error (receive)", session=state.key, error=str(e))
                             break  # Exit the loop if the connection is closed
+                        except outbound.ClientTooSlow as e:
+                            log.warning("client disconnected by outbound policy", session=state.key, error=str(e))
+                            break
                         except Exception as e:
-                            print(f"[RCV] Error receiving from Gemini: \n{e}")
+                            log.error("error receiving from Gemini", session=state.key, error=repr(e))
                             break 
 
                 except Exception as e:
-                    print(f"While Loop : Error receiving from Gemini: \n{e}")
+                    log.error("receive loop failed", session=state.key, error=repr(e))
                 finally:
-                    print("While Loop : Gemini connection closed (receive)", previous_session_handle, id(previous_session_handle))
+                    log.info("Gemini connection closed (receive)", session=state.key)
+                    log.info("receive stats", session=state.key, audio_buffer=state.audio_data.stats(), barge_in=barge.stats())
 
-                    # 최종 블럭저장 로직 추가
-                    # --- Save the updated blockchain ---
-                    print("\n--- Saving Updated Blockchain ---")
-                    mfc.my_medical_chain.save_chain()
+                    # 블럭은 기록 시점에 파일 잠금 후 바로 저장됨 (chain_sync, 워커 간 덮어쓰기 방지)
+                    # 종료 시 오래된 메모리 사본으로 다시 저장하지 않음
 
                     # --- Final Integrity Check ---
-                    print("\n--- Final Integrity Check Before Exiting ---")
-                    mfc.my_medical_chain.is_chain_valid()
-
-                    # 최종 메모리블럭 저장
-                    mfc.memory_chain.save_chain()
+                    log.debug("final integrity check", session=state.key)
+                    await asyncio.to_thread(mfc.shared_medical_chain.read, lambda chain: chain.verify()) # 마지막 검증 이후 추가된 블럭만
 
 
             # Start send loop
             send_task = asyncio.create_task(send_to_gemini())
             # Launch receive loop as a background task
             receive_task = asyncio.create_task(receive_from_gemini())
-            await asyncio.gather(send_task, receive_task)
+            try:
+                await asyncio.wait({send_task, receive_task}, return_when=asyncio.FIRST_COMPLETED)
+                if send_task.done():
+                    # 클라이언트 연결 종료: 다음 모델 턴을 기다리던 수신 루프도 정리 (Live 세션 누수 방지)
+                    receive_task.cancel()
+                await asyncio.gather(send_task, receive_task, return_exceptions=True)
+            finally:
+                # 연결 종료 시 실행중인 도구 호출, 대기중인 전사 작업 취소
+                await tool_calls.close()
+                log.info("tool call stats", session=state.key, pending=tool_calls.stats(), dispatcher=tools.stats())
+                if transcriber:
+                    await transcriber.close()
+                if transcripts:
+                    await transcripts.close()
+                    log.info("transcript stats", session=state.key, **transcripts.stats())
+                await outbox.close()
+                log.info("outbound stats", session=state.key, **outbox.stats())
 
 
     except Exception as e:
-        print(f"Error in Gemini session: {e}")
+        log.exception("error in Gemini session", session=session_key)
     finally:
-        print("Gemini session closed. previous_session_handle:", previous_session_handle, id(previous_session_handle))
+        recorder.close()
+        sessions.close(state)
+        log.info("session closed", session=state.key, registry=sessions.stats())
 
-def transcribe_audio(audio_data):
-    """Transcribes audio using Gemini 1.5 Flash."""
+async def preload_chains():
+    """blockchain 파일 미리 로드 (스레드), 결과/실패를 로그로 남김"""
+    started = time.perf_counter()
     try:
-        # Make sure we have valid audio data
-        if not audio_data:
-            return "No audio data received."
-            
-        # Convert PCM to MP3
-        mp3_audio_base64 = convert_pcm_to_mp3(audio_data)
-        if not mp3_audio_base64:
-            return "Audio conversion failed."
-            
-        # Create a client specific for transcription (assuming Gemini 1.5 flash)
-        transcription_client = None #generative.GenerativeModel(model_name=cfg.TRANSCRIPTION_MODEL)
-        
-        prompt = """Generate a transcript of the speech. 
-        Please do not include any other text in the response. 
-        If you cannot hear the speech, please only say '<Not recognizable>'."""
-        
-        response = transcription_client.generate_content(
-            [
-                prompt,
-                {
-                    "mime_type": "audio/mp3", 
-                    "data": base64.b64decode(mp3_audio_base64),
-                }
-            ]
-        )
-            
-        return response.text
-
-    except Exception as e:
-        print(f"Transcription error: {e}")
-        return "Transcription failed.", None
-
-def convert_pcm_to_mp3(pcm_data):
-    """Converts PCM audio to base64 encoded MP3."""
-    try:
-        # Create a WAV in memory first
-        wav_buffer = io.BytesIO()
-        with wave.open(wav_buffer, 'wb') as wav_file:
-            wav_file.setnchannels(1)  # mono
-            wav_file.setsampwidth(2)  # 16-bit
-            wav_file.setframerate(24000)  # 24kHz
-            wav_file.writeframes(pcm_data)
-        
-        # Reset buffer position
-        wav_buffer.seek(0)
-        
-        # Convert WAV to MP3
-        audio_segment = AudioSegment.from_wav(wav_buffer)
-        
-        # Export as MP3
-        mp3_buffer = io.BytesIO()
-        audio_segment.export(mp3_buffer, format="mp3", codec="libmp3lame")
-        
-        # Convert to base64
-        mp3_base64 = base64.b64encode(mp3_buffer.getvalue()).decode('utf-8')
-        return mp3_base64
-        
-    except Exception as e:
-        print(f"Error converting PCM to MP3: {e}")
-        return None
+        await asyncio.to_thread(mfc.preload_chains)
+    except Exception:
+        log.exception("blockchain preload failed (loaded again on first use)")
+    else:
+        log.info("blockchain files preloaded", ms=round((time.perf_counter() - started) * 1000, 1))
 
 import ssl
-async def main() -> None:
+import signal
+async def main(reuse_port=False) -> None:
+    global live_pool
 
     # # SSL 컨텍스트 생성
     # ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
@@ -500,11 +668,55 @@ async def main() -> None:
 
     # async with websockets.serve(gemini_session_handler, "localhost", 9083):
     # async with websockets.serve(gemini_session_handler, "0.0.0.0", 9083, ssl=ssl_context):
-    async with websockets.serve(gemini_session_handler, "0.0.0.0", 9083):
-        print("Running websocket server 0.0.0.0:9083...")
-
-        await asyncio.Future()  # Keep the server running indefinitely
+    stop = asyncio.get_running_loop().create_future()
+    if reuse_port:
+        # 워커 모드: supervisor 의 SIGTERM 에 서버를 정상 종료 (연결 close 후 핸들러 finally 실행)
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set_result, None)
+
+    tracer.register_tools(mfc.available_functions) # 워커 프로세스별 pid 라벨
+
+    if LIVE_POOL_MAX > 0:
+        live_pool = session_pool.LiveSessionPool(
+            lambda: client.aio.live.connect(model=cfg.MODEL, config=live_connect_config()),
+            min_size=LIVE_POOL_MIN,
+            max_size=LIVE_POOL_MAX,
+            max_idle_s=LIVE_POOL_MAX_IDLE_S,
+        ).start()
+
+    preload = None
+    try:
+        async with websockets.serve(
+            gemini_session_handler, SERVER_HOST, SERVER_PORT, reuse_port=reuse_port,
+            process_request=tracer.process_request if TRACE_ENABLED else None,
+        ):
+            log.info("running websocket server", host=SERVER_HOST, port=SERVER_PORT, pid=os.getpid())
+            startup.report("listening socket")
+            # blockchain 파일은 소켓이 열린 뒤 백그라운드에서 미리 로드 (첫 도구 호출 지연 방지)
+            preload = asyncio.create_task(preload_chains())
+
+            await stop  # Keep the server running until stopped
+    finally:
+        if preload is not None:
+            await preload # 스레드는 취소할 수 없음: 로드가 끝난 뒤 종료
+        if live_pool is not None:
+            await live_pool.close()
+            log.info("live session pool closed", **live_pool.stats())
+        if TRANSCRIBE:
+            transcription.shutdown_encode_pool()
+        tracer.close()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    if CHAIN_FULL_VERIFY_ON_START:
+        # 워커를 띄우기 전에 한 번만 실행
+        results = mfc.verify_chains(full=True)
+        if all(results.values()):
+            log.info("full blockchain verification passed", **results)
+        else:
+            log.critical("full blockchain verification failed", **results)
+    if WORKERS > 1 and workers.supports_workers():
+        workers.Supervisor(main, WORKERS).run()
+    else:
+        if WORKERS > 1:
+            log.warning("fork/SO_REUSEPORT not available, running a single process")
+        asyncio.run(main())
\ No newline at end of file
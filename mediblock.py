@@ -3,7 +3,12 @@ import datetime
 import json
 import os # Needed for file operations
 
-BLOCKCHAIN_FILE = "my_medical_records_signed.json" # Define filename (updated)
+import app_logging
+import chain_log
+
+log = app_logging.get_logger("mediblock")
+
+BLOCKCHAIN_FILE = "my_medical_records_signed.jsonl" # One block per line (a legacy .json file is migrated on first load)
 
 # --- Signature Helper Function ---
 def calculate_data_signature(data):
@@ -31,7 +36,7 @@ class Block:
             try:
                 self.timestamp = datetime.datetime.fromisoformat(timestamp)
             except ValueError:
-                print(f"Warning: Could not parse timestamp string '{timestamp}'. Using current time.")
+                log.warning("could not parse timestamp string, using current time", timestamp=timestamp)
                 self.timestamp = datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0) # Use UTC and remove microseconds
         elif isinstance(timestamp, datetime.datetime):
             # Ensure timezone awareness (use UTC if naive) and remove microseconds for consistency
@@ -39,7 +44,7 @@ class Block:
                 timestamp = timestamp.replace(tzinfo=datetime.timezone.utc)
             self.timestamp = timestamp.replace(microsecond=0)
         else:
-            print(f"Warning: Invalid timestamp type ({type(timestamp)}). Using current UTC time.")
+            log.warning("invalid timestamp type, using current UTC time", type=type(timestamp).__name__)
             self.timestamp = datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0)
 
         self.data = data # The medical record dictionary
@@ -84,7 +89,7 @@ class Block:
         signature = block_dict.get('signature', None)
         if signature is None:
              # Handle older blocks without signature: calculate it now or log a warning
-             print(f"Warning: Block {block_dict.get('index', 'N/A')} loaded without a signature. Calculating now.")
+             log.warning("block loaded without a signature, calculating now", block=block_dict.get('index', 'N/A'))
              signature = calculate_data_signature(block_dict['data'])
              # Note: This assumes the loaded data *is* the original data.
              # If data could have been tampered *before* loading, this won't catch it.
@@ -110,7 +115,9 @@ class Block:
                 f"------------------\n")
 
 # --- Blockchain Class ---
-class MedicalBlockchain:
+class MedicalBlockchain(chain_log.ChainStoreMixin):
+    block_cls = Block
+
     def __init__(self):
         self.chain = []
         self.required_fields = [
@@ -123,6 +130,8 @@ class MedicalBlockchain:
              "key_insights_or_progress", "action_plan",
              "risk_assessment", "overall_assessment"
         ]
+        self.store = None # chain_log.ChainLog of the file this chain was loaded from / saved to
+        self._merkle = None # merkle.MerkleTree, built on first use
 
     def _create_genesis_block(self):
         """Creates the first block in the chain with its data signature."""
@@ -148,14 +157,14 @@ class MedicalBlockchain:
         """Checks if the input data dictionary contains all required fields."""
         # (Validation logic remains the same)
         if not isinstance(data, dict):
-            print("Error: Input data must be a dictionary.")
+            log.error("input data must be a dictionary")
             return False
         missing_required = [field for field in self.required_fields if field not in data]
         if missing_required:
-            print(f"Error: Missing required fields: {', '.join(missing_required)}")
+            log.error("missing required fields", fields=missing_required)
             return False
         if not isinstance(data.get("main_topics"), list):
-             print(f"Error: 'main_topics' must be a list (array). Found: {type(data.get('main_topics'))}")
+             log.error("'main_topics' must be a list (array)", found=type(data.get('main_topics')).__name__)
              return False
         return True
 
@@ -165,7 +174,7 @@ class MedicalBlockchain:
         Returns True if successful, False otherwise.
         """
         if not self._validate_data(medical_data):
-            print("Failed to add block due to invalid data.")
+            log.error("failed to add block due to invalid data")
             return False
 
         if not self.chain:
@@ -173,7 +182,7 @@ class MedicalBlockchain:
 
         previous_block = self.get_latest_block()
         if previous_block is None:
-            print("Error: Cannot add block, chain is unexpectedly empty.")
+            log.error("cannot add block, chain is unexpectedly empty")
             return False
 
         new_index = previous_block.index + 1
@@ -189,176 +198,162 @@ class MedicalBlockchain:
             # hash_override is None, so hash will be calculated by Block.__init__
         )
         self.chain.append(new_block)
-        print(f"Successfully added Block {new_index} with data signature.")
+        log.info("added block with data signature", block=new_index)
         return True
 
     def view_chain(self):
         # (Remains the same)
         if not self.chain:
-            print("The blockchain is empty.")
+            log.info("the blockchain is empty")
             return
-        print("\n--- Medical Record Blockchain ---")
+        log.info("medical record blockchain", blocks=len(self.chain))
         for block in self.chain:
-            print(block) # __str__ now includes signature
-        print("--- End of Blockchain ---\n")
+            log.info(str(block)) # __str__ now includes signature
 
     def view_previous_records(self, count=None):
         # (Remains the same, but output via __str__ will include signature)
-        print("\n--- Viewing Previous Medical Records ---")
         records = self.chain[1:]
         if not records:
-            print("No medical records found (only Genesis Block exists).")
+            log.debug("no medical records found (only genesis block exists)")
             return []
 
         records_to_show = records[-count:] if count is not None and count > 0 else records
-        print(f"(Showing {'last ' + str(len(records_to_show)) if count is not None and count > 0 else 'all ' + str(len(records_to_show))} records)")
+        log.debug("viewing previous medical records", shown=len(records_to_show), requested=count if count is not None and count > 0 else "all")
 
         rtn = []
         for block in records_to_show:
-             print(f"--- Record (Block {block.index}) ---")
              ts_str = block.timestamp.isoformat() if isinstance(block.timestamp, datetime.datetime) else str(block.timestamp)
-             print(f"Timestamp: {ts_str}")
-             print(f"Data Signature: {block.signature}") # Explicitly show signature here too
-             print(f"Data:\n{json.dumps(block.data, indent=2, ensure_ascii=False)}")
-             print(f"Block Hash: {block.hash}")
-             print(f"Previous Hash: {block.previous_hash}")
-             print("-" * 20)
+             log.debug("medical record", block=block.index, timestamp=ts_str, signature=block.signature, hash=block.hash, previous_hash=block.previous_hash, data=block.data)
              rtn.append(block.data)
 
-        print("--- End of Records View ---\n")
         return rtn
 
-    def is_chain_valid(self):
+    def is_chain_valid(self, start=0):
         """
         Validates the integrity of the blockchain, including data signatures.
         Checks:
         1. Data Integrity: If each block's data matches its signature.
         2. Block Hash Integrity: If each block's stored hash is correct based on its content (including signature).
         3. Chain Link Integrity: If each block correctly points to the previous block's hash.
+
+        Args:
+            start (int): First block to check (0: the entire chain); block `start`
+                         is still checked against the hash of block `start - 1`.
         """
         if not self.chain:
-            print("Blockchain is empty, cannot validate.")
+            log.warning("blockchain is empty, cannot validate")
             return True
 
         # Check Genesis block separately (basic checks)
         genesis_block = self.chain[0]
-        if genesis_block.index != 0 or genesis_block.previous_hash != "0":
-             print("Genesis block invalid (Index or Previous Hash).")
-             return False
-        if not genesis_block.is_data_valid():
-             print(f"Genesis block data tampering detected! Signature mismatch.")
-             print(f"  Stored Signature: {genesis_block.signature}")
-             print(f"  Calculated Signature: {calculate_data_signature(genesis_block.data)}")
-             return False
-        if genesis_block.hash != genesis_block.calculate_hash():
-             print(f"Genesis block hash mismatch! Stored: {genesis_block.hash}, Recalculated: {genesis_block.calculate_hash()}")
-             return False
-
-
-        # Check the rest of the chain
-        for i in range(1, len(self.chain)):
+        if start == 0:
+            if genesis_block.index != 0 or genesis_block.previous_hash != "0":
+                 log.error("genesis block invalid (index or previous hash)")
+                 return False
+            if not genesis_block.is_data_valid():
+                 log.error("genesis block data tampering detected, signature mismatch", stored_signature=genesis_block.signature, calculated_signature=calculate_data_signature(genesis_block.data))
+                 return False
+            if genesis_block.hash != genesis_block.calculate_hash():
+                 log.error("genesis block hash mismatch", stored=genesis_block.hash, recalculated=genesis_block.calculate_hash())
+                 return False
+
+
+        # Check the rest of the chain (from `start`)
+        for i in range(max(1, start), len(self.chain)):
             current_block = self.chain[i]
             previous_block = self.chain[i-1]
 
             # 1. Check Data Integrity using the signature
             if not current_block.is_data_valid():
-                print(f"Data Tampering Detected: Block {current_block.index} data signature is invalid.")
-                print(f"  Block Data: {json.dumps(current_block.data, sort_keys=True, ensure_ascii=False)}")
-                print(f"  Stored Signature: {current_block.signature}")
-                print(f"  Calculated Signature: {calculate_data_signature(current_block.data)}")
+                log.error("data tampering detected: block data signature is invalid", block=current_block.index, stored_signature=current_block.signature, calculated_signature=calculate_data_signature(current_block.data))
                 return False
 
             # 2. Check Block Hash Integrity (Recalculate based on current content)
             #    This implicitly checks if the signature itself was tampered relative to the hash
             if current_block.hash != current_block.calculate_hash():
-                print(f"Block Hash Mismatch or Tampering: Block {current_block.index} hash is invalid.")
-                print(f"  Stored Hash: {current_block.hash}")
-                print(f"  Recalculated Hash: {current_block.calculate_hash()}")
+                log.error("block hash mismatch or tampering", block=current_block.index, stored=current_block.hash, recalculated=current_block.calculate_hash())
                 # Optionally print details used for recalc:
                 # print(f"  Data used for recalc: Index={current_block.index}, TS='{current_block.timestamp.isoformat()}', PrevHash='{current_block.previous_hash}', Sig='{current_block.signature}', Data='{json.dumps(current_block.data, sort_keys=True, ensure_ascii=False)}'")
                 return False
 
             # 3. Check Chain Link Integrity
             if current_block.previous_hash != previous_block.hash:
-                print(f"Chain Broken: Block {current_block.index} previous_hash ({current_block.previous_hash}) does not match Block {previous_block.index} hash ({previous_block.hash}).")
+                log.error("chain broken: previous_hash does not match", block=current_block.index, previous_hash=current_block.previous_hash, previous_block=previous_block.index, previous_block_hash=previous_block.hash)
                 return False
 
-        print("Blockchain integrity verified successfully (Data Signatures and Chain Links OK).")
+        log.debug("blockchain integrity verified (data signatures and chain links OK)")
         return True
 
     # --- File Operations ---
     def save_chain(self, filename=BLOCKCHAIN_FILE):
-        """Saves the entire blockchain (including signatures) to a JSON file."""
+        """Saves the blockchain (including signatures): appends the blocks added since the last load/save."""
         try:
-            # Use block.to_dict which now includes the signature
-            chain_data = [block.to_dict() for block in self.chain]
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(chain_data, f, indent=4, ensure_ascii=False)
-            print(f"Blockchain successfully saved to {filename}")
+            # Use block.to_dict which now includes the signature (one line per block)
+            if self.store is None or self.store.path != filename:
+                self.store = chain_log.ChainLog(filename)
+            self.store.save(self.chain)
+            log.debug("blockchain saved", file=filename, blocks=len(self.chain))
+        except chain_log.ChainNotLoaded:
+            log.error("blockchain file changed without being loaded, not saving over it", file=filename)
+            raise
         except IOError as e:
-            print(f"Error saving blockchain to {filename}: {e}")
+            log.error("error saving blockchain", file=filename, error=str(e))
         except Exception as e:
-            print(f"An unexpected error occurred during saving: {e}")
+            log.exception("unexpected error while saving blockchain", file=filename)
 
     @classmethod
     def load_chain(cls, filename=BLOCKCHAIN_FILE):
-        """Loads the blockchain (including signatures) from a JSON file."""
+        """
+        Loads the blockchain (including signatures) from its log file (migrating a legacy JSON file).
+
+        Raises:
+            Exception: The file exists but could not be read. It is re-raised rather than
+                       replaced by a new chain, whose first save would overwrite the file.
+        """
         new_blockchain = cls()
-        if not os.path.exists(filename):
-            print(f"Blockchain file '{filename}' not found. Starting a new chain with Genesis block.")
+        store = chain_log.ChainLog(filename)
+        if not os.path.exists(filename) and not os.path.exists(chain_log.legacy_path(filename) or filename):
+            log.info("blockchain file not found, starting a new chain with genesis block", file=filename)
+            new_blockchain.store = store
             new_blockchain._create_genesis_block()
             return new_blockchain
 
         try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                chain_data = json.load(f)
+            chain_data = store.load()
+            new_blockchain.store = store
 
             if not chain_data:
-                 print(f"Blockchain file '{filename}' is empty. Starting a new chain with Genesis block.")
+                 log.info("blockchain file is empty, starting a new chain with genesis block", file=filename)
                  new_blockchain._create_genesis_block()
                  return new_blockchain
 
             # Reconstruct the chain using Block.from_dict which handles signature loading
             new_blockchain.chain = [Block.from_dict(block_data) for block_data in chain_data]
-            print(f"Blockchain successfully loaded from {filename}. Contains {len(new_blockchain.chain)} blocks.")
+            log.info("blockchain loaded", file=filename, blocks=len(new_blockchain.chain))
 
             # IMPORTANT: Validate the loaded chain immediately to ensure integrity
-            if not new_blockchain.is_chain_valid():
-                 print("CRITICAL WARNING: Loaded blockchain failed integrity check! Data may be tampered or chain broken.")
+            if not new_blockchain.verify(): # 체크포인트 이후 추가된 블럭만 검증
+                 log.critical("loaded blockchain failed integrity check, data may be tampered or chain broken", file=filename)
                  # Decide policy: halt, warn, attempt repair? Warning is crucial here.
             else:
-                 print("Loaded blockchain passed initial integrity check.")
+                 log.debug("loaded blockchain passed initial integrity check", file=filename)
 
             return new_blockchain
 
-        except json.JSONDecodeError as e:
-            print(f"Error decoding JSON from {filename}: {e}. Starting a new chain.")
-            new_blockchain._create_genesis_block()
-            return new_blockchain
-        except KeyError as e:
-             print(f"Error loading block data: Missing expected key '{e}'. File might be corrupted or from an older format.")
-             print("Starting a new chain.")
-             new_blockchain = cls() # Start fresh
-             new_blockchain._create_genesis_block()
-             return new_blockchain
-        except IOError as e:
-            print(f"Error reading blockchain file {filename}: {e}. Starting a new chain.")
-            new_blockchain._create_genesis_block()
-            return new_blockchain
-        except Exception as e:
-            print(f"An unexpected error occurred during loading: {e}. Starting a new chain.")
-            new_blockchain._create_genesis_block()
-            return new_blockchain
+        except Exception:
+            # 읽지 못한 파일 대신 새 체인을 돌려주면 다음 저장이 기존 기록을 덮어씀
+            log.exception("could not load blockchain file", file=filename)
+            raise
 
 # --- User Functions (Unchanged, but benefits from signature validation) ---
 
 def input_medical_record(blockchain_instance, record_data):
-    print(f"\nAttempting to add record for: {record_data.get('patient_name', 'N/A')}")
+    log.info("adding medical record", patient=record_data.get('patient_name', 'N/A'))
     success = blockchain_instance.add_block(record_data)
     if success:
-        print("Record added successfully.")
+        log.info("record added")
     else:
-        print("Failed to add record.")
+        log.error("failed to add record")
 
 def view_all_previous_records(blockchain_instance):
     blockchain_instance.view_previous_records()
@@ -367,11 +362,12 @@ def view_last_n_records(blockchain_instance, n):
     if isinstance(n, int) and n > 0:
         return blockchain_instance.view_previous_records(count=n)
     else:
-        print("Please provide a positive integer for the number of records to view.")
+        log.warning("number of records to view must be a positive integer", n=n)
 
 
 # --- Updated Example Usage ---
 if __name__ == "__main__":
+    app_logging.setup()
 
     # 1. Load existing blockchain or create a new one
     print(f"--- Loading Blockchain from {BLOCKCHAIN_FILE} ---")
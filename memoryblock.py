@@ -4,8 +4,13 @@ import json
 import os
 import asyncio
 
+import app_logging
+import chain_log
+
+log = app_logging.get_logger("memoryblock")
+
 # --- Constants ---
-AGENT_MEMORY_BLOCKCHAIN_FILE = "agent_memory_blockchain.json"
+AGENT_MEMORY_BLOCKCHAIN_FILE = "agent_memory_blockchain.jsonl" # 블럭당 한 줄 (기존 .json 파일은 처음 로드할 때 변환)
 AGENT_ID_FIELD = "agent_id"
 MEMORY_PAYLOAD_FIELD = "memory_payload"
 
@@ -26,14 +31,14 @@ class Block:
                     timestamp = timestamp[:-1] + '+00:00'
                 self.timestamp = datetime.datetime.fromisoformat(timestamp)
             except ValueError:
-                print(f"Warning: Could not parse timestamp string '{timestamp}'. Using current UTC time.")
+                log.warning("could not parse timestamp string, using current UTC time", timestamp=timestamp)
                 self.timestamp = datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0)
         elif isinstance(timestamp, datetime.datetime):
             if timestamp.tzinfo is None: # Make naive timezone aware (assume UTC)
                  timestamp = timestamp.replace(tzinfo=datetime.timezone.utc)
             self.timestamp = timestamp.replace(microsecond=0) # Remove microseconds for consistency
         else:
-            print(f"Warning: Invalid timestamp type ({type(timestamp)}). Using current UTC time.")
+            log.warning("invalid timestamp type, using current UTC time", type=type(timestamp).__name__)
             self.timestamp = datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0)
 
         self.data = data # Agent memory state dictionary
@@ -70,7 +75,7 @@ class Block:
         signature = block_dict.get('signature')
         if signature is None:
              # This should ideally not happen if saved correctly, but handle it
-             print(f"Warning: Block {block_dict.get('index', 'N/A')} loaded without a signature. Calculating now.")
+             log.warning("block loaded without a signature, calculating now", block=block_dict.get('index', 'N/A'))
              signature = calculate_data_signature(block_dict['data'])
 
         return cls(
@@ -94,11 +99,20 @@ class Block:
                 f"------------------\n")
 
 # --- Agent Memory Blockchain Class ---
-class AgentMemoryBlockchain:
+class AgentMemoryBlockchain(chain_log.ChainStoreMixin):
+    block_cls = Block
+
     def __init__(self):
         self.chain = []
         # Required fields for a memory record
         self.required_memory_fields = [AGENT_ID_FIELD, MEMORY_PAYLOAD_FIELD]
+        self.store = None # chain_log.ChainLog of the file this chain was loaded from / saved to
+        self._merkle = None # merkle.MerkleTree, built on first use
+        # agent_id -> positions of its memory blocks in self.chain (oldest first)
+        self._agent_blocks = {}
+        self._indexed = 0 # blocks covered by _agent_blocks
+        self._indexed_head = None # the last of them (detects a block list changed in place)
+        self._indexed_list = None # the list they were read from (detects a replaced self.chain)
 
     def _create_genesis_block(self):
         """Creates the first block (Genesis Block)."""
@@ -113,7 +127,7 @@ class AgentMemoryBlockchain:
                 previous_hash="0"
             )
             self.chain.append(genesis_block)
-            print("Genesis block created for Agent Memory Blockchain.")
+            log.info("genesis block created for agent memory blockchain")
 
     def get_latest_block(self):
         """Returns the most recent block in the chain."""
@@ -121,14 +135,34 @@ class AgentMemoryBlockchain:
             return None
         return self.chain[-1]
 
+    def _sync_agent_index(self):
+        """Indexes the blocks added since the last call; rebuilds the index if the block list was replaced."""
+        n = self._indexed
+        if n > len(self.chain) or self.chain is not self._indexed_list or (n and self.chain[n - 1] is not self._indexed_head):
+            self._agent_blocks = {}
+            n = 0
+        for position in range(max(1, n), len(self.chain)): # genesis 제외
+            data = self.chain[position].data
+            if isinstance(data, dict) and AGENT_ID_FIELD in data:
+                try:
+                    self._agent_blocks.setdefault(data[AGENT_ID_FIELD], []).append(position)
+                except TypeError:
+                    pass # list/dict agent_id: 인덱스 대신 recall_latest_memory 의 전체 탐색으로 찾음
+        self._indexed = len(self.chain)
+        self._indexed_head = self.chain[-1] if self.chain else None
+        self._indexed_list = self.chain
+
+    def _blocks_appended(self):
+        self._sync_agent_index() # load_appended(): blocks recorded by other workers
+
     def _validate_memory_data(self, memory_data):
         """Checks if the input memory data dictionary is valid."""
         if not isinstance(memory_data, dict):
-            print("Error: Input memory data must be a dictionary.")
+            log.error("input memory data must be a dictionary")
             return False
         missing_required = [field for field in self.required_memory_fields if field not in memory_data]
         if missing_required:
-            print(f"Error: Missing required memory fields: {', '.join(missing_required)}")
+            log.error("missing required memory fields", fields=missing_required)
             return False
         # Optional: Add type checks for payload if needed (e.g., must be dict/list)
         # if not isinstance(memory_data.get(MEMORY_PAYLOAD_FIELD), (dict, list)):
@@ -163,7 +197,7 @@ class AgentMemoryBlockchain:
         memory_data = {k: v for k, v in memory_data.items() if v is not None}
 
         if not self._validate_memory_data(memory_data):
-            print("Failed to record memory due to invalid data.")
+            log.error("failed to record memory due to invalid data", agent=agent_id)
             return False
 
         if not self.chain:
@@ -171,7 +205,7 @@ class AgentMemoryBlockchain:
 
         previous_block = self.get_latest_block()
         if previous_block is None:
-            print("Error: Cannot record memory, chain is unexpectedly empty after genesis check.")
+            log.error("cannot record memory, chain is unexpectedly empty after genesis check")
             return False
 
         new_index = previous_block.index + 1
@@ -187,7 +221,8 @@ class AgentMemoryBlockchain:
             previous_hash=previous_block.hash
         )
         self.chain.append(new_block)
-        print(f"Successfully recorded memory for Agent '{agent_id}' in Block {new_index}.")
+        self._sync_agent_index()
+        log.info("recorded memory", agent=agent_id, block=new_index)
         return True
 
     def recall_latest_memory(self, agent_id, num_to_recall=1): # num_to_recall 파라미터 추가 (기본값 1)
@@ -205,28 +240,34 @@ class AgentMemoryBlockchain:
                     Returns an empty list if no valid memories are found or if num_to_recall <= 0.
             """
             if not self.chain or len(self.chain) <= 1:
-                print(f"No memory records found for Agent '{agent_id}' (chain empty or only Genesis).")
+                log.debug("no memory records found (chain empty or only genesis)", agent=agent_id)
                 return [] # 빈 리스트 반환
 
             # num_to_recall 유효성 검사
             if not isinstance(num_to_recall, int) or num_to_recall <= 0:
-                print(f"Warning: Invalid value for num_to_recall ({num_to_recall}). Must be a positive integer. Returning empty list.")
+                log.warning("invalid num_to_recall, returning empty list", num_to_recall=num_to_recall)
                 return []
 
             recalled_payloads = [] # 결과를 저장할 리스트
-            print(f"Searching for latest {num_to_recall} valid memory entries for Agent '{agent_id}'...") # 출력 메시지 수정
+            log.debug("searching latest valid memory entries", agent=agent_id, num_to_recall=num_to_recall)
 
-            # Iterate backwards from the newest block (excluding Genesis)
-            for block in reversed(self.chain[1:]):
+            # Iterate backwards over this agent's blocks only (per-agent index, no copy of the chain)
+            self._sync_agent_index()
+            try:
+                positions = self._agent_blocks.get(agent_id, ())
+            except TypeError: # unhashable agent_id (not indexed): scan the whole chain
+                positions = range(len(self.chain))
+            for position in reversed(positions):
                 # 이미 원하는 개수를 찾았다면 루프 종료
                 if len(recalled_payloads) >= num_to_recall:
                     break
 
+                block = self.chain[position]
                 if isinstance(block.data, dict) and block.data.get(AGENT_ID_FIELD) == agent_id:
                     # print(f"Found potential record in Block {block.index} for Agent '{agent_id}'. Verifying...") # 상세 검증 로그는 필요시 활성화
                     # 1. Verify data integrity using the signature stored within the block
                     if not block.is_data_valid():
-                        print(f"Warning: Data tampering detected in Block {block.index} for Agent '{agent_id}'. Skipping.")
+                        log.warning("data tampering detected, skipping block", block=block.index, agent=agent_id)
                         continue # Skip this block, look for the next older one
 
                     # 2. Block hash integrity check (optional, usually done by is_chain_valid)
@@ -242,129 +283,138 @@ class AgentMemoryBlockchain:
 
             # 최종 결과 출력 및 반환
             if not recalled_payloads:
-                print(f"No valid memory records found for Agent '{agent_id}' after checking the chain.")
+                log.debug("no valid memory records found", agent=agent_id)
             else:
-                print(f"Found {len(recalled_payloads)} valid memory payloads (up to {num_to_recall} requested).")
+                log.debug("recalled memory payloads", agent=agent_id, found=len(recalled_payloads), requested=num_to_recall)
 
             return recalled_payloads # 찾은 페이로드 리스트 반환 (최신 순서)
 
-    def is_chain_valid(self):
-        """Validates the entire blockchain integrity (Unchanged logic, crucial for trust)."""
+    def is_chain_valid(self, start=0):
+        """
+        Validates the blockchain integrity (crucial for trust).
+
+        Args:
+            start (int): First block to check (0: the entire chain); block `start`
+                         is still checked against the hash of block `start - 1`.
+        """
         if not self.chain:
-            print("Blockchain is empty, cannot validate.")
+            log.warning("blockchain is empty, cannot validate")
             return True # An empty chain is trivially valid
 
         # Check Genesis block separately
         genesis_block = self.chain[0]
-        if genesis_block.index != 0 or genesis_block.previous_hash != "0":
-             print("Genesis block invalid (Index or Previous Hash).")
-             return False
-        if not genesis_block.is_data_valid(): # Check data signature
-             print(f"Genesis block data tampering detected! Signature mismatch.")
-             return False
-        if genesis_block.hash != genesis_block.calculate_hash(): # Check block hash
-             print(f"Genesis block hash mismatch!")
-             return False
-
-        # Check the rest of the chain
-        for i in range(1, len(self.chain)):
+        if start == 0:
+            if genesis_block.index != 0 or genesis_block.previous_hash != "0":
+                 log.error("genesis block invalid (index or previous hash)")
+                 return False
+            if not genesis_block.is_data_valid(): # Check data signature
+                 log.error("genesis block data tampering detected, signature mismatch")
+                 return False
+            if genesis_block.hash != genesis_block.calculate_hash(): # Check block hash
+                 log.error("genesis block hash mismatch")
+                 return False
+
+        # Check the rest of the chain (from `start`)
+        for i in range(max(1, start), len(self.chain)):
             current_block = self.chain[i]
             previous_block = self.chain[i-1]
 
             # 1. Check Data Integrity using the signature
             if not current_block.is_data_valid():
-                print(f"Data Tampering Detected: Block {current_block.index} data signature is invalid.")
+                log.error("data tampering detected: block data signature is invalid", block=current_block.index)
                 return False
 
             # 2. Check Block Hash Integrity
             if current_block.hash != current_block.calculate_hash():
-                print(f"Block Hash Mismatch or Tampering: Block {current_block.index} hash is invalid.")
+                log.error("block hash mismatch or tampering", block=current_block.index)
                 return False
 
             # 3. Check Chain Link Integrity
             if current_block.previous_hash != previous_block.hash:
-                print(f"Chain Broken: Block {current_block.index} previous_hash does not match Block {previous_block.index} hash.")
+                log.error("chain broken: previous_hash does not match", block=current_block.index, previous=previous_block.index)
                 return False
 
-        print("Agent Memory Blockchain integrity verified successfully.")
+        log.debug("agent memory blockchain integrity verified")
         return True
 
     # --- File Operations (Adapted for Agent Memory) ---
     def save_chain(self, filename=AGENT_MEMORY_BLOCKCHAIN_FILE):
-        """Saves the agent memory blockchain to a JSON file."""
+        """Saves the agent memory blockchain (appends the blocks added since the last load/save)."""
         try:
-            chain_data = [block.to_dict() for block in self.chain]
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(chain_data, f, indent=4, ensure_ascii=False)
-            print(f"Agent Memory Blockchain successfully saved to {filename}")
+            if self.store is None or self.store.path != filename:
+                self.store = chain_log.ChainLog(filename)
+            self.store.save(self.chain)
+            log.debug("agent memory blockchain saved", file=filename, blocks=len(self.chain))
+        except chain_log.ChainNotLoaded:
+            log.error("blockchain file changed without being loaded, not saving over it", file=filename)
+            raise
         except IOError as e:
-            print(f"Error saving blockchain to {filename}: {e}")
+            log.error("error saving blockchain", file=filename, error=str(e))
         except Exception as e:
-            print(f"An unexpected error occurred during saving: {e}")
+            log.exception("unexpected error while saving blockchain", file=filename)
 
     @classmethod
     def load_chain(cls, filename=AGENT_MEMORY_BLOCKCHAIN_FILE):
-        """Loads the agent memory blockchain from a JSON file."""
+        """
+        Loads the agent memory blockchain from its log file (migrating a legacy JSON file).
+
+        Raises:
+            Exception: The file exists but could not be read. It is re-raised rather than
+                       replaced by a new chain, whose first save would overwrite the file.
+        """
         new_blockchain = cls() # Create an instance of AgentMemoryBlockchain
-        if not os.path.exists(filename):
-            print(f"Blockchain file '{filename}' not found. Creating a new chain with Genesis block.")
+        store = chain_log.ChainLog(filename)
+        if not os.path.exists(filename) and not os.path.exists(chain_log.legacy_path(filename) or filename):
+            log.info("blockchain file not found, creating a new chain with genesis block", file=filename)
+            new_blockchain.store = store
             new_blockchain._create_genesis_block() # Initialize with Genesis
             return new_blockchain
 
         try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                chain_data = json.load(f)
+            chain_data = store.load()
+            new_blockchain.store = store
 
             if not chain_data:
-                 print(f"Blockchain file '{filename}' is empty. Creating a new chain with Genesis block.")
+                 log.info("blockchain file is empty, creating a new chain with genesis block", file=filename)
                  new_blockchain._create_genesis_block()
                  return new_blockchain
 
             # Reconstruct the chain using Block.from_dict
             new_blockchain.chain = [Block.from_dict(block_data) for block_data in chain_data]
-            print(f"Agent Memory Blockchain loaded from {filename}. Contains {len(new_blockchain.chain)} blocks.")
+            new_blockchain._sync_agent_index()
+            log.info("agent memory blockchain loaded", file=filename, blocks=len(new_blockchain.chain))
 
             # Immediately validate the loaded chain
-            if not new_blockchain.is_chain_valid():
-                 print("CRITICAL WARNING: Loaded agent memory blockchain failed integrity check!")
+            if not new_blockchain.verify(): # 체크포인트 이후 추가된 블럭만 검증
+                 log.critical("loaded agent memory blockchain failed integrity check", file=filename)
             else:
-                 print("Loaded agent memory blockchain passed initial integrity check.")
+                 log.debug("loaded agent memory blockchain passed integrity check", file=filename)
 
             return new_blockchain
 
-        except json.JSONDecodeError as e:
-            print(f"Error decoding JSON from {filename}: {e}. Starting a new chain.")
-            new_blockchain._create_genesis_block()
-            return new_blockchain
-        except KeyError as e:
-             print(f"Error loading block data: Missing expected key '{e}'. File might be corrupted.")
-             print("Starting a new chain.")
-             new_blockchain = cls()
-             new_blockchain._create_genesis_block()
-             return new_blockchain
-        except Exception as e:
-            print(f"An unexpected error occurred during loading: {e}. Starting a new chain.")
-            new_blockchain._create_genesis_block()
-            return new_blockchain
+        except Exception:
+            # 읽지 못한 파일 대신 새 체인을 돌려주면 다음 저장이 기존 기록을 덮어씀
+            log.exception("could not load blockchain file", file=filename)
+            raise
 
     def view_chain_history(self, agent_id=None):
         """Prints the history, optionally filtered by agent_id."""
         if not self.chain:
-            print("The agent memory blockchain is empty.")
+            log.info("the agent memory blockchain is empty")
             return
 
-        print(f"\n--- Agent Memory Blockchain History (Agent: {agent_id if agent_id else 'All'}) ---")
+        log.info("agent memory blockchain history", agent=agent_id if agent_id else "all")
         filtered_blocks = 0
         total_blocks = 0
         for block in self.chain:
              total_blocks += 1
              if agent_id is None or (isinstance(block.data, dict) and block.data.get(AGENT_ID_FIELD) == agent_id) or block.index == 0: # Show Genesis too
-                 print(block)
+                 log.info(str(block))
                  filtered_blocks +=1
 
         if agent_id and filtered_blocks <= 1 : # Only Genesis found
-             print(f"No specific memory records found for Agent ID: {agent_id}")
-        print(f"--- End of History (Showing {filtered_blocks}/{total_blocks} Blocks) ---\n")
+             log.info("no memory records found", agent=agent_id)
+        log.info("end of history", shown=filtered_blocks, total=total_blocks)
 
 # async def record_agent_memory(args):
 #     # function calling 호출용
@@ -454,7 +504,7 @@ async def main():
 
 # --- Example Agent Simulation ---
 if __name__ == "__main__":
-
+    app_logging.setup()
     asyncio.run(main())
      # # 1. Load or create the blockchain
     # print(f"--- Loading Agent Memory Blockchain ({AGENT_MEMORY_BLOCKCHAIN_FILE}) ---")
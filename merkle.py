@@ -0,0 +1,167 @@
+"""
+Merkle tree over chain block hashes (RFC 6962 / 9162 hashing).
+
+Proves that one block belongs to a chain whose root is known, with about log2(n)
+hashes instead of re-validating every block:
+
+    python merkle.py my_medical_records_signed.jsonl 3
+
+Leaves are the blocks' stored `hash` fields, taken as they are: a proof covers
+that hash, not the block contents it was computed from (chain verification checks
+those). The chains save their root next to the log file at each verification
+checkpoint (`<file>.root`), and verify() compares it.
+"""
+import hashlib
+import json
+import sys
+
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+
+def leaf_hash(block_hash):
+    return hashlib.sha256(LEAF_PREFIX + block_hash.encode("ascii")).digest()
+
+def node_hash(left, right):
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+def _split(n):
+    """Largest power of two smaller than n (n > 1)."""
+    k = 1
+    while k * 2 < n:
+        k *= 2
+    return k
+
+
+class MerkleTree:
+    """
+    Append-only Merkle tree of block hashes.
+
+    `levels[h][i]` is the root of the complete subtree of 2**h leaves starting at
+    leaf i * 2**h, so appending a leaf hashes at most log2(n) new nodes and any
+    proof is assembled from stored subtrees plus the right edge of the tree.
+    """
+
+    def __init__(self):
+        self.levels = [[]]
+        self.block_hashes = [] # leaf i = block i
+
+    def __len__(self):
+        return len(self.block_hashes)
+
+    def append(self, block_hash):
+        self.block_hashes.append(block_hash)
+        node = leaf_hash(block_hash)
+        self.levels[0].append(node)
+        height = 0
+        while len(self.levels[height]) % 2 == 0:
+            node = node_hash(self.levels[height][-2], node)
+            height += 1
+            if height == len(self.levels):
+                self.levels.append([])
+            self.levels[height].append(node)
+
+    def sync(self, blocks):
+        """
+        Brings the tree up to date with a block list (objects with a `.hash`).
+
+        Only blocks appended since the last sync are hashed; if the list no longer
+        extends the tree (chain replaced or shortened) the tree is rebuilt.
+        """
+        n = len(self.block_hashes)
+        if n > len(blocks) or (n and blocks[n - 1].hash != self.block_hashes[-1]):
+            self.__init__()
+            n = 0
+        for block in blocks[n:]:
+            self.append(block.hash)
+        return self
+
+    def _subtree(self, start, end):
+        """Root of leaves [start, end); start is aligned to a power of two >= end - start."""
+        size = end - start
+        height = size.bit_length() - 1
+        if size == 1 << height:
+            return self.levels[height][start >> height]
+        k = _split(size)
+        return node_hash(self._subtree(start, start + k), self._subtree(start + k, end))
+
+    def root(self, size=None):
+        """Hex root of the first `size` leaves (default: all)."""
+        size = len(self) if size is None else size
+        if not 0 < size <= len(self):
+            raise ValueError(f"tree has {len(self)} leaves, cannot compute root of {size}")
+        return self._subtree(0, size).hex()
+
+    def _path(self, index, start, end):
+        if end - start == 1:
+            return []
+        k = _split(end - start)
+        if index < start + k:
+            return self._path(index, start, start + k) + [self._subtree(start + k, end)]
+        return self._path(index, start + k, end) + [self._subtree(start, start + k)]
+
+    def inclusion_proof(self, index, size=None):
+        """
+        Proof that leaf `index` is in the tree of the first `size` leaves.
+
+        Returns:
+            dict: {"index", "size", "block_hash", "path": [hex, ...], "root"}; check it
+                  with verify_inclusion().
+        """
+        size = len(self) if size is None else size
+        if not 0 <= index < size <= len(self):
+            raise IndexError(f"no block {index} in a tree of {size} leaves")
+        return {
+            "index": index,
+            "size": size,
+            "block_hash": self.block_hashes[index],
+            "path": [node.hex() for node in self._path(index, 0, size)],
+            "root": self.root(size),
+        }
+
+
+def verify_inclusion(block_hash, index, size, path, root):
+    """
+    Checks an inclusion proof without the tree (RFC 9162, section 2.1.3.2).
+
+    Args:
+        block_hash (str): Hash of the block to prove (as stored in the chain).
+        index (int): Block position.
+        size (int): Number of leaves the root covers.
+        path (list): Hex sibling hashes from inclusion_proof().
+        root (str): Trusted hex root (e.g. from a saved checkpoint).
+    """
+    if not 0 <= index < size:
+        return False
+    fn, sn = index, size - 1
+    node = leaf_hash(block_hash)
+    for sibling in path:
+        if sn == 0:
+            return False
+        sibling = bytes.fromhex(sibling)
+        if fn & 1 or fn == sn:
+            node = node_hash(sibling, node)
+            while not fn & 1 and fn != 0:
+                fn >>= 1
+                sn >>= 1
+        else:
+            node = node_hash(node, sibling)
+        fn >>= 1
+        sn >>= 1
+    return sn == 0 and node.hex() == root
+
+
+if __name__ == "__main__":
+    import chain_log
+
+    if len(sys.argv) != 3:
+        raise SystemExit("usage: python merkle.py <chain.jsonl> <block index>")
+    tree = MerkleTree()
+    for block_data in chain_log.ChainLog(sys.argv[1]).load():
+        tree.append(block_data["hash"])
+    proof = tree.inclusion_proof(int(sys.argv[2]))
+    print(json.dumps(proof, indent=2))
+    print("verified:", verify_inclusion(proof["block_hash"], proof["index"], proof["size"], proof["path"], proof["root"]))
+    saved = chain_log.ChainLog(sys.argv[1]).saved_root()
+    if saved is not None and saved[0] <= len(tree):
+        print(f"saved root of {saved[0]} blocks matches:", tree.root(saved[0]) == saved[1])
@@ -3,14 +3,16 @@ import os
 import json
 import platform
 import subprocess # Added for more control over player execution if needed
-import logging # Added for better logging
+
+import app_logging
 
 # --- Configuration ---
 MP3_BASE_DIR = "D:\\SD\\MP3" # Target directory (Use double backslashes or raw strings)
 MUSIC_EXTENTIONS = [".mp3", ".m4a", ".wma"] # Supported music file extensions
 
 # --- Logging Setup ---
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# (출력 설정은 app_logging.setup() 에서: 큐 + 백그라운드 스레드)
+log = app_logging.get_logger("music")
 
 # --- Helper Function for Running Blocking Code Async ---
 async def run_blocking(func, *args):
@@ -47,12 +49,12 @@ async def list_music_files(args) -> dict:
             - message: A descriptive message about the outcome.
   """
   directory_path = MP3_BASE_DIR
-  logging.info(f"Attempting to list Music files in: {directory_path}")
+  log.debug("listing music files", directory=directory_path)
 
   def find_files():
     """Blocking function to find Music files."""
     if not os.path.isdir(directory_path):
-      logging.warning(f"Directory not found: {directory_path}")
+      log.warning("directory not found", directory=directory_path)
       return None # Indicate directory not found
 
     mp3_files = []
@@ -66,7 +68,7 @@ async def list_music_files(args) -> dict:
               mp3_files.append(full_path)
       return mp3_files
     except OSError as e:
-      logging.error(f"OS Error while searching directory {directory_path}: {e}")
+      log.error("OS error while searching directory", directory=directory_path, error=str(e))
       raise # Re-raise to be caught by the outer handler
 
   try:
@@ -89,7 +91,7 @@ async def list_music_files(args) -> dict:
           "message": f"No Music files found in '{directory_path}' or its subdirectories."
       }
     else: # Files found
-      logging.info(f"Found {len(found_files)} Music files in {directory_path}.")
+      log.info("found music files", directory=directory_path, count=len(found_files))
       return {
           "status": "success",
           "directory": directory_path,
@@ -106,7 +108,7 @@ async def list_music_files(args) -> dict:
         "message": f"An OS error occurred while accessing '{directory_path}': {e}"
     }
   except Exception as e: # Catch any other unexpected errors
-    logging.exception(f"Unexpected error in list_mp3_files for {directory_path}: {e}")
+    log.exception("unexpected error in list_music_files", directory=directory_path)
     return {
         "status": "error",
         "directory": directory_path,
@@ -115,6 +117,13 @@ async def list_music_files(args) -> dict:
         "message": f"An unexpected error occurred: {e}"
     }
 
+def library_version():
+  """Modification time of the music folder (changes when top-level entries are added or removed)."""
+  try:
+    return os.stat(MP3_BASE_DIR).st_mtime_ns
+  except OSError:
+    return None
+
 # --- Function 2: Play MP3 File ---
 
 async def play_music_file(args) -> dict:
@@ -135,10 +144,10 @@ async def play_music_file(args) -> dict:
             - message: A descriptive message.
   """
   file_path = MP3_BASE_DIR + args.get("file_path", None)
-  logging.info(f"Attempting to play MP3 file: {file_path}")
+  log.info("playing music file", file=file_path)
 
   if platform.system() != "Windows":
-    logging.warning("Attempted to play file on a non-Windows OS.")
+    log.warning("attempted to play file on a non-Windows OS")
     return {
         "status": "unsupported_os",
         "file_path": file_path,
@@ -148,7 +157,7 @@ async def play_music_file(args) -> dict:
   def start_file():
     """Blocking function to start the file."""
     if not os.path.exists(file_path):
-      logging.warning(f"File not found: {file_path}")
+      log.warning("file not found", file=file_path)
       return False # Indicate file not found
 
     # if not file_path.lower().endswith(".mp3"):
@@ -162,13 +171,13 @@ async def play_music_file(args) -> dict:
       # but we run it via run_blocking for consistency and potential
       # slight delays in OS interaction.
       os.startfile(file_path)
-      logging.info(f"Issued command to play: {file_path}")
+      log.info("issued command to play", file=file_path)
       return True # Command issued successfully
     except OSError as e:
-      logging.error(f"OS Error trying to start file {file_path}: {e}")
+      log.error("OS error trying to start file", file=file_path, error=str(e))
       raise # Re-raise to be caught by the outer handler
     except Exception as e: # Catch other potential errors like file association issues
-       logging.error(f"Failed to start file {file_path}: {e}")
+       log.error("failed to start file", file=file_path, error=str(e))
        raise # Re-raise
 
   try:
@@ -276,4 +285,5 @@ if __name__ == "__main__":
   #   # Decide if you want to exit or just show the JSON definitions
   #   # exit()
 
+  app_logging.setup()
   asyncio.run(main())
\ No newline at end of file
@@ -1,18 +1,42 @@
 import asyncio
 
+import app_logging
 import mediblock as mb
 # import timer
 import music_play
 import memoryblock
+import chain_sync
 # import agent_memory
 #chromadb 변경검토
 
+log = app_logging.get_logger("tools")
+
 #이전 메모리 블럭체인 정보 가져오기
-memory_chain = memoryblock.AgentMemoryBlockchain.load_chain()
+# (여러 워커 프로세스가 같은 파일을 공유: 파일 잠금 후 최신 내용 반영, 기록 즉시 저장)
+shared_memory_chain = chain_sync.SharedChain(memoryblock.AgentMemoryBlockchain, memoryblock.AGENT_MEMORY_BLOCKCHAIN_FILE)
+memory_chain = shared_memory_chain.chain
 agent_id = "Dr.Jenny"
 
 #이전 메디컬 블럭체인 정보 보기
-my_medical_chain = mb.MedicalBlockchain.load_chain()
+shared_medical_chain = chain_sync.SharedChain(mb.MedicalBlockchain, mb.BLOCKCHAIN_FILE)
+my_medical_chain = shared_medical_chain.chain
+
+def preload_chains():
+    """두 blockchain 파일을 미리 로드 (import 시에는 읽지 않음, 서버 기동 후 백그라운드에서 호출)"""
+    shared_memory_chain.load()
+    shared_medical_chain.load()
+
+def verify_chains(full=False):
+    """
+    두 blockchain 무결성 검증 결과 {"memory": bool, "medical": bool}
+
+    Args:
+        full (bool): False: 검증 체크포인트 이후 추가된 블럭만, True: 전체 블럭 재검증
+    """
+    return {
+        "memory": shared_memory_chain.read(lambda chain: chain.verify(full)),
+        "medical": shared_medical_chain.read(lambda chain: chain.verify(full)),
+    }
 
 #blockchain 에 signature 로 데이터 위변조를 막도록 데이터에 대한 해쉬코드가 들어가는 것 고려
 
@@ -107,7 +131,7 @@ function_declarations = [record_agent_memory, recall_agent_memory, summarize_men
 async def fn_summarize_mental_care_session(msg):
     try:
         #print("msg:", msg)
-        mb.input_medical_record(my_medical_chain, msg)
+        await asyncio.to_thread(shared_medical_chain.update, lambda chain: mb.input_medical_record(chain, msg))
 
         # save 시 전체 종료? 왜?, (수정이 어려율시 마지막 저장 처리로 변경가능)
         # --- Save the updated blockchain ---
@@ -120,25 +144,22 @@ async def fn_summarize_mental_care_session(msg):
 
         #print("fn_summarize_mental_care_session: OK")
         return "ok"
-    except Exception as e:
-        print(f"Error in fn_summarize_mental_care_session: {e}")
+    except Exception:
+        log.exception("summarize_mental_care_session failed")
         return "error"        
 
 async def fn_retrieve_recent_mental_care_sessions(args):
     try:
-        print("args:", args)
-
-        rtn = mb.view_last_n_records(my_medical_chain, args['count'])
+        rtn = await asyncio.to_thread(shared_medical_chain.read, lambda chain: mb.view_last_n_records(chain, args['count']))
         # print("rtn:", rtn)
 
         return rtn
-    except Exception as e:
-        print(f"Error in fn_retrieve_recent_mental_care_sessions: {e}")
+    except Exception:
+        log.exception("retrieve_recent_mental_care_sessions failed")
         return "error"        
     
 async def fn_record_agent_memory(args):
     # function calling 호출용
-    print("[DEBUG] init. memory_chain", memory_chain)
     # print("[DEBUG] init. agent_memory")
     # print(type(args), args)
     args = dict(args)
@@ -149,14 +170,15 @@ async def fn_record_agent_memory(args):
     current_goal = args.get("current_goal")
     session_id = args.get("session_id")
 
-    memory_chain.record_memory(
+    memory_payload = args["memory_payload"] # 키가 없으면 KeyError 발생 (원래 코드와 동일)
+    await asyncio.to_thread(shared_memory_chain.update, lambda chain: chain.record_memory(
     # result = await agent_memory.record_agent_memory(
         agent_id="Dr.Jenny",
-        memory_payload=args["memory_payload"], # 키가 없으면 KeyError 발생 (원래 코드와 동일)
+        memory_payload=memory_payload,
         context_summary=context_summary,
         current_goal=current_goal,
         session_id=session_id
-    )
+    ))
 
     return "ok"
 
@@ -175,7 +197,7 @@ async def fn_recall_agent_memory(args):
     #     return result
     # else:
     #     return "error"
-    return memory_chain.recall_latest_memory(agent_id, num_to_recall=5)
+    return await asyncio.to_thread(shared_memory_chain.read, lambda chain: chain.recall_latest_memory(agent_id, num_to_recall=5))
 
 available_functions = {
     "summarize_mental_care_session": fn_summarize_mental_care_session,
@@ -187,6 +209,23 @@ available_functions = {
     "recall_agent_memory": fn_recall_agent_memory,
 }
 
+# 결과 캐시 정책 (tool_cache.ToolCache): 같은 인자의 조회 결과는 재사용, 기록 시 관련 항목 무효화
+# music 은 하위 폴더 변경을 감지하지 못하므로 TTL 을 짧게 유지
+tool_cache_policies = {
+    "list_music_files": {"ttl_s": 300, "tags": ["music"]},
+    "retrieve_recent_mental_care_sessions": {"ttl_s": 3600, "tags": ["medical"]},
+    "recall_agent_memory": {"ttl_s": 3600, "tags": ["memory"]},
+    "summarize_mental_care_session": {"invalidates": ["medical"]},
+    "record_agent_memory": {"invalidates": ["memory"]},
+}
+
+# 다른 워커 프로세스의 기록도 감지하도록 파일 버전을 함께 비교
+tool_cache_versions = {
+    "music": music_play.library_version,
+    "medical": shared_medical_chain.version,
+    "memory": shared_memory_chain.version,
+}
+
 async def main():
     print(available_functions)
 
@@ -0,0 +1,218 @@
+import asyncio
+import base64
+import json
+from collections import deque
+
+import audio_protocol as ap
+
+# --- Backpressure policies (what to do when the client can't keep up) ---
+BLOCK = "block"             # producer waits for space (slows the Live receive loop)
+DROP_OLDEST = "drop_oldest" # discard the oldest queued item of the same class
+DISCONNECT = "disconnect"   # close the websocket
+
+POLICIES = (BLOCK, DROP_OLDEST, DISCONNECT)
+
+
+class ClientTooSlow(Exception):
+    """Raised to the producer when the DISCONNECT policy closes the connection."""
+
+
+class ClientSender:
+    """
+    Per-connection outbound sender.
+
+    All messages to the client go through two bounded queues drained by one task:
+    audio first, then text/status messages. Small model audio parts are merged into
+    frames of about `target_audio_bytes`; a partial frame is sent after `linger_ms`
+    or when flush_audio() is called at the end of a turn.
+    """
+
+    def __init__(self, websocket, policy=BLOCK, max_audio_frames=50, max_messages=100,
+                 target_audio_bytes=24000 * 2 // 10, linger_ms=40):
+        """
+        Args:
+            websocket: Client connection (anything with `async send()` / `async close()`).
+            policy (str): BLOCK, DROP_OLDEST or DISCONNECT.
+            max_audio_frames (int): Audio queue bound (frames, after coalescing).
+            max_messages (int): Text/status queue bound.
+            target_audio_bytes (int): Coalesced frame size (default 100 ms of 24 kHz PCM).
+            linger_ms (int): Max time a partial audio frame waits for more parts.
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown outbound policy: {policy}")
+        self._ws = websocket
+        self.policy = policy
+        self.max_audio_frames = max_audio_frames
+        self.max_messages = max_messages
+        self.target_audio_bytes = target_audio_bytes
+        self.linger = linger_ms / 1000
+        self.binary_frames = False # set after setup negotiation (audio_protocol)
+
+        self._audio = deque()
+        self._messages = deque()
+        self._pending = bytearray()
+        self._pending_since = None
+        self._pending_parts = 0
+        self._wakeup = asyncio.Event()
+        self._space = asyncio.Event()
+        self._error = None
+        self._task = None
+        self._sending = False
+        self._seq = 0
+        self._audio_epoch = 0 # bumped by discard_audio(); frames from an older epoch are stale
+
+        self.metrics = {
+            "audio_frames": 0,
+            "audio_parts": 0,
+            "messages": 0,
+            "bytes_sent": 0,
+            "dropped": 0,
+            "stale_audio_frames": 0,
+            "max_audio_depth": 0,
+            "max_message_depth": 0,
+            "send_latency_total": 0.0,
+            "send_latency_max": 0.0,
+        }
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    # --- Producer side ---
+    async def send_audio(self, pcm):
+        """Queues a model audio part (raw 24 kHz PCM)."""
+        self._raise_if_failed()
+        if not self._pending:
+            self._pending_since = asyncio.get_running_loop().time()
+        self._pending += pcm
+        self._pending_parts += 1
+        if len(self._pending) >= self.target_audio_bytes:
+            await self.flush_audio()
+        else:
+            self._wakeup.set() # arm the linger timer
+
+    async def flush_audio(self):
+        """Queues any partial audio frame immediately (e.g. on turn_complete)."""
+        if self._pending:
+            epoch = self._audio_epoch
+            await self._enqueue(self._audio, self.max_audio_frames, "max_audio_depth", self._take_pending(), epoch)
+
+    async def send_json(self, obj):
+        """Queues a text/status message; serialized by the sender task."""
+        self._raise_if_failed()
+        await self._enqueue(self._messages, self.max_messages, "max_message_depth", obj)
+
+    def discard_audio(self):
+        """Drops all queued and partial audio. Returns the number of bytes discarded."""
+        dropped = len(self._pending) + sum(len(frame) for _t, frame in self._audio)
+        self._pending = bytearray()
+        self._pending_parts = 0
+        self._audio.clear()
+        self._audio_epoch += 1 # a producer blocked in _enqueue() drops the frame it holds
+        self._space.set()
+        return dropped
+
+    def _take_pending(self):
+        frame = bytes(self._pending)
+        self.metrics["audio_parts"] += self._pending_parts
+        self._pending = bytearray()
+        self._pending_parts = 0
+        return frame
+
+    async def _enqueue(self, queue, limit, depth_key, item, epoch=None):
+        while len(queue) >= limit:
+            if self.policy == BLOCK:
+                self._space.clear()
+                await self._space.wait()
+                self._raise_if_failed()
+                if epoch is not None and epoch != self._audio_epoch:
+                    self.metrics["stale_audio_frames"] += 1 # taken before a barge-in discarded the audio
+                    return
+            elif self.policy == DROP_OLDEST:
+                queue.popleft()
+                self.metrics["dropped"] += 1
+            else:
+                self._error = ClientTooSlow(f"outbound queue full ({limit})")
+                await self._ws.close(code=1013, reason="client too slow")
+                raise self._error
+        queue.append((asyncio.get_running_loop().time(), item))
+        if len(queue) > self.metrics[depth_key]:
+            self.metrics[depth_key] = len(queue)
+        self._wakeup.set()
+
+    def _raise_if_failed(self):
+        if self._error is not None:
+            raise self._error
+
+    # --- Sender task ---
+    def _encode_audio(self, pcm):
+        if self.binary_frames:
+            self._seq += 1
+            return ap.pack_frame(ap.KIND_AUDIO_PCM, pcm, seq=self._seq)
+        return json.dumps({"audio": base64.b64encode(pcm).decode('utf-8')})
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                if not self._audio and not self._messages:
+                    timeout = None
+                    if self._pending:
+                        timeout = max(0.0, self._pending_since + self.linger - loop.time())
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        if self._pending:
+                            self._audio.append((loop.time(), self._take_pending()))
+                    continue
+
+                is_audio = bool(self._audio)
+                if is_audio:
+                    enqueued_at, pcm = self._audio.popleft()
+                    frame = self._encode_audio(pcm)
+                else:
+                    enqueued_at, obj = self._messages.popleft()
+                    frame = obj if isinstance(obj, str) else json.dumps(obj)
+                self._space.set()
+
+                self._sending = True
+                await self._ws.send(frame)
+                self._sending = False
+                self.metrics["audio_frames" if is_audio else "messages"] += 1
+                latency = loop.time() - enqueued_at
+                self.metrics["bytes_sent"] += len(frame.encode("utf-8")) if isinstance(frame, str) else len(frame)
+                self.metrics["send_latency_total"] += latency
+                if latency > self.metrics["send_latency_max"]:
+                    self.metrics["send_latency_max"] = latency
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Connection closed (or similar): surface it to the producers
+            self._error = e
+            self._space.set()
+
+    def stats(self):
+        sent = self.metrics["audio_frames"] + self.metrics["messages"]
+        return {
+            **self.metrics,
+            "audio_depth": len(self._audio),
+            "message_depth": len(self._messages),
+            "send_latency_avg": self.metrics["send_latency_total"] / sent if sent else 0.0,
+        }
+
+    async def close(self, drain_timeout=1.0):
+        """Sends what is already queued (bounded by drain_timeout), then stops the task."""
+        if self._task is None:
+            return
+        if self._error is None:
+            try:
+                await self.flush_audio()
+                deadline = asyncio.get_running_loop().time() + drain_timeout
+                while (self._audio or self._messages or self._sending) and self._error is None and asyncio.get_running_loop().time() < deadline:
+                    await asyncio.sleep(0.01)
+            except Exception:
+                pass
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
@@ -141,6 +141,11 @@ class PCMProcessor extends AudioWorkletProcessor {
             if (!this._ringBuffer) return;
 
             const newData = e.data;
+            if (newData && newData.type === "flush") {
+                // barge-in: 아직 재생되지 않은 오디오 폐기
+                this._ringBuffer.clear();
+                return;
+            }
             if (!(newData instanceof Float32Array) || newData.length === 0) {
                 return; // Ignore invalid data silently
             }
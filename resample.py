@@ -0,0 +1,124 @@
+from math import gcd
+
+import numpy as np
+
+# --- Ingestion format limits ---
+TARGET_RATE = 16000 # Live API input: audio/pcm;rate=16000, mono int16
+MIN_RATE = 8000
+MAX_RATE = 96000
+MAX_CHANNELS = 8
+
+
+def design_lowpass(up, down, half_taps=10, beta=8.0):
+    """
+    Windowed-sinc (Kaiser) anti-aliasing filter for an up/down polyphase resampler.
+
+    Returns:
+        np.ndarray: (up, taps_per_phase) float32 polyphase coefficient bank, where
+                    bank[p, k] = h[p + k * up] (gain `up` to undo zero stuffing).
+    """
+    ratio = max(up, down)
+    length = 2 * half_taps * ratio + 1
+    cutoff = 0.5 / ratio * 0.9 # cycles per upsampled sample, a bit below Nyquist
+    n = np.arange(length) - (length - 1) / 2
+    h = 2 * cutoff * np.sinc(2 * cutoff * n) * np.kaiser(length, beta)
+    h *= up / h.sum()
+
+    taps_per_phase = -(-length // up)
+    padded = np.zeros(taps_per_phase * up)
+    padded[:length] = h
+    return padded.reshape(taps_per_phase, up).T.astype(np.float32)
+
+
+class PolyphaseResampler:
+    """
+    Streaming rational resampler (in_rate -> out_rate) for mono float32 signals.
+
+    Keeps the last taps-1 input samples and the output phase between calls, so chunk
+    boundaries are seamless. Each call costs O(outputs * taps_per_phase), computed in
+    vectorized blocks.
+    """
+
+    BLOCK = 4096 # outputs per vectorized block (bounds temporary memory)
+
+    def __init__(self, in_rate, out_rate=TARGET_RATE, half_taps=10):
+        g = gcd(in_rate, out_rate)
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self.up = out_rate // g
+        self.down = in_rate // g
+        self.bank = design_lowpass(self.up, self.down, half_taps)
+        self.taps = self.bank.shape[1]
+        self._history = np.zeros(self.taps - 1, dtype=np.float32)
+        self._m = 0 # upsampled-timeline position of the next output, relative to the next chunk
+
+    def process(self, x):
+        """Resamples a float32 chunk; returns the float32 output samples it completes."""
+        n_in = len(x)
+        if n_in == 0:
+            return np.zeros(0, dtype=np.float32)
+        x_ext = np.concatenate((self._history, x))
+        end = n_in * self.up
+        m = np.arange(self._m, end, self.down)
+        out = np.empty(len(m), dtype=np.float32)
+
+        # window for output j covers x_ext[i + taps - 1 - k], k = 0..taps-1
+        reversed_windows = np.lib.stride_tricks.sliding_window_view(x_ext, self.taps)[:, ::-1]
+        for start in range(0, len(m), self.BLOCK):
+            block = m[start:start + self.BLOCK]
+            i = block // self.up
+            p = block % self.up
+            out[start:start + len(block)] = np.einsum("ij,ij->i", reversed_windows[i], self.bank[p])
+
+        self._m = (int(m[-1]) + self.down - end) if len(m) else self._m - end
+        self._history = x_ext[-(self.taps - 1):].copy() if self.taps > 1 else self._history
+        return out
+
+
+class AudioIngest:
+    """
+    Converts client PCM (declared rate / channel count, interleaved int16) to the
+    16 kHz mono int16 the Live API expects. Already-conforming audio passes through
+    untouched.
+    """
+
+    def __init__(self, sample_rate=TARGET_RATE, channels=1, out_rate=TARGET_RATE):
+        if not MIN_RATE <= sample_rate <= MAX_RATE:
+            raise ValueError(f"Unsupported sample rate: {sample_rate}")
+        if not 1 <= channels <= MAX_CHANNELS:
+            raise ValueError(f"Unsupported channel count: {channels}")
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.out_rate = out_rate
+        self.passthrough = sample_rate == out_rate and channels == 1
+        self._resampler = None if sample_rate == out_rate else PolyphaseResampler(sample_rate, out_rate)
+        self._carry = b"" # partial interleaved frame between chunks
+
+    @classmethod
+    def from_setup(cls, setup):
+        """Builds an ingest stage from setup["input_audio"] = {"sample_rate": .., "channels": ..}."""
+        fmt = setup.get("input_audio") or {}
+        return cls(int(fmt.get("sample_rate", TARGET_RATE)), int(fmt.get("channels", 1)))
+
+    def describe(self):
+        return {"sample_rate": self.sample_rate, "channels": self.channels}
+
+    def process(self, pcm):
+        """Returns 16 kHz mono int16 bytes for a chunk of client PCM (bytes-like)."""
+        if self.passthrough:
+            return pcm
+        frame_bytes = 2 * self.channels
+        if self._carry:
+            pcm = self._carry + bytes(pcm)
+        usable = len(pcm) - len(pcm) % frame_bytes
+        self._carry = bytes(pcm[usable:])
+
+        samples = np.frombuffer(pcm, dtype=np.int16, count=usable // 2)
+        if self.channels > 1:
+            mono = samples.reshape(-1, self.channels).mean(axis=1, dtype=np.float32)
+        else:
+            mono = samples.astype(np.float32)
+        if self._resampler is not None:
+            mono = self._resampler.process(mono)
+        np.clip(mono, -32768, 32767, out=mono)
+        return np.rint(mono).astype(np.int16).tobytes()
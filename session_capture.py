@@ -0,0 +1,147 @@
+import json
+import os
+import struct
+import time
+
+from google.genai import types
+
+# --- Session capture file ---
+# MAGIC, then append-only records (little endian):
+#   | kind (u8) | microseconds since capture start (u64) | payload length (u32) | payload ... |
+# META          JSON object (session key, pid, ...), first record
+# CLIENT_TEXT   websocket text message from the client (UTF-8)
+# CLIENT_BINARY websocket binary frame from the client (audio_protocol frame)
+# LIVE          LiveServerMessage: | json length (u32) | json | then | length (u32) | bytes | per blob,
+#               bytes fields (audio) are replaced by {"$blob": index} in the JSON
+# CLIENT_CLOSED client disconnected (empty payload)
+# A truncated last record (crash while writing) is ignored when reading.
+MAGIC = b"DRJCAP\x01\n"
+META, CLIENT_TEXT, CLIENT_BINARY, LIVE, CLIENT_CLOSED = range(5)
+_RECORD = struct.Struct("<BQI")
+_LEN = struct.Struct("<I")
+
+
+def _split_blobs(value, blobs):
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        blobs.append(bytes(value))
+        return {"$blob": len(blobs) - 1}
+    if isinstance(value, dict):
+        return {k: _split_blobs(v, blobs) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_split_blobs(v, blobs) for v in value]
+    return value
+
+def _join_blobs(value, blobs):
+    if isinstance(value, dict):
+        if len(value) == 1 and "$blob" in value:
+            return blobs[value["$blob"]]
+        return {k: _join_blobs(v, blobs) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_join_blobs(v, blobs) for v in value]
+    return value
+
+def encode_live_message(message):
+    blobs = []
+    doc = json.dumps(_split_blobs(message.model_dump(exclude_none=True), blobs), ensure_ascii=False).encode()
+    parts = [_LEN.pack(len(doc)), doc]
+    for blob in blobs:
+        parts += [_LEN.pack(len(blob)), blob]
+    return b"".join(parts)
+
+def decode_live_message(payload):
+    view = memoryview(payload)
+    (size,) = _LEN.unpack_from(view, 0)
+    doc = json.loads(bytes(view[4:4 + size]))
+    offset, blobs = 4 + size, []
+    while offset < len(view):
+        (size,) = _LEN.unpack_from(view, offset)
+        blobs.append(bytes(view[offset + 4:offset + 4 + size]))
+        offset += 4 + size
+    return types.LiveServerMessage.model_validate(_join_blobs(doc, blobs))
+
+
+class SessionRecorder:
+    """Appends one connection's client frames and Live responses to a capture file."""
+
+    def __init__(self, path, meta=None):
+        """
+        Args:
+            path (str): New capture file (parent directory must exist).
+            meta (dict): Stored in the first record (session key, etc.).
+        """
+        self.path = path
+        self._file = open(path, "wb", buffering=256 * 1024)
+        self._file.write(MAGIC)
+        self._t0 = time.monotonic_ns()
+        self.records = 0
+        self._write(META, json.dumps({"pid": os.getpid(), "started": time.time(), **(meta or {})}).encode())
+
+    def _write(self, kind, payload):
+        if self._file is None:
+            return
+        t_us = (time.monotonic_ns() - self._t0) // 1000
+        self._file.write(_RECORD.pack(kind, t_us, len(payload)))
+        self._file.write(payload)
+        self.records += 1
+
+    def client(self, message):
+        if isinstance(message, str):
+            self._write(CLIENT_TEXT, message.encode())
+        else:
+            self._write(CLIENT_BINARY, bytes(message))
+
+    def live(self, message):
+        self._write(LIVE, encode_live_message(message))
+
+    def close(self):
+        if self._file is not None:
+            self._write(CLIENT_CLOSED, b"")
+            self._file.close()
+            self._file = None
+
+
+class _NullRecorder:
+    """Capture disabled."""
+    path = None
+    records = 0
+
+    def client(self, message):
+        pass
+
+    def live(self, message):
+        pass
+
+    def close(self):
+        pass
+
+NULL_RECORDER = _NullRecorder()
+
+
+def read_capture(path):
+    """
+    Yields (kind, seconds since start, data) for every complete record; data is a
+    dict (META), str (CLIENT_TEXT), bytes (CLIENT_BINARY), LiveServerMessage (LIVE)
+    or None (CLIENT_CLOSED).
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a session capture")
+        while True:
+            header = f.read(_RECORD.size)
+            if len(header) < _RECORD.size:
+                return
+            kind, t_us, size = _RECORD.unpack(header)
+            payload = f.read(size)
+            if len(payload) < size:
+                return # torn tail
+            if kind == META:
+                data = json.loads(payload)
+            elif kind == CLIENT_TEXT:
+                data = payload.decode()
+            elif kind == CLIENT_BINARY:
+                data = payload
+            elif kind == LIVE:
+                data = decode_live_message(payload)
+            else:
+                data = None
+            yield kind, t_us / 1e6, data
@@ -0,0 +1,181 @@
+import asyncio
+import math
+from collections import deque
+from contextlib import asynccontextmanager
+
+import app_logging
+
+log = app_logging.get_logger("session_pool")
+
+
+def session_alive(session):
+    """
+    False if the session's websocket (google-genai AsyncSession._ws) is known to be
+    closed, e.g. the server dropped a parked session. Unknown session types count as alive.
+    """
+    ws = getattr(session, "_ws", None)
+    if ws is None:
+        return True
+    if getattr(ws, "close_code", None) is not None:
+        return False
+    state = getattr(ws, "state", None) # websockets State.OPEN / CONNECTING / CLOSING / CLOSED
+    return state is None or getattr(state, "name", "OPEN") in ("OPEN", "CONNECTING")
+
+
+class _Lease:
+    def __init__(self, session, ready_at, keeper):
+        self.session = session
+        self.ready_at = ready_at
+        self.keeper = keeper
+        self.claimed = asyncio.Event()
+        self.released = asyncio.Event()
+
+
+class LiveSessionPool:
+    """
+    Pool of pre-connected Live sessions (standard config, no resumption handle).
+
+    Each warm session is owned by a keeper task that enters `connect()`, parks the
+    session in the idle list and exits the context again in the same task once the
+    connection that took it is finished, or after `max_idle_s` if nobody did (so no
+    session is handed out close to its lifetime limit). The idle target follows the
+    connection arrival rate: enough sessions to cover arrivals during one connect,
+    plus one, between `min_size` and `max_size`.
+    """
+
+    def __init__(self, connect, min_size=0, max_size=2, max_idle_s=120.0, rate_window_s=60.0, is_alive=session_alive):
+        """
+        Args:
+            connect (callable): Returns a new `client.aio.live.connect(...)` context manager.
+            min_size (int): Idle sessions kept even without traffic.
+            max_size (int): Upper bound on idle + connecting sessions.
+            max_idle_s (float): Retire an unclaimed session after this long.
+            rate_window_s (float): Window for the arrival-rate estimate.
+            is_alive (callable): Checks a parked session before it is handed out.
+        """
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_idle_s = max_idle_s
+        self.rate_window_s = rate_window_s
+        self._is_alive = is_alive
+        self._idle = deque()
+        self._connecting = set() # keeper tasks still in the handshake
+        self._arrivals = deque()
+        self._connect_s = 1.0 # EWMA of the handshake time
+        self._errors = 0
+        self._retry_at = 0.0
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._closed = False
+        self.metrics = {"hits": 0, "misses": 0, "opened": 0, "retired": 0, "dead": 0, "connect_errors": 0}
+
+    def start(self):
+        if self.max_size > 0:
+            self._task = asyncio.create_task(self._maintain())
+        return self
+
+    # --- Consumer side ---
+    @asynccontextmanager
+    async def connect(self):
+        """Yields a live warm session if one is idle, otherwise connects directly."""
+        loop = asyncio.get_running_loop()
+        self._arrivals.append(loop.time())
+        lease = None
+        while self._idle:
+            lease = self._idle.pop() # newest first: most lifetime left
+            if self._is_alive(lease.session):
+                break
+            # Closed while parked (e.g. by the server): let its keeper exit, try the next one
+            self.metrics["dead"] += 1
+            lease.claimed.set()
+            lease.released.set()
+            lease = None
+        self._wakeup.set()
+        if lease is None:
+            self.metrics["misses"] += 1
+            async with self._connect() as session:
+                yield session
+            return
+        self.metrics["hits"] += 1
+        lease.claimed.set()
+        try:
+            yield lease.session
+        finally:
+            lease.released.set()
+
+    # --- Refill ---
+    def target_size(self):
+        now = asyncio.get_running_loop().time()
+        while self._arrivals and self._arrivals[0] < now - self.rate_window_s:
+            self._arrivals.popleft()
+        rate = len(self._arrivals) / self.rate_window_s
+        wanted = math.ceil(rate * self._connect_s) + 1 if rate > 0 else 0
+        return max(self.min_size, min(self.max_size, wanted))
+
+    async def _maintain(self):
+        loop = asyncio.get_running_loop()
+        while not self._closed: # wait_for() can swallow a cancel that races the wakeup (Python < 3.12)
+            while (len(self._idle) + len(self._connecting) < self.target_size() and loop.time() >= self._retry_at):
+                keeper = asyncio.create_task(self._keep())
+                self._connecting.add(keeper)
+                keeper.add_done_callback(self._connecting.discard)
+            self._wakeup.clear()
+            timeout = max(0.1, self._retry_at - loop.time()) if self._retry_at > loop.time() else 1.0
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _keep(self):
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        lease = None
+        try:
+            async with self._connect() as session:
+                self._connect_s = 0.8 * self._connect_s + 0.2 * (loop.time() - started)
+                self._errors = 0
+                self._connecting.discard(asyncio.current_task())
+                lease = _Lease(session, loop.time(), asyncio.current_task())
+                self._idle.append(lease)
+                self.metrics["opened"] += 1
+                try:
+                    await asyncio.wait_for(lease.claimed.wait(), self.max_idle_s)
+                except asyncio.TimeoutError:
+                    if lease in self._idle:
+                        self._idle.remove(lease)
+                        self.metrics["retired"] += 1
+                        return
+                await lease.released.wait()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if lease is not None:
+                log.warning("warm session closed with error", error=repr(e))
+                return
+            self._errors += 1
+            self.metrics["connect_errors"] += 1
+            self._retry_at = loop.time() + min(30.0, 2 ** self._errors)
+            log.warning("warm connect failed", errors=self._errors, retry_in_s=min(30.0, 2 ** self._errors), error=repr(e))
+        finally:
+            if lease is not None and lease in self._idle:
+                self._idle.remove(lease)
+            self._wakeup.set()
+
+    def stats(self):
+        return {**self.metrics, "idle": len(self._idle), "connecting": len(self._connecting), "connect_s": round(self._connect_s, 3)}
+
+    async def close(self):
+        """Stops refilling and closes idle sessions (sessions in use close with their connection)."""
+        self._closed = True
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for keeper in list(self._connecting):
+            keeper.cancel()
+        idle, self._idle = list(self._idle), deque()
+        for lease in idle:
+            lease.claimed.set()
+            lease.released.set()
+        await asyncio.gather(*self._connecting, *(lease.keeper for lease in idle), return_exceptions=True)
@@ -0,0 +1,129 @@
+import asyncio
+import re
+import time
+import uuid
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlsplit
+
+RESUME_TTL_S = 2 * 60 * 60 # Live API resumption handles stay valid for about 2 hours
+RECONNECT_WAIT_S = 5.0 # how long a reconnect waits for the previous connection's cleanup
+_KEY_RE = re.compile(r"^[A-Za-z0-9_.-]{1,128}$")
+
+
+class SessionInUse(Exception):
+    """Raised when a client id is already attached to an open connection."""
+
+
+def request_path(websocket):
+    """Request path of a websockets connection (new asyncio API or legacy server)."""
+    request = getattr(websocket, "request", None)
+    if request is not None:
+        return request.path
+    return getattr(websocket, "path", "/") or "/"
+
+def session_key_from_path(path):
+    """
+    Reads the client-supplied id from `?session_id=...`.
+
+    Returns:
+        str: The id, or a fresh random one if missing/invalid (no resumption then).
+    """
+    values = parse_qs(urlsplit(path).query).get("session_id")
+    if values and _KEY_RE.match(values[0]):
+        return values[0]
+    return "anon-" + uuid.uuid4().hex
+
+
+class SessionState:
+    """Per-connection state: resumption handle, playback flag and turn buffers."""
+
+    def __init__(self, key, resumption_handle=None, audio_data=None):
+        self.key = key
+        self.resumption_handle = resumption_handle
+        self.is_playing = False
+        self.audio_data = audio_data
+        self.opened_at = time.monotonic()
+        self.released = asyncio.Event() # set by SessionRegistry.close()
+
+    def __repr__(self):
+        return f"SessionState({self.key!r}, resumable={self.resumption_handle is not None})"
+
+
+class SessionRegistry:
+    """
+    Process-wide registry of Live sessions keyed by client id.
+
+    Open connections live in a dict (O(1) lookup). On disconnect the connection's
+    buffers are dropped and only its resumption handle is kept, for `resume_ttl`
+    seconds, so the same client can resume its conversation after reconnecting.
+    """
+
+    def __init__(self, resume_ttl=RESUME_TTL_S, buffer_factory=None):
+        """
+        Args:
+            resume_ttl (float): How long a released handle can be resumed (s).
+            buffer_factory (callable): Builds a new connection's receive AudioBuffer.
+        """
+        self.resume_ttl = resume_ttl
+        self._buffer_factory = buffer_factory
+        self._active = {}
+        self._handles = OrderedDict() # key -> (handle, expires_at), oldest first
+
+    def open(self, key):
+        """Attaches a connection to `key`, restoring its resumption handle if still valid."""
+        if key in self._active:
+            raise SessionInUse(key)
+        self._expire()
+        handle, _expires_at = self._handles.pop(key, (None, 0))
+        audio_data = self._buffer_factory() if self._buffer_factory else None
+        state = SessionState(key, handle, audio_data)
+        self._active[key] = state
+        return state
+
+    async def open_when_free(self, key, wait_s=RECONNECT_WAIT_S):
+        """
+        Like open(), but if `key` is still attached (a quick reconnect while the old
+        handler is cleaning up) waits up to `wait_s` for it to be released first, so
+        the new connection also inherits its resumption handle.
+
+        Raises:
+            SessionInUse: The old connection did not release the id in time.
+        """
+        deadline = time.monotonic() + wait_s
+        while key in self._active:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise SessionInUse(key)
+            try:
+                await asyncio.wait_for(self._active[key].released.wait(), remaining)
+            except asyncio.TimeoutError:
+                raise SessionInUse(key) from None
+        return self.open(key)
+
+    def get(self, key):
+        return self._active.get(key)
+
+    def close(self, state):
+        """Detaches a connection: frees its buffers and keeps the handle for resumption."""
+        if self._active.get(state.key) is state:
+            del self._active[state.key]
+        state.audio_data = None
+        state.released.set()
+        if state.resumption_handle:
+            self._handles[state.key] = (state.resumption_handle, time.monotonic() + self.resume_ttl)
+            self._handles.move_to_end(state.key)
+        self._expire()
+
+    def _expire(self):
+        now = time.monotonic()
+        while self._handles:
+            key, (_handle, expires_at) = next(iter(self._handles.items()))
+            if expires_at > now:
+                break
+            del self._handles[key]
+
+    def __len__(self):
+        return len(self._active)
+
+    def stats(self):
+        return {"active": len(self._active), "resumable": len(self._handles)}
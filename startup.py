@@ -0,0 +1,29 @@
+import time
+from contextlib import contextmanager
+
+import app_logging # stdlib 만 사용: 기동 시간에 영향 없음
+
+log = app_logging.get_logger("startup")
+
+# 기동 시간 측정 기준점 (main.py 에서 가장 먼저 import)
+T0 = time.perf_counter()
+_timings = [] # (label, seconds)
+
+
+@contextmanager
+def timed(label):
+    """Records how long the enclosed block (typically a group of imports) took."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _timings.append((label, time.perf_counter() - start))
+
+def elapsed():
+    return time.perf_counter() - T0
+
+def report(milestone):
+    """Logs the recorded timings and the time from process start to `milestone`."""
+    for label, seconds in _timings:
+        log.info("startup timing", step=label, ms=round(seconds * 1000, 1))
+    log.info("startup milestone", milestone=milestone, ms=round(elapsed() * 1000, 1))
@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from audio_buffer import DROP_NEWEST, DROP_OLDEST, AudioBuffer
+
+
+def feed(buffer, chunks):
+    return sum(buffer.append(chunk) for chunk in chunks)
+
+def random_chunks(total, seed=0, max_chunk=700):
+    rng = random.Random(seed)
+    data = rng.randbytes(total)
+    chunks, offset = [], 0
+    while offset < total:
+        size = rng.randint(0, max_chunk)
+        chunks.append(data[offset:offset + size])
+        offset += size
+    return data, chunks
+
+
+def test_grows_and_flushes_whole_turn():
+    buffer = AudioBuffer(capacity=16, max_capacity=1 << 20)
+    data, chunks = random_chunks(10_000)
+    assert feed(buffer, chunks) == 0
+    assert bytes(buffer.flush()) == data
+    assert len(buffer) == 0
+    assert buffer.stats()["high_water_mark"] == len(data)
+
+@pytest.mark.parametrize("seed", range(5))
+def test_drop_oldest_keeps_newest_bytes(seed):
+    buffer = AudioBuffer(capacity=64, max_capacity=1000, overflow=DROP_OLDEST)
+    data, chunks = random_chunks(20_000, seed=seed, max_chunk=1500)
+    dropped = feed(buffer, chunks)
+    assert dropped == len(data) - 1000 == buffer.stats()["dropped_bytes"]
+    assert bytes(buffer.view()) == data[-1000:]
+    assert bytes(buffer.flush()) == data[-1000:]
+
+def test_drop_oldest_wraps_instead_of_moving_bytes():
+    buffer = AudioBuffer(capacity=8, max_capacity=8)
+    buffer.append(b"abcdefgh")
+    storage = buffer._buf
+    assert buffer.append(b"123") == 3
+    assert buffer._buf is storage and buffer._head == 3
+    assert bytes(buffer.view()) == b"defgh123"
+
+def test_drop_newest_ignores_what_does_not_fit():
+    buffer = AudioBuffer(capacity=4, max_capacity=10, overflow=DROP_NEWEST)
+    assert buffer.append(b"0123456") == 0
+    assert buffer.append(b"789abc") == 3
+    assert buffer.append(b"x") == 1
+    assert bytes(buffer.flush()) == b"0123456789"
+
+def test_flushed_view_survives_next_turn():
+    buffer = AudioBuffer(capacity=8, max_capacity=8)
+    feed(buffer, [b"abcdef", b"ghij"]) # wrapped
+    first = buffer.flush()
+    buffer.append(b"ABCDEFGH")
+    second = buffer.flush()
+    buffer.append(b"12345678")
+    assert bytes(first) == b"cdefghij"
+    assert bytes(second) == b"ABCDEFGH"
+    assert bytes(buffer.flush()) == b"12345678"
+
+def test_clear_discards_turn():
+    buffer = AudioBuffer(capacity=4, max_capacity=4)
+    feed(buffer, [b"abc", b"def"])
+    buffer.clear()
+    buffer.append(b"xy")
+    assert bytes(buffer.flush()) == b"xy"
+
+def test_unknown_policy_rejected():
+    with pytest.raises(ValueError):
+        AudioBuffer(overflow="drop_random")
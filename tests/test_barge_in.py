@@ -0,0 +1,69 @@
+import asyncio
+
+import barge_in
+
+
+class FakeOutbox:
+    def __init__(self, queued=0):
+        self.queued = queued
+        self.sent = []
+
+    def discard_audio(self):
+        dropped, self.queued = self.queued, 0
+        return dropped
+
+    async def send_json(self, obj):
+        self.sent.append(obj)
+
+
+def test_interrupt_discards_audio_and_skips_rest_of_turn():
+    async def scenario():
+        outbox = FakeOutbox(queued=4800)
+        barge = barge_in.BargeInController(outbox, onset_ms=60)
+        assert barge.on_model_audio(4800)
+        assert barge.audio_in_flight()
+        await barge.interrupt("barge_in")
+        dropped_part = barge.on_model_audio(4800) # rest of the interrupted turn
+        barge.on_turn_end()
+        next_turn = barge.on_model_audio(4800)
+        return outbox, barge, dropped_part, next_turn
+
+    outbox, barge, dropped_part, next_turn = asyncio.run(scenario())
+    assert outbox.sent == [{"interrupt": {"id": 1, "reason": "barge_in"}}]
+    assert not dropped_part and next_turn
+    assert barge.stats()["discarded_bytes"] == 4800
+
+def test_playback_estimate_keeps_audio_in_flight_after_generation():
+    async def scenario():
+        barge = barge_in.BargeInController(FakeOutbox())
+        barge.on_model_audio(barge_in.PCM_BYTES_PER_SECOND // 10) # 100 ms
+        barge.on_turn_end()
+        playing = barge.audio_in_flight()
+        await asyncio.sleep(0.15)
+        return playing, barge.audio_in_flight()
+
+    assert asyncio.run(scenario()) == (True, False)
+
+def test_ack_measures_latency_including_vad_onset():
+    async def scenario():
+        barge = barge_in.BargeInController(FakeOutbox(), onset_ms=60)
+        await barge.interrupt("server")
+        await asyncio.sleep(0.02)
+        return barge.on_ack({"id": 1}), barge.on_ack({"id": 1}), barge.on_ack({"id": 99}), barge.stats()
+
+    latency, again, unknown, stats = asyncio.run(scenario())
+    assert 75 <= latency < 500
+    assert again is None and unknown is None
+    assert stats["acks"] == 1 and stats["latency_avg_ms"] == latency
+
+def test_unacked_interrupts_are_bounded():
+    async def scenario():
+        barge = barge_in.BargeInController(FakeOutbox())
+        for _ in range(barge_in.MAX_PENDING_ACKS + 10):
+            await barge.interrupt("barge_in")
+        return barge
+
+    barge = asyncio.run(scenario())
+    assert len(barge._pending) == barge_in.MAX_PENDING_ACKS
+    assert barge.stats()["unacked"] == 10
+    assert 1 not in barge._pending and barge_in.MAX_PENDING_ACKS + 10 in barge._pending
@@ -0,0 +1,117 @@
+import json
+import multiprocessing
+import os
+
+import pytest
+
+import chain_log
+import mediblock as mb
+
+
+def record(note):
+    return {
+        "patient_name": "test", "session_date": "2026-01-01", "main_topics": [note],
+        "action_plan": "-", "overall_assessment": "-", "risk_assessment": "-",
+    }
+
+def make_chain(n):
+    chain = mb.MedicalBlockchain()
+    chain._create_genesis_block()
+    for i in range(n):
+        chain.add_block(record(f"record {i}"))
+    return chain
+
+def lines(path):
+    with open(path, "rb") as f:
+        return f.read().splitlines()
+
+
+def test_save_appends_only_new_blocks(tmp_path):
+    path = str(tmp_path / "records.jsonl")
+    chain = make_chain(3)
+    chain.save_chain(path)
+    first = lines(path)
+    chain.add_block(record("more"))
+    chain.save_chain(path)
+    assert lines(path)[:4] == first and len(lines(path)) == 5
+    assert [block["index"] for block in chain_log.ChainLog(path).load()] == list(range(5))
+
+def test_shortened_chain_is_rewritten(tmp_path):
+    path = str(tmp_path / "records.jsonl")
+    chain = make_chain(3)
+    chain.save_chain(path)
+    chain.chain = chain.chain[:2]
+    chain.save_chain(path)
+    assert len(lines(path)) == 2
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+@pytest.mark.parametrize("tail", [b'{"index": 4, "ha', b'{"index": 4, "hash": "x"\n'])
+def test_torn_tail_is_truncated(tmp_path, tail):
+    path = str(tmp_path / "records.jsonl")
+    make_chain(3).save_chain(path)
+    size = os.path.getsize(path)
+    with open(path, "ab") as f:
+        f.write(tail)
+    log = chain_log.ChainLog(path)
+    assert len(log.load()) == 4
+    assert os.path.getsize(path) == size == log.size
+
+def test_corrupt_line_before_the_tail_is_skipped_not_truncated(tmp_path):
+    path = str(tmp_path / "records.jsonl")
+    make_chain(2).save_chain(path)
+    data = lines(path)
+    with open(path, "wb") as f:
+        f.write(b"\n".join([data[0], b"{garbage", data[1], data[2]]) + b"\n")
+    assert len(chain_log.ChainLog(path).load()) == 3
+    assert len(lines(path)) == 4
+
+def test_legacy_json_is_migrated_once(tmp_path):
+    path = str(tmp_path / "records.jsonl")
+    legacy = chain_log.legacy_path(path)
+    chain = make_chain(3)
+    with open(legacy, "w", encoding="utf-8") as f:
+        json.dump([block.to_dict() for block in chain.chain], f)
+
+    loaded = mb.MedicalBlockchain.load_chain(path)
+    assert [block.hash for block in loaded.chain] == [block.hash for block in chain.chain]
+    assert not os.path.exists(legacy) and os.path.exists(legacy + ".migrated")
+    loaded.add_block(record("after migration"))
+    loaded.save_chain(path)
+    assert len(lines(path)) == 5
+
+def _load_blocks(path, queue):
+    queue.put(len(chain_log.ChainLog(path).load()))
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_concurrent_first_loads_migrate_once(tmp_path):
+    path = str(tmp_path / "records.jsonl")
+    chain = make_chain(300)
+    with open(chain_log.legacy_path(path), "w", encoding="utf-8") as f:
+        json.dump([block.to_dict() for block in chain.chain], f)
+
+    ctx = multiprocessing.get_context("fork")
+    queue = ctx.Queue()
+    procs = [ctx.Process(target=_load_blocks, args=(path, queue)) for _ in range(4)]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join(30)
+    assert [proc.exitcode for proc in procs] == [0] * 4
+    assert sorted(queue.get(timeout=1) for _ in procs) == [301] * 4
+    assert len(lines(path)) == 301
+
+def test_unloaded_store_never_overwrites_the_file(tmp_path):
+    path = str(tmp_path / "records.jsonl")
+    make_chain(3).save_chain(path)
+    before = lines(path)
+    fresh = make_chain(0) # e.g. a chain built without reading the file
+    with pytest.raises(chain_log.ChainNotLoaded):
+        fresh.save_chain(path)
+    assert lines(path) == before
+
+def test_unreadable_file_raises_instead_of_starting_over(tmp_path):
+    path = str(tmp_path / "records.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"index": 0}\n') # block without its fields
+    with pytest.raises(KeyError):
+        mb.MedicalBlockchain.load_chain(path)
@@ -0,0 +1,39 @@
+import threading
+import time
+
+import chain_sync
+import mediblock as mb
+
+
+def record(note):
+    return {
+        "patient_name": "test", "session_date": "2026-01-01", "main_topics": [note],
+        "action_plan": "-", "overall_assessment": "-", "risk_assessment": "-",
+    }
+
+
+def test_concurrent_reads_apply_appended_blocks_once(tmp_path):
+    path = str(tmp_path / "records.jsonl")
+    writer = chain_sync.SharedChain(mb.MedicalBlockchain, path) # another worker
+    reader = chain_sync.SharedChain(mb.MedicalBlockchain, path)
+    writer.update(lambda chain: chain.add_block(record("first")))
+    reader.load()
+    for i in range(3):
+        writer.update(lambda chain: chain.add_block(record(f"record {i}")))
+
+    read_appended = reader.chain.store.read_appended
+    def slow_read_appended():
+        block_dicts = read_appended()
+        time.sleep(0.05) # widen the window between reading the new lines and adding them
+        return block_dicts
+    reader.chain.store.read_appended = slow_read_appended
+
+    threads = [threading.Thread(target=reader.read, args=(lambda chain: None,)) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    indexes = reader.read(lambda chain: [block.index for block in chain.chain])
+    assert indexes == list(range(5))
+    assert reader.read(lambda chain: chain.is_chain_valid())
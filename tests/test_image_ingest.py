@@ -0,0 +1,70 @@
+import io
+
+import pytest
+
+import image_ingest
+
+
+@pytest.fixture
+def no_pillow(monkeypatch):
+    monkeypatch.setattr(image_ingest, "Image", None)
+    monkeypatch.setattr(image_ingest, "load_pil", lambda: None)
+
+
+def test_rate_limit_drops_frames_inside_the_interval(no_pillow):
+    frames = image_ingest.FrameFilter(max_fps=2.0, dedup_distance=-1)
+    sent = [frames.process(bytes([i]) * 100, now=i * 0.2) for i in range(6)] # 5 fps in
+    assert [out is not None for out in sent] == [True, False, False, True, False, False]
+    assert frames.stats()["dropped_rate"] == 4
+
+def test_exact_duplicates_dropped_without_pillow(no_pillow):
+    frames = image_ingest.FrameFilter(max_fps=0)
+    assert frames.process(b"frame-a", now=0) == b"frame-a"
+    assert frames.process(b"frame-a", now=1) is None
+    assert frames.process(b"frame-b", now=2) == b"frame-b"
+    stats = frames.stats()
+    assert stats["dropped_duplicate"] == 1 and stats["frames_saved"] == 1
+
+def test_dedup_disabled_forwards_repeats(no_pillow):
+    frames = image_ingest.FrameFilter(max_fps=0, dedup_distance=-1)
+    assert frames.process(b"frame", now=0) and frames.process(b"frame", now=1)
+
+def test_hamming():
+    assert image_ingest.hamming(0b1011, 0b0001) == 2
+    assert image_ingest.hamming(5, 5) == 0
+
+
+def jpeg(width, height, shade=0, noise=0):
+    from PIL import Image
+    image = Image.new("RGB", (width, height))
+    image.putdata([((x * 255 // width + shade) % 256, (y * 255 // height) % 256, noise) for y in range(height) for x in range(width)])
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+@pytest.fixture
+def pillow():
+    pytest.importorskip("PIL")
+    image_ingest.load_pil()
+
+def test_large_frame_downscaled(pillow):
+    from PIL import Image
+    frames = image_ingest.FrameFilter(max_side=256, max_fps=0)
+    out = frames.process(jpeg(800, 400), now=0)
+    assert Image.open(io.BytesIO(out)).size == (256, 128)
+    assert frames.stats()["resized"] == 1
+
+def test_small_frame_passes_unchanged(pillow):
+    data = jpeg(200, 100)
+    assert image_ingest.FrameFilter(max_side=256, max_fps=0).process(data, now=0) == data
+
+def test_near_identical_frame_is_duplicate(pillow):
+    frames = image_ingest.FrameFilter(max_fps=0, dedup_distance=4)
+    assert frames.process(jpeg(320, 240), now=0) is not None
+    assert frames.process(jpeg(320, 240, noise=3), now=1) is None # re-encoded, same picture
+    assert frames.process(jpeg(320, 240, shade=128), now=2) is not None
+
+def test_undecodable_frame_dropped(pillow):
+    frames = image_ingest.FrameFilter(max_fps=0)
+    assert frames.process(b"\xff\xd8 not a jpeg", now=0) is None
+    assert frames.stats()["decode_errors"] == 1
@@ -0,0 +1,91 @@
+import asyncio
+
+import live_transcripts
+from live_transcripts import MODEL, USER
+
+
+def _run(scenario):
+    return asyncio.run(asyncio.wait_for(scenario(), 5))
+
+def _stream(coalesce_ms=50, max_chars=120):
+    sent = []
+
+    async def emit(message):
+        sent.append(message["transcript"])
+
+    return live_transcripts.TranscriptStream(emit, coalesce_ms=coalesce_ms, max_chars=max_chars), sent
+
+def test_fragments_coalesce_until_timer_fires():
+    async def scenario():
+        stream, sent = _stream(coalesce_ms=50)
+        stream.start()
+        await stream.add(MODEL, "Hello")
+        await stream.add(MODEL, " there")
+        assert sent == [] # still buffered
+        await asyncio.sleep(0.15)
+        await stream.close()
+        return stream, sent
+
+    stream, sent = _run(scenario)
+    assert sent == [{"role": MODEL, "text": "Hello there", "final": False}]
+    assert stream.stats() == {"fragments": 2, "messages": 1}
+
+def test_max_chars_sends_immediately():
+    async def scenario():
+        stream, sent = _stream(coalesce_ms=10_000, max_chars=8)
+        await stream.add(USER, "four")
+        await stream.add(USER, "more")
+        return sent
+
+    assert _run(scenario) == [{"role": USER, "text": "fourmore", "final": False}]
+
+def test_finished_fragment_closes_the_line():
+    async def scenario():
+        stream, sent = _stream(coalesce_ms=10_000)
+        await stream.add(USER, "how are")
+        await stream.add(USER, " you?", finished=True)
+        await stream.add(USER, "", finished=True) # nothing buffered, line already closed
+        return sent
+
+    assert _run(scenario) == [{"role": USER, "text": "how are you?", "final": True}]
+
+def test_end_turn_closes_open_lines_of_both_roles():
+    async def scenario():
+        stream, sent = _stream(coalesce_ms=10_000, max_chars=4)
+        await stream.add(MODEL, "long") # sent at max_chars, line left open
+        await stream.add(USER, "hi")
+        await stream.end_turn()
+        await stream.end_turn() # nothing left to close
+        return sent
+
+    assert _run(scenario) == [
+        {"role": MODEL, "text": "long", "final": False},
+        {"role": USER, "text": "hi", "final": True},
+        {"role": MODEL, "text": "", "final": True},
+    ]
+
+def test_zero_coalesce_sends_every_fragment():
+    async def scenario():
+        stream, sent = _stream(coalesce_ms=0)
+        await stream.add(MODEL, "a")
+        await stream.add(MODEL, "b")
+        return sent
+
+    assert _run(scenario) == [
+        {"role": MODEL, "text": "a", "final": False},
+        {"role": MODEL, "text": "b", "final": False},
+    ]
+
+def test_timer_stops_quietly_when_emit_fails():
+    async def scenario():
+        async def emit(message):
+            raise ConnectionError("closed")
+
+        stream = live_transcripts.TranscriptStream(emit, coalesce_ms=10).start()
+        await stream.add(MODEL, "bye")
+        await asyncio.sleep(0.05)
+        done = stream._task.done()
+        await stream.close()
+        return done
+
+    assert _run(scenario) # the flush loop ends quietly instead of raising into close()
@@ -0,0 +1,83 @@
+import memoryblock
+from memoryblock import AGENT_ID_FIELD, MEMORY_PAYLOAD_FIELD
+
+
+def _linear_recall(chain, agent_id, num_to_recall):
+    """recall_latest_memory before the per-agent index: newest-first scan of every block."""
+    found = []
+    for block in reversed(chain.chain[1:]):
+        if len(found) >= num_to_recall:
+            break
+        if isinstance(block.data, dict) and block.data.get(AGENT_ID_FIELD) == agent_id and block.is_data_valid():
+            payload = block.data.get(MEMORY_PAYLOAD_FIELD)
+            if payload is not None:
+                found.append(payload)
+    return found
+
+def _record(chain, count):
+    for i in range(count):
+        chain.record_memory(f"agent-{i % 3}", {"step": i})
+
+def test_index_is_built_on_load(tmp_path):
+    path = str(tmp_path / "memory.jsonl")
+    chain = memoryblock.AgentMemoryBlockchain.load_chain(path)
+    _record(chain, 7)
+    chain.save_chain(path)
+
+    loaded = memoryblock.AgentMemoryBlockchain.load_chain(path)
+    assert loaded._indexed == len(loaded.chain) == 8
+    assert loaded._agent_blocks == {"agent-0": [1, 4, 7], "agent-1": [2, 5], "agent-2": [3, 6]}
+
+def test_index_follows_appended_blocks(tmp_path):
+    path = str(tmp_path / "memory.jsonl")
+    writer = memoryblock.AgentMemoryBlockchain.load_chain(path)
+    _record(writer, 3)
+    writer.save_chain(path)
+    reader = memoryblock.AgentMemoryBlockchain.load_chain(path)
+
+    writer.record_memory("agent-0", {"step": "late"})
+    writer.save_chain(path)
+    assert reader.load_appended() # another worker's block
+    assert reader._agent_blocks["agent-0"] == [1, 4]
+    assert reader.recall_latest_memory("agent-0") == [{"step": "late"}]
+
+def test_index_is_rebuilt_when_chain_is_replaced():
+    chain = memoryblock.AgentMemoryBlockchain()
+    _record(chain, 6)
+    assert chain.recall_latest_memory("agent-1", 5) == [{"step": 4}, {"step": 1}]
+
+    other = memoryblock.AgentMemoryBlockchain()
+    other.record_memory("agent-1", {"step": "other"})
+    other.record_memory("agent-9", {"step": "other"})
+    chain.chain = other.chain + chain.chain[3:] # new list, same length and last block
+    assert chain.recall_latest_memory("agent-1", 5) == _linear_recall(chain, "agent-1", 5) == [{"step": 4}, {"step": "other"}]
+    assert chain.recall_latest_memory("agent-9") == [{"step": "other"}]
+
+    chain.chain[:] = chain.chain[:2] # shortened in place
+    assert chain.recall_latest_memory("agent-0") == []
+    assert chain.recall_latest_memory("agent-1") == [{"step": "other"}]
+
+    chain.chain[1:] = other.chain[2:] # same length, different last block
+    assert chain.recall_latest_memory("agent-1") == []
+    assert chain.recall_latest_memory("agent-9") == [{"step": "other"}]
+
+def test_recall_matches_linear_scan():
+    chain = memoryblock.AgentMemoryBlockchain()
+    _record(chain, 20)
+    chain.chain[-2].data[MEMORY_PAYLOAD_FIELD] = {"step": "tampered"} # fails its signature, skipped
+    for agent_id in ("agent-0", "agent-1", "agent-2", "nobody"):
+        for num_to_recall in (1, 3, 50):
+            recalled = chain.recall_latest_memory(agent_id, num_to_recall)
+            assert recalled == _linear_recall(chain, agent_id, num_to_recall)
+            assert len(recalled) <= num_to_recall
+    assert chain.recall_latest_memory("agent-0", 2) == [{"step": 15}, {"step": 12}]
+
+def test_unhashable_agent_id_is_not_indexed_but_recalled():
+    chain = memoryblock.AgentMemoryBlockchain()
+    assert chain.record_memory(["team", "a"], {"step": 1})
+    assert chain.record_memory({"team": "b"}, {"step": 2})
+    chain.record_memory("agent-0", {"step": 3})
+    assert set(chain._agent_blocks) == {"agent-0"}
+    assert chain.recall_latest_memory(["team", "a"]) == [{"step": 1}]
+    assert chain.recall_latest_memory({"team": "b"}) == [{"step": 2}]
+    assert chain.recall_latest_memory("agent-0") == [{"step": 3}]
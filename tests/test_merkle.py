@@ -0,0 +1,100 @@
+import hashlib
+import json
+
+import pytest
+
+import mediblock as mb
+import merkle
+
+
+def reference_root(leaves):
+    """RFC 6962 Merkle Tree Hash, computed recursively."""
+    if len(leaves) == 1:
+        return merkle.leaf_hash(leaves[0])
+    k = 1
+    while k * 2 < len(leaves):
+        k *= 2
+    return merkle.node_hash(reference_root(leaves[:k]), reference_root(leaves[k:]))
+
+def block_hashes(n):
+    return [hashlib.sha256(str(i).encode()).hexdigest() for i in range(n)]
+
+def record(note):
+    return {
+        "patient_name": "test", "session_date": "2026-01-01", "main_topics": [note],
+        "action_plan": "-", "overall_assessment": "-", "risk_assessment": "-",
+    }
+
+
+@pytest.mark.parametrize("n", [1, 2, 3, 5, 8, 13, 33])
+def test_every_proof_verifies_against_reference_root(n):
+    hashes = block_hashes(n)
+    tree = merkle.MerkleTree()
+    for block_hash in hashes:
+        tree.append(block_hash)
+    for size in range(1, n + 1):
+        assert tree.root(size) == reference_root(hashes[:size]).hex()
+        for index in range(size):
+            proof = tree.inclusion_proof(index, size)
+            assert merkle.verify_inclusion(proof["block_hash"], index, size, proof["path"], proof["root"])
+
+def test_proof_rejects_other_hash_position_or_root():
+    hashes = block_hashes(11)
+    tree = merkle.MerkleTree()
+    for block_hash in hashes:
+        tree.append(block_hash)
+    proof = tree.inclusion_proof(6)
+    args = (proof["index"], proof["size"], proof["path"], proof["root"])
+    assert merkle.verify_inclusion(hashes[6], *args)
+    assert not merkle.verify_inclusion(hashes[5], *args)
+    assert not merkle.verify_inclusion(hashes[6], 5, *args[1:])
+    assert not merkle.verify_inclusion(hashes[6], 6, 7, proof["path"], proof["root"])
+    assert not merkle.verify_inclusion(hashes[6], 6, 11, proof["path"][:-1], proof["root"])
+    assert not merkle.verify_inclusion(hashes[6], 6, 11, proof["path"], tree.root(10))
+
+def test_sync_rebuilds_when_chain_replaced():
+    class B:
+        def __init__(self, h):
+            self.hash = h
+    hashes = block_hashes(6)
+    tree = merkle.MerkleTree().sync([B(h) for h in hashes])
+    replaced = hashes[:3] + block_hashes(9)[6:]
+    tree.sync([B(h) for h in replaced])
+    assert tree.root() == reference_root(replaced).hex()
+
+
+def make_saved_chain(path, n):
+    chain = mb.MedicalBlockchain.load_chain(path)
+    for i in range(n):
+        chain.add_block(record(f"record {i}"))
+    chain.save_chain(path)
+    return chain
+
+def test_verify_saves_root_with_checkpoint(tmp_path):
+    path = str(tmp_path / "records.jsonl")
+    chain = make_saved_chain(path, 4)
+    assert chain.verify()
+    size, root = chain.store.saved_root()
+    assert (size, root) == (5, chain.merkle_tree().root())
+    proof = chain.inclusion_proof(2)
+    assert merkle.verify_inclusion(chain.chain[2].hash, 2, size, proof["path"], root)
+
+def test_changed_hash_below_checkpoint_fails_incremental_verify(tmp_path):
+    path = str(tmp_path / "records.jsonl")
+    make_saved_chain(path, 4).verify()
+    # rewrite block 1 consistently (data, signature, hash) and relink block 2;
+    # only block 2's hash is then stale, and it lies below the checkpoint
+    with open(path, encoding="utf-8") as f:
+        blocks = [json.loads(line) for line in f]
+    block = mb.Block.from_dict(blocks[1])
+    block.data["main_topics"] = ["changed"]
+    block.signature = mb.calculate_data_signature(block.data)
+    block.hash = block.calculate_hash()
+    blocks[1] = block.to_dict()
+    blocks[2]["previous_hash"] = block.hash
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(b) + "\n" for b in blocks)
+
+    reloaded = mb.MedicalBlockchain.load_chain(path) # load_chain() runs verify()
+    assert reloaded.verify() is False
+    assert reloaded.verify(full=True) is False # block 2's stored hash no longer matches
@@ -0,0 +1,55 @@
+import asyncio
+import base64
+import json
+
+import outbound
+
+
+class StalledSocket:
+    """Client whose send() blocks until released."""
+
+    def __init__(self):
+        self.sent = []
+        self.release = asyncio.Event()
+
+    async def send(self, frame):
+        await self.release.wait()
+        self.sent.append(frame)
+
+    async def close(self, code=1000, reason=""):
+        pass
+
+
+def test_frame_blocked_across_discard_is_not_sent():
+    async def scenario():
+        ws = StalledSocket()
+        sender = outbound.ClientSender(ws, policy=outbound.BLOCK, max_audio_frames=1, target_audio_bytes=4).start()
+        await sender.send_audio(b"old1") # taken by the sender task, stuck in send()
+        await asyncio.sleep(0)
+        await sender.send_audio(b"old2") # fills the queue
+        blocked = asyncio.create_task(sender.send_audio(b"old3"))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+
+        sender.discard_audio() # barge-in
+        await blocked
+        await sender.send_audio(b"new1")
+        ws.release.set()
+        await sender.close()
+        return ws.sent, sender.stats()
+
+    sent, stats = asyncio.run(asyncio.wait_for(scenario(), 5)) # the old code deadlocked here
+    assert [base64.b64decode(json.loads(frame)["audio"]) for frame in sent] == [b"old1", b"new1"]
+    assert stats["stale_audio_frames"] == 1
+
+def test_bytes_sent_counts_utf8_bytes_of_text():
+    async def scenario():
+        ws = StalledSocket()
+        ws.release.set()
+        sender = outbound.ClientSender(ws).start()
+        await sender.send_json('{"text": "안녕하세요"}')
+        await sender.close()
+        return ws.sent, sender.stats()
+
+    sent, stats = asyncio.run(asyncio.wait_for(scenario(), 5))
+    assert stats["bytes_sent"] == len(sent[0].encode("utf-8")) == len(sent[0]) + 10
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+import resample
+
+
+def tone(rate, seconds, freq=440.0, channels=1, amplitude=8000):
+    t = np.arange(int(rate * seconds)) / rate
+    mono = amplitude * np.sin(2 * np.pi * freq * t)
+    return np.repeat(mono[:, None], channels, axis=1).astype(np.int16).tobytes()
+
+def split(data, sizes):
+    chunks, offset, i = [], 0, 0
+    while offset < len(data):
+        size = sizes[i % len(sizes)]
+        chunks.append(data[offset:offset + size])
+        offset += size
+        i += 1
+    return chunks
+
+
+@pytest.mark.parametrize("rate,channels", [(44100, 1), (48000, 2), (8000, 1), (22050, 2)])
+def test_output_does_not_depend_on_chunking(rate, channels):
+    pcm = tone(rate, 0.5, channels=channels)
+    whole = resample.AudioIngest(rate, channels).process(pcm)
+    ingest = resample.AudioIngest(rate, channels)
+    # odd sizes split samples and interleaved frames across calls
+    chunked = b"".join(ingest.process(chunk) for chunk in split(pcm, [1, 333, 4096, 7, 0, 1023]))
+    assert chunked == whole
+
+@pytest.mark.parametrize("rate", [8000, 44100, 48000])
+def test_output_length_follows_rate_ratio(rate):
+    out = resample.AudioIngest(rate, 1).process(tone(rate, 1.0))
+    assert abs(len(out) // 2 - resample.TARGET_RATE) <= 1
+
+def test_resampled_tone_keeps_frequency_and_level():
+    out = np.frombuffer(resample.AudioIngest(48000, 2).process(tone(48000, 1.0, freq=1000, channels=2)), dtype=np.int16)
+    steady = out[1000:].astype(np.float64)
+    spectrum = np.abs(np.fft.rfft(steady * np.hanning(len(steady))))
+    peak_hz = np.argmax(spectrum) * resample.TARGET_RATE / len(steady)
+    assert abs(peak_hz - 1000) < 5
+    assert abs(np.sqrt(np.mean(steady ** 2)) - 8000 / np.sqrt(2)) < 8000 * 0.02
+
+def test_16k_mono_passes_through():
+    pcm = tone(16000, 0.1)
+    assert resample.AudioIngest().process(pcm) is pcm
+
+@pytest.mark.parametrize("rate,channels", [(4000, 1), (192000, 1), (16000, 0), (16000, 9)])
+def test_unsupported_formats_rejected(rate, channels):
+    with pytest.raises(ValueError):
+        resample.AudioIngest(rate, channels)
@@ -0,0 +1,62 @@
+import pytest
+from google.genai import types
+
+import session_capture
+
+
+def _audio_message(*chunks):
+    parts = [types.Part(inline_data=types.Blob(mime_type="audio/pcm;rate=24000", data=chunk)) for chunk in chunks]
+    return types.LiveServerMessage(server_content=types.LiveServerContent(model_turn=types.Content(role="model", parts=parts)))
+
+def test_live_message_round_trip_keeps_audio_blobs():
+    message = _audio_message(b"\x00\x01" * 100, b"", b"\xff{\"$blob\": 0}")
+    payload = session_capture.encode_live_message(message)
+    decoded = session_capture.decode_live_message(payload)
+    assert decoded == message
+    assert [part.inline_data.data for part in decoded.server_content.model_turn.parts] == [b"\x00\x01" * 100, b"", b"\xff{\"$blob\": 0}"]
+
+def test_live_message_without_blobs():
+    message = types.LiveServerMessage(server_content=types.LiveServerContent(turn_complete=True))
+    assert session_capture.decode_live_message(session_capture.encode_live_message(message)) == message
+
+def _record(path):
+    recorder = session_capture.SessionRecorder(str(path), meta={"session": "s1"})
+    recorder.client('{"setup": {}}')
+    recorder.client(b"\x01\x02\x03")
+    recorder.live(_audio_message(b"\x10" * 32))
+    recorder.close()
+    recorder.close() # idempotent
+    return recorder
+
+def test_capture_file_round_trip(tmp_path):
+    path = tmp_path / "s1.cap"
+    recorder = _record(path)
+    records = list(session_capture.read_capture(str(path)))
+    assert recorder.records == len(records) == 5
+    kinds = [kind for kind, _, _ in records]
+    assert kinds == [session_capture.META, session_capture.CLIENT_TEXT, session_capture.CLIENT_BINARY,
+                     session_capture.LIVE, session_capture.CLIENT_CLOSED]
+    assert records[0][2]["session"] == "s1"
+    assert records[1][2] == '{"setup": {}}'
+    assert records[2][2] == b"\x01\x02\x03"
+    assert records[3][2] == _audio_message(b"\x10" * 32)
+    assert records[4][2] is None
+    times = [t for _, t, _ in records]
+    assert times == sorted(times)
+
+@pytest.mark.parametrize("cut", [1, session_capture._RECORD.size + 1])
+def test_torn_tail_is_ignored(tmp_path, cut):
+    path = tmp_path / "s1.cap"
+    _record(path)
+    data = path.read_bytes()
+    # drop the CLIENT_CLOSED header (torn header) or the end of the LIVE payload (torn payload)
+    path.write_bytes(data[:len(data) - cut])
+    kinds = [kind for kind, _, _ in session_capture.read_capture(str(path))]
+    expected = [session_capture.META, session_capture.CLIENT_TEXT, session_capture.CLIENT_BINARY]
+    assert kinds == (expected + [session_capture.LIVE] if cut == 1 else expected)
+
+def test_rejects_foreign_file(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"not a capture")
+    with pytest.raises(ValueError):
+        list(session_capture.read_capture(str(path)))
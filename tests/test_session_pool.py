@@ -0,0 +1,57 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import session_pool
+
+
+class FakeSocket:
+    close_code = None
+
+
+class FakeSession:
+    def __init__(self, n):
+        self.n = n
+        self._ws = FakeSocket()
+
+
+def fake_connect(opened):
+    @asynccontextmanager
+    async def connect():
+        session = FakeSession(len(opened))
+        opened.append(session)
+        yield session
+    return connect
+
+
+def test_dead_parked_session_is_skipped():
+    async def scenario():
+        opened = []
+        pool = session_pool.LiveSessionPool(fake_connect(opened), min_size=1, max_size=1).start()
+        while not pool.stats()["idle"]:
+            await asyncio.sleep(0.01)
+        opened[0]._ws.close_code = 1011 # server closed the parked session
+        async with pool.connect() as session:
+            used = session
+        stats = pool.stats()
+        await pool.close()
+        return used, opened, stats
+
+    used, opened, stats = asyncio.run(asyncio.wait_for(scenario(), 5))
+    assert used is not opened[0]
+    assert stats["dead"] == 1 and stats["hits"] == 0 and stats["misses"] == 1
+
+def test_live_parked_session_is_reused():
+    async def scenario():
+        opened = []
+        pool = session_pool.LiveSessionPool(fake_connect(opened), min_size=1, max_size=1).start()
+        while not pool.stats()["idle"]:
+            await asyncio.sleep(0.01)
+        async with pool.connect() as session:
+            used = session
+        stats = pool.stats()
+        await pool.close()
+        return used, opened, stats
+
+    used, opened, stats = asyncio.run(asyncio.wait_for(scenario(), 5))
+    assert used is opened[0]
+    assert stats["hits"] == 1
@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+
+import session_registry
+
+
+def test_quick_reconnect_waits_for_release_and_resumes():
+    async def scenario():
+        registry = session_registry.SessionRegistry()
+        old = registry.open("client-1")
+        old.resumption_handle = "handle-1"
+        reconnect = asyncio.create_task(registry.open_when_free("client-1", wait_s=1.0))
+        await asyncio.sleep(0.01)
+        assert not reconnect.done()
+        registry.close(old) # old handler finishes its cleanup
+        return await reconnect
+
+    state = asyncio.run(scenario())
+    assert state.resumption_handle == "handle-1"
+
+def test_reconnect_rejected_while_old_connection_stays_open():
+    async def scenario():
+        registry = session_registry.SessionRegistry()
+        registry.open("client-1")
+        await registry.open_when_free("client-1", wait_s=0.05)
+
+    with pytest.raises(session_registry.SessionInUse):
+        asyncio.run(scenario())
+
+def test_released_handle_expires():
+    registry = session_registry.SessionRegistry(resume_ttl=0)
+    state = registry.open("client-1")
+    state.resumption_handle = "handle-1"
+    registry.close(state)
+    assert registry.open("client-1").resumption_handle is None
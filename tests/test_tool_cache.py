@@ -0,0 +1,117 @@
+import asyncio
+
+import tool_cache
+
+POLICIES = {
+    "view_records": {"ttl_s": 300, "tags": ["medical"]},
+    "recall": {"ttl_s": 300, "tags": ["memory"]},
+    "input_record": {"invalidates": ["medical"]},
+    "play": {},
+}
+
+
+class Tool:
+    """Counts calls; returns the call number (or a fixed result)."""
+
+    def __init__(self, result=None):
+        self.calls = 0
+        self.result = result
+
+    async def __call__(self, args):
+        self.calls += 1
+        return self.result if self.result is not None else {"call": self.calls, "args": args}
+
+
+def call(cache, name, args, run):
+    return asyncio.run(cache.call(name, args, run))
+
+
+def test_same_arguments_hit_the_cache():
+    cache, run = tool_cache.ToolCache(POLICIES), Tool()
+    first = call(cache, "view_records", {"count": 3}, run)
+    assert call(cache, "view_records", {"count": 3}, run) == first
+    assert call(cache, "view_records", {"count": 4}, run) != first
+    assert run.calls == 2
+    assert cache.stats()["hits"] == 1
+
+def test_uncached_function_always_runs():
+    cache, run = tool_cache.ToolCache(POLICIES), Tool()
+    call(cache, "play", {}, run)
+    call(cache, "play", {}, run)
+    assert run.calls == 2
+
+def test_expired_entry_runs_again(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(tool_cache.time, "monotonic", lambda: now[0])
+    cache, run = tool_cache.ToolCache(POLICIES), Tool()
+    call(cache, "view_records", {}, run)
+    now[0] += 301
+    call(cache, "view_records", {}, run)
+    assert run.calls == 2
+
+def test_write_invalidates_only_its_tags():
+    cache, view, recall = tool_cache.ToolCache(POLICIES), Tool(), Tool()
+    call(cache, "view_records", {}, view)
+    call(cache, "recall", {}, recall)
+    call(cache, "input_record", {"text": "..."}, Tool())
+    call(cache, "view_records", {}, view)
+    call(cache, "recall", {}, recall)
+    assert view.calls == 2 and recall.calls == 1
+
+def test_failed_write_still_invalidates():
+    async def failing(args):
+        raise RuntimeError("disk full")
+    cache, view = tool_cache.ToolCache(POLICIES), Tool()
+    call(cache, "view_records", {}, view)
+    try:
+        call(cache, "input_record", {}, failing)
+    except RuntimeError:
+        pass
+    call(cache, "view_records", {}, view)
+    assert view.calls == 2
+
+def test_error_results_are_not_cached():
+    cache = tool_cache.ToolCache(POLICIES)
+    for result in ("error", {"status": "error", "message": "boom"}):
+        run = Tool(result)
+        call(cache, "view_records", {"result": str(result)}, run)
+        call(cache, "view_records", {"result": str(result)}, run)
+        assert run.calls == 2
+
+def test_external_version_change_invalidates():
+    version = [1]
+    cache = tool_cache.ToolCache(POLICIES, versions={"medical": lambda: version[0]})
+    run = Tool()
+    call(cache, "view_records", {}, run)
+    call(cache, "view_records", {}, run)
+    version[0] += 1 # another worker appended to the chain file
+    call(cache, "view_records", {}, run)
+    assert run.calls == 2
+
+def test_write_during_read_is_not_served_stale():
+    async def scenario():
+        cache = tool_cache.ToolCache(POLICIES)
+        started, finish = asyncio.Event(), asyncio.Event()
+        calls = []
+        async def slow_view(args):
+            calls.append(len(calls))
+            started.set()
+            await finish.wait()
+            return {"call": len(calls)}
+        read = asyncio.create_task(cache.call("view_records", {}, slow_view))
+        await started.wait()
+        await cache.call("input_record", {}, Tool()) # lands while the read runs
+        finish.set()
+        await read
+        await cache.call("view_records", {}, slow_view)
+        return len(calls)
+
+    assert asyncio.run(scenario()) == 2
+
+def test_lru_evicts_oldest():
+    cache, run = tool_cache.ToolCache(POLICIES, max_entries=2), Tool()
+    for count in (1, 2, 3):
+        call(cache, "view_records", {"count": count}, run)
+    call(cache, "view_records", {"count": 1}, run)
+    assert run.calls == 4
+    assert cache.stats()["evictions"] == 2
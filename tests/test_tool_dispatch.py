@@ -0,0 +1,87 @@
+import asyncio
+
+from google.genai import types
+
+import tool_dispatch
+
+
+def tool_call(*calls):
+    return types.LiveServerToolCall(function_calls=[types.FunctionCall(id=call_id, name=name, args=args) for call_id, name, args in calls])
+
+
+class Tools:
+    """Tool functions that record their concurrency; `release` lets slow ones finish."""
+
+    def __init__(self):
+        self.running = 0
+        self.max_running = 0
+        self.release = asyncio.Event()
+        self.functions = {"slow": self.slow, "fail": self.fail}
+
+    async def slow(self, args):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await self.release.wait()
+            return args.get("value")
+        finally:
+            self.running -= 1
+
+    async def fail(self, args):
+        raise ValueError("bad input")
+
+
+def run_calls(message, release_after=0.02, cancel=None):
+    async def scenario():
+        tools = Tools()
+        dispatcher = tool_dispatch.ToolDispatcher(tools.functions)
+        sent = []
+        async def send(responses):
+            sent.append(responses)
+        pending = tool_dispatch.PendingToolCalls(dispatcher, send)
+        task = pending.submit(message)
+        await asyncio.sleep(release_after)
+        if cancel:
+            pending.cancel(cancel)
+        tools.release.set()
+        await task
+        return sent, tools, dispatcher, pending
+
+    return asyncio.run(asyncio.wait_for(scenario(), 5))
+
+
+def test_calls_of_one_message_run_concurrently():
+    sent, tools, dispatcher, _ = run_calls(tool_call(("a", "slow", {"value": 1}), ("b", "slow", {"value": 2})))
+    assert tools.max_running == 2
+    assert [(r.id, r.response) for r in sent[0]] == [("a", {"result": 1}), ("b", {"result": 2})]
+    assert dispatcher.stats()["tool_calls"] == 1 and dispatcher.stats()["function_calls"] == 2
+
+def test_failing_and_unknown_functions_answer_with_errors():
+    sent, _, dispatcher, _ = run_calls(tool_call(("a", "fail", {}), ("b", "missing", {}), ("c", "slow", {"value": 3})))
+    responses = {r.id: r.response for r in sent[0]}
+    assert responses["a"] == {"error": "ValueError: bad input"}
+    assert "unknown function" in responses["b"]["error"]
+    assert responses["c"] == {"result": 3}
+    assert dispatcher.stats()["errors"] == 2
+
+def test_cancelled_call_gets_no_response():
+    sent, _, _, pending = run_calls(tool_call(("a", "slow", {"value": 1}), ("b", "slow", {"value": 2})), cancel=["a"])
+    assert [r.id for r in sent[0]] == ["b"]
+    assert pending.stats() == {"cancelled": 1, "send_errors": 0, "pending": 0}
+
+def test_receive_loop_is_not_blocked_and_close_cancels():
+    async def scenario():
+        tools = Tools()
+        sent = []
+        async def send(responses):
+            sent.append(responses)
+        pending = tool_dispatch.PendingToolCalls(tool_dispatch.ToolDispatcher(tools.functions), send)
+        pending.submit(tool_call(("a", "slow", {})))
+        await asyncio.sleep(0.01)
+        running = pending.pending()
+        await pending.close()
+        return running, sent, pending.stats()
+
+    running, sent, stats = asyncio.run(asyncio.wait_for(scenario(), 5))
+    assert running == 1 and sent == []
+    assert stats["cancelled"] == 1 and stats["pending"] == 0
@@ -0,0 +1,89 @@
+import json
+from http import HTTPStatus
+
+import tracing
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = tracing.Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value)
+    lines = list(histogram.lines("x", {"pid": "1"}))
+    assert lines[:3] == [
+        'x_bucket{le="0.1",pid="1"} 1',
+        'x_bucket{le="1.0",pid="1"} 3',
+        'x_bucket{le="+Inf",pid="1"} 4',
+    ]
+    assert lines[3] == 'x_sum{pid="1"} 4.050000'
+    assert lines[4] == 'x_count{pid="1"} 4'
+
+def test_render_groups_series_under_help_and_type():
+    metrics = tracing.Metrics()
+    metrics.describe("turns_total", "counter", "Turns.")
+    metrics.inc("turns_total", outcome="complete")
+    metrics.inc("turns_total", outcome="complete")
+    metrics.inc("turns_total", outcome="interrupted")
+    assert metrics.render().splitlines() == [
+        "# HELP turns_total Turns.",
+        "# TYPE turns_total counter",
+        'turns_total{outcome="complete"} 2',
+        'turns_total{outcome="interrupted"} 1',
+    ]
+
+def test_disabled_tracer_hands_out_null_trace():
+    tracer = tracing.Tracer()
+    trace = tracer.session("a")
+    assert trace is tracing.NULL_TRACE
+    trace.frame_forwarded(trace.frame_received())
+    trace.model_audio()
+    trace.turn_end()
+    assert tracer.metrics.render() == "\n"
+
+def test_turn_spans_and_trace_file(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    tracer = tracing.Tracer(enabled=True, trace_file=str(path))
+    trace = tracer.session("s1")
+    trace.frame_forwarded(trace.frame_received())
+    trace.model_audio()
+    trace.model_audio()
+    trace.tool_done("lookup", 1.0, 1.25, ok=False)
+    trace.turn_end()
+    tracer.close()
+
+    record = json.loads(path.read_text(encoding="utf-8"))
+    assert record["session"] == "s1" and record["turn"] == 1
+    assert record["outcome"] == "complete" and record["input_frames"] == 1
+    assert {"first_audio_ms", "model_audio_ms", "tail_ms"} <= set(record)
+    assert record["tools"] == [{"function": "lookup", "ms": 250.0, "ok": False}]
+    text = tracer.metrics.render()
+    assert 'live_tool_errors_total{function="lookup",pid="' in text
+    assert "live_first_audio_seconds_count" in text
+
+def test_turn_complete_after_interruption_closes_the_same_turn():
+    tracer = tracing.Tracer(enabled=True)
+    trace = tracer.session("s1")
+    trace.model_audio()
+    trace.turn_end(interrupted=True)
+    trace.turn_end() # turn_complete for the interrupted turn
+    trace.model_audio()
+    trace.turn_end()
+    assert trace.turn == 2
+    text = tracer.metrics.render()
+    assert 'outcome="interrupted"' in text
+    complete = [line for line in text.splitlines() if line.startswith('live_turns_total{outcome="complete"')]
+    assert complete and complete[0].endswith(" 1")
+
+def test_register_tools_creates_zero_series():
+    tracer = tracing.Tracer(enabled=True)
+    tracer.register_tools(["a", "b"])
+    lines = [line for line in tracer.metrics.render().splitlines() if line.startswith("live_tool_errors_total")]
+    assert len(lines) == 2 and all(line.endswith(" 0") for line in lines)
+
+def test_process_request_legacy_api_serves_metrics_only():
+    tracer = tracing.Tracer(enabled=True)
+    tracer.session("s1").turn_end()
+    status, headers, body = tracer.process_request(tracing.METRICS_PATH + "?x=1", {})
+    assert status == HTTPStatus.OK
+    assert ("Content-Type", tracing.CONTENT_TYPE) in headers
+    assert b"# TYPE live_turns_total counter" in body
+    assert tracer.process_request("/", {}) is None
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+import vad
+
+RATE = 16000
+
+
+def noise(seconds, dbfs, seed=0):
+    """White noise whose RMS level is `dbfs` (int16 PCM bytes)."""
+    rms = 32768 * 10 ** (dbfs / 20)
+    samples = np.random.default_rng(seed).normal(0, rms, int(RATE * seconds))
+    return np.clip(samples, -32768, 32767).astype(np.int16).tobytes()
+
+def run(detector, pcm, chunk_bytes=RATE // 4 * 2):
+    events = []
+    for offset in range(0, len(pcm), chunk_bytes):
+        events += detector.process(pcm[offset:offset + chunk_bytes])
+    return events
+
+
+def test_steady_noise_is_not_speech():
+    events = run(vad.StreamingVAD(), noise(5, -50))
+    assert events == []
+
+@pytest.mark.parametrize("level", [-50, -40])
+def test_step_in_room_noise_ends_within_one_floor_window(level):
+    detector = vad.StreamingVAD(floor_window_ms=1500, hangover_ms=400)
+    events = run(detector, noise(2, -90) + noise(20, level, seed=1))
+    ends = [t for event, t in events if event == vad.SPEECH_END]
+    assert ends, events
+    assert ends[0] < 2 + 1.5 + 0.4 + 0.1
+    assert not detector.is_speaking
+    assert detector.noise_floor_dbfs == pytest.approx(level, abs=3)
+
+def test_speech_burst_over_noise():
+    detector = vad.StreamingVAD(onset_ms=60, hangover_ms=400)
+    events = run(detector, noise(2, -55) + noise(1, -25, seed=1) + noise(2, -55, seed=2))
+    assert [event for event, _t in events] == [vad.SPEECH_START, vad.SPEECH_END]
+    start, end = events[0][1], events[1][1]
+    assert 2.0 < start < 2.1
+    assert 3.4 <= end < 3.5
+
+def test_speech_longer_than_floor_window_with_pauses_stays_one_utterance():
+    detector = vad.StreamingVAD(floor_window_ms=1500, hangover_ms=400)
+    talk = b"".join(noise(0.8, -25, seed=i) + noise(0.2, -60, seed=100 + i) for i in range(5))
+    events = run(detector, noise(1, -60) + talk + noise(2, -60, seed=99))
+    assert [event for event, _t in events] == [vad.SPEECH_START, vad.SPEECH_END]
+
+def test_odd_and_uneven_chunks_give_same_events():
+    pcm = noise(1, -55) + noise(1, -25, seed=1) + noise(1, -55, seed=2)
+    whole = vad.StreamingVAD().process(pcm)
+    detector = vad.StreamingVAD()
+    split = []
+    sizes = [1, 333, 4097, 7, 2]
+    offset = i = 0
+    while offset < len(pcm):
+        size = sizes[i % len(sizes)]
+        split += detector.process(pcm[offset:offset + size])
+        offset += size
+        i += 1
+    assert split == whole
+    assert detector.samples_seen * 2 == len(pcm) - len(pcm) % (detector.frame_size * 2)
@@ -0,0 +1,94 @@
+import json
+import time
+from collections import OrderedDict, defaultdict
+
+import app_logging
+
+log = app_logging.get_logger("tools")
+
+
+class ToolCache:
+    """
+    LRU/TTL cache of tool results, keyed on (function name, arguments).
+
+    Policies come from the tool module (my_function_callings.tool_cache_policies):
+        {"ttl_s": 300, "tags": ["music"]}   cacheable read, depends on the "music" data
+        {"invalidates": ["memory"]}         write, drops every entry tagged "memory"
+    An entry is only served while the versions of its tags are unchanged: a local
+    counter bumped by writes through this cache, plus an optional external version
+    per tag (e.g. the chain file stamp), so writes made by other worker processes
+    invalidate it too. Failed results ("error" or {"status": "error"}) are not cached.
+    """
+
+    def __init__(self, policies, versions=None, max_entries=256):
+        """
+        Args:
+            policies (dict): function name -> policy dict (see above).
+            versions (dict): tag -> callable returning the current version of that data.
+            max_entries (int): LRU capacity.
+        """
+        self.policies = policies
+        self.versions = versions or {}
+        self.max_entries = max_entries
+        self._entries = OrderedDict() # key -> (value, expires_at, stamp)
+        self._generation = defaultdict(int)
+        self.metrics = {"hits": 0, "misses": 0, "stores": 0, "invalidations": 0, "evictions": 0}
+
+    def _stamp(self, tags):
+        return tuple((self._generation[tag], self.versions[tag]() if tag in self.versions else None) for tag in tags)
+
+    @staticmethod
+    def _key(name, args):
+        return name, json.dumps(args, sort_keys=True, ensure_ascii=False, default=str)
+
+    @staticmethod
+    def _cacheable_result(value):
+        if value == "error":
+            return False
+        return not (isinstance(value, dict) and value.get("status") == "error")
+
+    async def call(self, name, args, run):
+        """Returns the cached result of `name(args)` or awaits `run(args)` and caches it."""
+        policy = self.policies.get(name) or {}
+        if "ttl_s" not in policy:
+            try:
+                return await run(args)
+            finally:
+                # 실패한 기록도 일부 저장되었을 수 있으므로 항상 무효화
+                self.invalidate(policy.get("invalidates", ()))
+
+        tags = policy.get("tags", ())
+        key = self._key(name, args)
+        stamp = self._stamp(tags) # 실행 전 버전: 실행 중 기록이 생기면 이 결과는 바로 무효
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] > time.monotonic() and entry[2] == stamp:
+            self._entries.move_to_end(key)
+            self.metrics["hits"] += 1
+            log.debug("tool result served from cache", function=name)
+            return entry[0]
+
+        self.metrics["misses"] += 1
+        value = await run(args)
+        if self.max_entries > 0 and self._cacheable_result(value):
+            self._entries[key] = (value, time.monotonic() + policy["ttl_s"], stamp)
+            self._entries.move_to_end(key)
+            self.metrics["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.metrics["evictions"] += 1
+        return value
+
+    def invalidate(self, tags):
+        """Drops the entries of every function tagged with one of `tags`."""
+        tags = set(tags)
+        if not tags:
+            return
+        for tag in tags:
+            self._generation[tag] += 1
+        names = {name for name, policy in self.policies.items() if tags & set(policy.get("tags", ()))}
+        for key in [key for key in self._entries if key[0] in names]:
+            del self._entries[key]
+            self.metrics["invalidations"] += 1
+
+    def stats(self):
+        return {**self.metrics, "entries": len(self._entries)}
@@ -0,0 +1,151 @@
+import asyncio
+import time
+
+from google.genai import types
+
+import app_logging
+
+log = app_logging.get_logger("tools")
+
+
+class ToolDispatcher:
+    """
+    Runs the individual function calls of Live `tool_call` messages (scheduled by
+    PendingToolCalls, which runs all calls of one message concurrently).
+
+    Each call gets its own FunctionResponse, so a failing or unknown function
+    answers with {"error": ...} instead of dropping the other results (the model
+    waits for a response to every call id).
+    """
+
+    def __init__(self, functions, cache=None):
+        """
+        Args:
+            functions (dict): name -> async function taking the call's args dict
+                              (my_function_callings.available_functions).
+            cache (ToolCache): Optional result cache for idempotent tools.
+        """
+        self.functions = functions
+        self.cache = cache
+        self.metrics = {"tool_calls": 0, "function_calls": 0, "errors": 0}
+
+    async def call(self, function_call):
+        """Runs one FunctionCall and returns its FunctionResponse (never raises)."""
+        name = function_call.name
+        function = self.functions.get(name)
+        started = time.perf_counter()
+        self.metrics["function_calls"] += 1
+        try:
+            if function is None:
+                raise LookupError(f"unknown function: {name}")
+            args = function_call.args or {}
+            if self.cache is not None:
+                result = await self.cache.call(name, args, function)
+            else:
+                result = await function(args)
+            response = {"result": result}
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.metrics["errors"] += 1
+            log.warning("tool call failed", function=name, error=repr(e))
+            response = {"error": f"{type(e).__name__}: {e}"}
+        log.debug("tool call done", function=name, ms=round((time.perf_counter() - started) * 1000, 1))
+        return types.FunctionResponse(id=function_call.id, name=name, response=response)
+
+    def count_tool_call(self):
+        """Counts one received tool_call message (its function calls are counted by call())."""
+        self.metrics["tool_calls"] += 1
+
+    def stats(self):
+        if self.cache is not None:
+            return {**self.metrics, "cache": self.cache.stats()}
+        return dict(self.metrics)
+
+
+class PendingToolCalls:
+    """
+    Per-connection background execution of tool calls.
+
+    `submit()` returns immediately, so the Live receive loop keeps draining the
+    session (audio, transcripts, resumption updates) while tools run. Each function
+    call is its own task: `cancel(ids)` handles the server's tool_call_cancellation
+    and `close()` cancels everything still running when the client disconnects.
+    """
+
+    def __init__(self, dispatcher, send_responses, trace=None):
+        """
+        Args:
+            dispatcher (ToolDispatcher): Runs the individual function calls.
+            send_responses (callable): async fn(list[FunctionResponse]), e.g. session.send_tool_response.
+            trace (tracing.SessionTrace): Optional; receives each call's start/finish.
+        """
+        self.dispatcher = dispatcher
+        self._send_responses = send_responses
+        self.trace = trace
+        self._calls = {} # call id -> task
+        self._tasks = set() # one per tool_call message
+        self.metrics = {"cancelled": 0, "send_errors": 0}
+
+    def submit(self, tool_call):
+        task = asyncio.create_task(self._answer(tool_call))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _answer(self, tool_call):
+        self.dispatcher.count_tool_call()
+        calls = {}
+        for function_call in tool_call.function_calls or []:
+            calls[function_call.id] = asyncio.create_task(self._call(function_call))
+        if not calls:
+            return
+        self._calls.update(calls)
+        try:
+            await asyncio.wait(calls.values())
+        except asyncio.CancelledError:
+            for task in calls.values():
+                task.cancel()
+            raise
+        finally:
+            for call_id in calls:
+                self._calls.pop(call_id, None)
+        # 취소된 call 은 응답하지 않음 (서버가 더 이상 기다리지 않음)
+        responses = [task.result() for task in calls.values() if not task.cancelled()]
+        if not responses:
+            return
+        try:
+            await self._send_responses(responses)
+            log.debug("sent function responses", count=len(responses))
+        except Exception as e:
+            self.metrics["send_errors"] += 1
+            log.warning("failed to send function responses", error=repr(e))
+
+    async def _call(self, function_call):
+        started = time.perf_counter()
+        response = await self.dispatcher.call(function_call)
+        if self.trace is not None:
+            self.trace.tool_done(function_call.name, started, time.perf_counter(), "error" not in response.response)
+        return response
+
+    def cancel(self, ids):
+        """Cancels the function calls the server no longer needs (tool_call_cancellation)."""
+        for call_id in ids or []:
+            task = self._calls.get(call_id)
+            if task is not None and task.cancel():
+                self.metrics["cancelled"] += 1
+                log.info("tool call cancelled by server", call_id=call_id)
+
+    def pending(self):
+        return len(self._calls)
+
+    async def close(self):
+        """Cancels all outstanding tool calls and waits for them to finish."""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        self.metrics["cancelled"] += len(self._calls)
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self):
+        return {**self.metrics, "pending": self.pending()}
@@ -0,0 +1,247 @@
+import json
+import os
+import threading
+import time
+from http import HTTPStatus
+
+METRICS_PATH = "/metrics"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1) # last: +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            yield f"{name}_bucket{_labels({**labels, 'le': le})} {cumulative}"
+        yield f"{name}_sum{_labels(labels)} {self.sum:.6f}"
+        yield f"{name}_count{_labels(labels)} {self.count}"
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in sorted(labels.items())) + "}"
+
+
+class Metrics:
+    """Process-local histograms and counters rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._histograms = {} # (name, labels) -> Histogram
+        self._counters = {}
+        self._help = {}
+        self._lock = threading.Lock() # tool timings may be reported from worker threads
+
+    def describe(self, name, kind, text):
+        self._help[name] = (kind, text)
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def render(self):
+        out = []
+        with self._lock:
+            series = sorted(self._histograms.items()) + sorted(self._counters.items())
+            for name in sorted({key[0] for key, _ in series}):
+                if name in self._help:
+                    kind, text = self._help[name]
+                    out.append(f"# HELP {name} {text}")
+                    out.append(f"# TYPE {name} {kind}")
+                for (series_name, labels), value in series:
+                    if series_name != name:
+                        continue
+                    if isinstance(value, Histogram):
+                        out.extend(value.lines(name, dict(labels)))
+                    else:
+                        out.append(f"{name}{_labels(dict(labels))} {value}")
+        return "\n".join(out) + "\n"
+
+
+class Tracer:
+    """
+    Per-turn latency spans for Live sessions.
+
+    Disabled (the default) every session gets a shared no-op trace, so the hot
+    paths only pay for one method call. Enabled, spans are aggregated into
+    histograms (served at METRICS_PATH on the websocket port) and, if
+    `trace_file` is set, one JSON line per finished turn is appended to it.
+    With several worker processes each scrape sees only the worker that accepted
+    it (series carry a `pid` label); the trace file collects all workers.
+    """
+
+    def __init__(self, enabled=False, trace_file=None, metrics_path=METRICS_PATH):
+        self.enabled = enabled
+        self.metrics_path = metrics_path
+        self.metrics = Metrics()
+        self._trace_file = None
+        if enabled and trace_file:
+            # line buffered append: 한 줄(턴) 단위 기록, 워커 프로세스가 같은 파일에 추가
+            self._trace_file = open(trace_file, "a", buffering=1, encoding="utf-8")
+        m = self.metrics
+        m.describe("live_frame_forward_seconds", "histogram", "Client audio frame received -> forwarded to the Live API.")
+        m.describe("live_first_audio_seconds", "histogram", "Last forwarded user audio frame -> first model audio part.")
+        m.describe("live_model_audio_seconds", "histogram", "First -> last model audio part of a turn.")
+        m.describe("live_turn_tail_seconds", "histogram", "Last model audio part -> turn_complete.")
+        m.describe("live_tool_seconds", "histogram", "Tool call start -> finish, per function.")
+        m.describe("live_turns_total", "counter", "Model turns by outcome.")
+        m.describe("live_tool_errors_total", "counter", "Failed tool calls, per function.")
+
+    @property
+    def _pid(self):
+        # 워커는 fork 로 생성되므로 생성 시점이 아닌 사용 시점의 pid
+        return str(os.getpid())
+
+    def register_tools(self, names):
+        """Creates the per-function series up front so every tool shows up before its first call."""
+        if not self.enabled:
+            return
+        for name in names:
+            self.metrics.inc("live_tool_errors_total", 0, function=name, pid=self._pid)
+
+    def session(self, key):
+        return SessionTrace(self, key) if self.enabled else NULL_TRACE
+
+    def _write(self, record):
+        if self._trace_file is not None:
+            self._trace_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    # --- HTTP endpoint (websockets process_request hook) ---
+    def process_request(self, first, second):
+        """Answers GET `metrics_path`; other requests continue the websocket handshake."""
+        if isinstance(first, str): # legacy API: (path, request_headers)
+            if first.split("?")[0] == self.metrics_path:
+                return HTTPStatus.OK, [("Content-Type", CONTENT_TYPE)], self.metrics.render().encode()
+            return None
+        if second.path.split("?")[0] == self.metrics_path: # new API: (connection, request)
+            response = first.respond(HTTPStatus.OK, self.metrics.render())
+            response.headers["Content-Type"] = CONTENT_TYPE
+            return response
+        return None
+
+    def close(self):
+        if self._trace_file is not None:
+            self._trace_file.close()
+            self._trace_file = None
+
+
+class SessionTrace:
+    """Turn spans of one connection (all methods run on the event loop)."""
+
+    def __init__(self, tracer, key):
+        self.tracer = tracer
+        self.key = key
+        self.turn = 0
+        self._last_outcome = None
+        self._reset()
+
+    def _reset(self):
+        self.last_forwarded = None
+        self.input_frames = 0
+        self.first_audio = None
+        self.last_audio = None
+        self.user_end = None # 첫 모델 오디오 직전 마지막 사용자 프레임
+        self.tools = []
+
+    def frame_received(self):
+        return time.perf_counter()
+
+    def frame_forwarded(self, received_at):
+        now = time.perf_counter()
+        self.last_forwarded = now
+        self.input_frames += 1
+        self.tracer.metrics.observe("live_frame_forward_seconds", now - received_at, pid=self.tracer._pid)
+
+    def model_audio(self):
+        now = time.perf_counter()
+        if self.first_audio is None:
+            self.first_audio = now
+            self.user_end = self.last_forwarded
+        self.last_audio = now
+
+    def tool_done(self, name, started, finished, ok):
+        m = self.tracer.metrics
+        m.observe("live_tool_seconds", finished - started, function=name, pid=self.tracer._pid)
+        if not ok:
+            m.inc("live_tool_errors_total", function=name, pid=self.tracer._pid)
+        self.tools.append({"function": name, "ms": round((finished - started) * 1000, 1), "ok": ok})
+
+    def turn_end(self, interrupted=False):
+        """Closes the turn at turn_complete (or interrupted) and records its spans."""
+        if self._last_outcome == "interrupted" and self.first_audio is None and not self.tools:
+            self._last_outcome = None
+            return # turn_complete that follows an interruption closes the same turn
+        now = time.perf_counter()
+        m, pid = self.tracer.metrics, self.tracer._pid
+        spans = {}
+        if self.first_audio is not None:
+            if self.user_end is not None:
+                spans["first_audio_ms"] = self.first_audio - self.user_end
+            spans["model_audio_ms"] = self.last_audio - self.first_audio
+            spans["tail_ms"] = now - self.last_audio
+        names = {"first_audio_ms": "live_first_audio_seconds", "model_audio_ms": "live_model_audio_seconds", "tail_ms": "live_turn_tail_seconds"}
+        for span, seconds in spans.items():
+            m.observe(names[span], seconds, pid=pid)
+        outcome = self._last_outcome = "interrupted" if interrupted else "complete"
+        m.inc("live_turns_total", outcome=outcome, pid=pid)
+        self.turn += 1
+        self.tracer._write({
+            "ts": time.time(),
+            "pid": int(pid),
+            "session": self.key,
+            "turn": self.turn,
+            "outcome": outcome,
+            "input_frames": self.input_frames,
+            **{span: round(seconds * 1000, 1) for span, seconds in spans.items()},
+            "tools": self.tools,
+        })
+        self._reset()
+
+
+class _NullSessionTrace:
+    """Tracing disabled: every hook is a no-op."""
+    key = None
+
+    def frame_received(self):
+        return 0.0
+
+    def frame_forwarded(self, received_at):
+        pass
+
+    def model_audio(self):
+        pass
+
+    def tool_done(self, name, started, finished, ok):
+        pass
+
+    def turn_end(self, interrupted=False):
+        pass
+
+NULL_TRACE = _NullSessionTrace()
@@ -0,0 +1,142 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+
+import google.generativeai as generative
+
+import app_logging
+import audio_encoders
+
+log = app_logging.get_logger("transcription")
+
+TRANSCRIPTION_PROMPT = """Generate a transcript of the speech.
+        Please do not include any other text in the response.
+        If you cannot hear the speech, please only say '<Not recognizable>'."""
+NOT_RECOGNIZABLE = {"<Not recognizable>", "<Not recognizable>\n"}
+
+# --- Shared encoder pool (only used by encoders with offload=True) ---
+_encode_pool = None
+
+def get_encode_pool(max_workers=2):
+    """Returns the process-wide encoder pool, creating it on first use."""
+    global _encode_pool
+    if _encode_pool is None:
+        _encode_pool = ProcessPoolExecutor(max_workers=max_workers)
+    return _encode_pool
+
+def configure(api_key):
+    """Sets the API key for the transcription SDK (google.generativeai)."""
+    generative.configure(api_key=api_key)
+
+def shutdown_encode_pool():
+    """Stops the encoder pool's processes (call on server shutdown)."""
+    global _encode_pool
+    if _encode_pool is not None:
+        _encode_pool.shutdown(wait=False, cancel_futures=True)
+        _encode_pool = None
+
+async def encode_audio(audio_data, sample_rate, encoder_name="wav", executor=None):
+    """
+    Encodes PCM for the transcription model.
+
+    Returns:
+        tuple: (bytes, mime_type). Light encoders (wav) run inline; heavy ones in the pool.
+    """
+    encoder = audio_encoders.get_encoder(encoder_name)
+    if not encoder.offload:
+        return encoder.encode(audio_data, sample_rate), encoder.mime_type
+    loop = asyncio.get_running_loop()
+    data = await loop.run_in_executor(executor or get_encode_pool(), encoder.encode, bytes(audio_data), sample_rate)
+    return data, encoder.mime_type
+
+async def transcribe_audio(audio_data, sample_rate, model_name, encoder_name="wav", executor=None, timeout=30):
+    """Transcribes audio without blocking the event loop (no base64 round trip)."""
+    try:
+        # Make sure we have valid audio data
+        if not audio_data:
+            return "No audio data received."
+
+        data, mime_type = await encode_audio(audio_data, sample_rate, encoder_name, executor)
+        if not data:
+            return "Audio conversion failed."
+
+        transcription_client = generative.GenerativeModel(model_name=model_name)
+        response = await asyncio.wait_for(
+            transcription_client.generate_content_async(
+                [
+                    TRANSCRIPTION_PROMPT,
+                    {"mime_type": mime_type, "data": data},
+                ]
+            ),
+            timeout=timeout,
+        )
+
+        return response.text
+
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        log.error("transcription failed", error=repr(e))
+        return None
+
+class TranscriptionPipeline:
+    """
+    Per-connection transcription queue.
+
+    Turns are encoded/transcribed concurrently, but their results are delivered
+    through `emit` strictly in submission order. At most `max_pending` turns may be
+    in flight; further turns are dropped instead of stalling the audio relay.
+    """
+
+    def __init__(self, emit, model_name, max_pending=4, executor=None, encoder_name="wav"):
+        """
+        Args:
+            emit (coroutine function): Called as `await emit(text)` for each transcript.
+            model_name (str): Transcription model (cfg.TRANSCRIPTION_MODEL).
+            max_pending (int): Queue-depth limit per connection.
+            executor: Encoder pool; defaults to the shared process pool.
+            encoder_name (str): audio_encoders backend (wav, flac, mp3, pydub).
+        """
+        self._emit = emit
+        self._model_name = model_name
+        self._executor = executor
+        self._encoder_name = encoder_name
+        self.max_pending = max(1, max_pending)
+        self._pending = asyncio.Queue()
+        self._in_flight = 0 # submitted turns not yet delivered (queued + the one being awaited)
+        self._deliver_task = asyncio.create_task(self._deliver())
+        self.dropped = 0
+
+    def submit(self, pcm, prefix, sample_rate):
+        """Schedules one turn. Returns False if the queue is full and the turn was dropped."""
+        if self._in_flight >= self.max_pending:
+            self.dropped += 1
+            log.warning("transcription queue full, dropping turn", max_pending=self.max_pending, prefix=prefix, bytes=len(pcm))
+            return False
+        job = asyncio.create_task(transcribe_audio(bytes(pcm), sample_rate, self._model_name, self._encoder_name, self._executor))
+        self._in_flight += 1
+        self._pending.put_nowait((prefix, job))
+        return True
+
+    async def _deliver(self):
+        while True:
+            prefix, job = await self._pending.get()
+            try:
+                text = await job
+                if text and text not in NOT_RECOGNIZABLE:
+                    log.debug("transcribed turn", prefix=prefix, text=text) # DEBUG 에서만 전사 내용 출력
+                    await self._emit(prefix + text)
+            except asyncio.CancelledError:
+                job.cancel()
+                raise
+            except Exception as e:
+                log.error("error delivering transcript", error=repr(e))
+            finally:
+                self._in_flight -= 1
+
+    async def close(self):
+        """Cancels queued turns and the delivery task (call when the websocket closes)."""
+        self._deliver_task.cancel()
+        while not self._pending.empty():
+            _prefix, job = self._pending.get_nowait()
+            job.cancel()
+        await asyncio.gather(self._deliver_task, return_exceptions=True)
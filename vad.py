@@ -0,0 +1,169 @@
+from collections import deque
+
+import numpy as np
+
+# --- Events ---
+SPEECH_START = "speech_start"
+SPEECH_END = "speech_end"
+
+FULL_SCALE_SQ = float(2 ** 15) ** 2 # int16 full-scale amplitude, squared
+ENERGY_EPS = 1e-12                  # -120 dBFS, avoids log10(0)
+
+
+class StreamingVAD:
+    """
+    Incremental energy-based voice-activity detector for 16-bit mono PCM.
+
+    Audio is cut into fixed-size frames. Each frame's mean-square energy is summed in
+    float32 (no int16 overflow) and compared to a noise floor tracked by minimum
+    statistics: the quietest frame of the last `floor_window_ms`. Speech has pauses
+    within that window, so the floor stays at the background level while someone
+    talks, yet a steady rise in room noise lifts it within one window (it is never
+    mistaken for endless speech). Onset and hangover timers turn the per-frame
+    decisions into speech_start / speech_end events.
+
+    Work buffers are preallocated and only grow if a chunk larger than any seen before
+    arrives, so steady-state calls cost O(frames in chunk) with no reallocation.
+    """
+
+    def __init__(self, sample_rate=16000, frame_ms=20, onset_ms=60, hangover_ms=400,
+                 threshold_db=9.0, min_speech_dbfs=-70.0, floor_window_ms=1500, max_chunk_ms=3000):
+        """
+        Args:
+            sample_rate (int): Input sample rate in Hz.
+            frame_ms (int): Analysis frame length.
+            onset_ms (int): Continuous speech required before speech_start fires.
+            hangover_ms (int): Continuous silence required before speech_end fires.
+            threshold_db (float): Margin above the noise floor that counts as speech.
+            min_speech_dbfs (float): Absolute level below which a frame is never speech.
+            floor_window_ms (int): Noise floor = minimum frame energy over this window
+                                   (seeded from the first frames of the stream).
+            max_chunk_ms (int): Chunk length the work buffers are sized for up front.
+        """
+        self.sample_rate = sample_rate
+        self.frame_size = max(1, sample_rate * frame_ms // 1000)
+        self.frame_ms = frame_ms
+        self.onset_frames = max(1, -(-onset_ms // frame_ms))
+        self.hangover_frames = max(1, -(-hangover_ms // frame_ms))
+        self.threshold_db = threshold_db
+        self.min_speech_dbfs = min_speech_dbfs
+        self.floor_window_frames = max(1, -(-floor_window_ms // frame_ms))
+        self.noise_floor_dbfs = None # first frame seeds it
+        self._floor_window = deque() # (frame number, dbfs), dbfs increasing: window minimum at [0]
+
+        self._carry = np.zeros(self.frame_size, dtype=np.int16) # partial frame between calls
+        self._carry_len = 0
+        self._odd_byte = b"" # half of a sample split across calls
+        self._alloc(max(1, sample_rate * max_chunk_ms // 1000 // self.frame_size + 1))
+
+        self.is_speaking = False
+        self.last_dbfs = -120.0
+        self.samples_seen = 0
+        self._speech_run = 0
+        self._silence_run = 0
+
+    def _alloc(self, max_frames):
+        self._work = np.empty((max_frames, self.frame_size), dtype=np.float32)
+        self._energy = np.empty(max_frames, dtype=np.float32)
+
+    @property
+    def silence_ms(self):
+        """Milliseconds of continuous non-speech frames seen most recently."""
+        return self._silence_run * self.frame_ms
+
+    def reset(self):
+        """Clears timers and the partial frame, keeping the learned noise floor."""
+        self._carry_len = 0
+        self._odd_byte = b""
+        self.is_speaking = False
+        self._speech_run = 0
+        self._silence_run = 0
+
+    def process(self, pcm_bytes):
+        """
+        Feeds a chunk of int16 PCM and returns the events it triggered.
+
+        Returns:
+            list: [(event, time_s), ...] where time_s is the stream time of the frame
+                  that completed the onset/hangover timer.
+        """
+        if self._odd_byte:
+            pcm_bytes = self._odd_byte + bytes(pcm_bytes)
+            self._odd_byte = b""
+        if len(pcm_bytes) % 2:
+            self._odd_byte = bytes(pcm_bytes[-1:])
+            pcm_bytes = memoryview(pcm_bytes)[:-1]
+        samples = np.frombuffer(pcm_bytes, dtype=np.int16)
+        events = []
+        offset = 0
+
+        # 1. Complete the partial frame left from the previous call
+        if self._carry_len:
+            take = min(self.frame_size - self._carry_len, len(samples))
+            self._carry[self._carry_len:self._carry_len + take] = samples[:take]
+            self._carry_len += take
+            offset = take
+            if self._carry_len < self.frame_size:
+                return events
+            self._run_frames(self._carry.reshape(1, -1), events)
+            self._carry_len = 0
+
+        # 2. Whole frames, vectorized
+        n_frames = (len(samples) - offset) // self.frame_size
+        if n_frames:
+            end = offset + n_frames * self.frame_size
+            self._run_frames(samples[offset:end].reshape(n_frames, self.frame_size), events)
+            offset = end
+
+        # 3. Keep the tail for the next call
+        tail = len(samples) - offset
+        if tail:
+            self._carry[:tail] = samples[offset:]
+            self._carry_len = tail
+        return events
+
+    def _run_frames(self, frames, events):
+        n_frames = frames.shape[0]
+        if n_frames > self._energy.shape[0]:
+            self._alloc(n_frames)
+        work = self._work[:n_frames]
+        energy = self._energy[:n_frames]
+
+        np.multiply(frames, frames, out=work, dtype=np.float32)
+        np.sum(work, axis=1, out=energy)
+        energy *= np.float32(1.0 / (self.frame_size * FULL_SCALE_SQ))
+        np.maximum(energy, np.float32(ENERGY_EPS), out=energy)
+        np.log10(energy, out=energy)
+        energy *= np.float32(10.0)
+
+        # Hangover/onset timers are inherently sequential; this loop is O(frames).
+        window = self._floor_window
+        for dbfs in energy.tolist():
+            frame_no = self.samples_seen // self.frame_size
+            self.samples_seen += self.frame_size
+
+            # Minimum statistics: sliding-window minimum (monotonic deque, O(1) amortized)
+            while window and window[-1][1] >= dbfs:
+                window.pop()
+            window.append((frame_no, dbfs))
+            if window[0][0] <= frame_no - self.floor_window_frames:
+                window.popleft()
+            self.noise_floor_dbfs = window[0][1]
+
+            voiced = dbfs > self.min_speech_dbfs and dbfs > self.noise_floor_dbfs + self.threshold_db
+
+            if voiced:
+                self._speech_run += 1
+                self._silence_run = 0
+            else:
+                self._silence_run += 1
+                self._speech_run = 0
+
+            if not self.is_speaking and self._speech_run >= self.onset_frames:
+                self.is_speaking = True
+                events.append((SPEECH_START, self.samples_seen / self.sample_rate))
+            elif self.is_speaking and self._silence_run >= self.hangover_frames:
+                self.is_speaking = False
+                events.append((SPEECH_END, self.samples_seen / self.sample_rate))
+
+        self.last_dbfs = dbfs
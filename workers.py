@@ -0,0 +1,120 @@
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from multiprocessing.connection import wait
+
+import app_logging
+import chain_log
+
+log = app_logging.get_logger("workers")
+
+MAX_BACKOFF_S = 30.0 # restart delay ceiling for a worker that keeps crashing
+
+
+def supports_workers():
+    """Multi-worker mode needs fork() and SO_REUSEPORT (Linux, BSD, macOS)."""
+    return hasattr(os, "fork") and hasattr(socket, "SO_REUSEPORT")
+
+def _worker_entry(index, serve):
+    signal.signal(signal.SIGINT, signal.SIG_IGN) # Ctrl+C is handled by the supervisor
+    log.info("worker started", worker=index, pid=os.getpid())
+    try:
+        asyncio.run(serve(reuse_port=True))
+    finally:
+        # multiprocessing ends the child with os._exit(), which skips atexit handlers
+        chain_log.sync_all()
+        app_logging.shutdown()
+
+
+class Supervisor:
+    """
+    Forks N server workers that each run their own event loop and listen on the same
+    port with SO_REUSEPORT (the kernel spreads new connections across them).
+
+    Crashed workers are restarted, with an exponential delay if they keep dying
+    within `stable_s` of starting. SIGINT/SIGTERM stop all workers with SIGTERM
+    (workers close their server gracefully) and kill those that don't exit in time.
+    """
+
+    def __init__(self, serve, workers, backoff_s=0.5, stable_s=30.0, stop_timeout_s=10.0):
+        """
+        Args:
+            serve (coroutine function): `serve(reuse_port=True)` runs one worker's server.
+            workers (int): Number of worker processes.
+            backoff_s (float): First restart delay after a quick crash.
+            stable_s (float): Uptime after which a worker's crash count resets.
+            stop_timeout_s (float): Grace period for workers on shutdown.
+        """
+        self._serve = serve
+        self.workers = workers
+        self.backoff_s = backoff_s
+        self.stable_s = stable_s
+        self.stop_timeout_s = stop_timeout_s
+        self._ctx = multiprocessing.get_context("fork")
+        self._procs = {}        # index -> Process
+        self._started_at = {}   # index -> monotonic start time
+        self._crashes = {}      # index -> consecutive quick crashes
+        self._restart_at = {}   # index -> monotonic time of a scheduled restart
+        self._stopping = False
+        self.restarts = 0
+
+    def _spawn(self, index):
+        proc = self._ctx.Process(target=_worker_entry, args=(index, self._serve), name=f"worker-{index}", daemon=False)
+        proc.start()
+        self._procs[index] = proc
+        self._started_at[index] = time.monotonic()
+
+    def _on_exit(self, index):
+        proc = self._procs.pop(index)
+        proc.join()
+        uptime = time.monotonic() - self._started_at.pop(index)
+        if self._stopping:
+            return
+        crashes = self._crashes.get(index, 0) + 1 if uptime < self.stable_s else 1
+        self._crashes[index] = crashes
+        delay = 0.0 if crashes == 1 else min(MAX_BACKOFF_S, self.backoff_s * 2 ** (crashes - 2))
+        log.warning("worker exited, restarting", worker=index, pid=proc.pid, exitcode=proc.exitcode, uptime_s=round(uptime, 1), delay_s=round(delay, 1))
+        self._restart_at[index] = time.monotonic() + delay
+
+    def _request_stop(self, signum, _frame):
+        log.info("received signal, stopping workers", signal=signum)
+        self._stopping = True
+
+    def run(self):
+        signal.signal(signal.SIGINT, self._request_stop)
+        signal.signal(signal.SIGTERM, self._request_stop)
+        for index in range(self.workers):
+            self._spawn(index)
+        log.info("supervisor running", pid=os.getpid(), workers=self.workers)
+
+        while not self._stopping:
+            now = time.monotonic()
+            for index, at in list(self._restart_at.items()):
+                if at <= now:
+                    del self._restart_at[index]
+                    self.restarts += 1
+                    self._spawn(index)
+            timeout = 1.0
+            if self._restart_at:
+                timeout = max(0.0, min(timeout, min(self._restart_at.values()) - now))
+            sentinels = {proc.sentinel: index for index, proc in self._procs.items()}
+            for sentinel in wait(list(sentinels), timeout):
+                self._on_exit(sentinels[sentinel])
+
+        self._shutdown()
+
+    def _shutdown(self):
+        for proc in self._procs.values():
+            if proc.is_alive():
+                proc.terminate()
+        deadline = time.monotonic() + self.stop_timeout_s
+        for proc in self._procs.values():
+            proc.join(max(0.0, deadline - time.monotonic()))
+            if proc.is_alive():
+                log.warning("worker did not stop in time, killing", pid=proc.pid)
+                proc.kill()
+                proc.join()
+        log.info("all workers stopped", restarts=self.restarts)